@@ -0,0 +1,31 @@
+"""add token_version to users
+
+Revision ID: 20261017_000001
+Revises: 50f65d6954fa
+Create Date: 2026-10-17 09:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000001"
+down_revision = "50f65d6954fa"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "token_version", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("token_version")
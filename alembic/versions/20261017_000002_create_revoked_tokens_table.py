@@ -0,0 +1,39 @@
+"""create revoked_tokens table
+
+Revision ID: 20261017_000002
+Revises: 20261017_000001
+Create Date: 2026-10-17 10:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000002"
+down_revision = "20261017_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(length=64), primary_key=True),
+        sa.Column("expires_at", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "revoked_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index(
+        "ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,49 @@
+"""create api_keys table
+
+Revision ID: 20261017_000003
+Revises: 20261017_000002
+Create Date: 2026-10-17 11:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_000003"
+down_revision = "20261017_000002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "api_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("prefix", sa.String(length=16), nullable=False),
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("scopes", sa.String(), nullable=False, server_default="read"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_api_keys_user_id", "api_keys", ["user_id"], unique=False)
+    op.create_index("ix_api_keys_prefix", "api_keys", ["prefix"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_api_keys_prefix", table_name="api_keys")
+    op.drop_index("ix_api_keys_user_id", table_name="api_keys")
+    op.drop_table("api_keys")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Measure in-process ASGI throughput of ``GET /ping`` through the full middleware stack.
+
+No server or socket is involved: the app is called directly with a minimal
+ASGI scope so the numbers isolate middleware and routing overhead.
+
+Usage: python scripts/bench_middleware.py [--requests N] [--path /ping]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import Settings  # noqa: E402
+from src.main import create_app  # noqa: E402
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"user-agent", b"bench"),
+            (b"accept", b"*/*"),
+            (b"accept-encoding", b"gzip, deflate"),
+            (b"connection", b"keep-alive"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def run(app, path: str, requests: int) -> float:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    statuses = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    for _ in range(200):
+        await app(_scope(path), receive, send)
+    statuses.clear()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(_scope(path), receive, send)
+    elapsed = time.perf_counter() - started
+    assert set(statuses) == {200}, set(statuses)
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--path", default="/ping")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    settings = Settings(rate_limit={"max_requests": 0})
+    app = create_app(settings)
+    throughput = asyncio.run(run(app, args.path, args.requests))
+    print(f"GET {args.path}: {throughput:,.0f} req/s ({1e6 / throughput:.1f} us/req)")
+
+
+if __name__ == "__main__":
+    main()
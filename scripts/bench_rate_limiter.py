@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Compare per-call cost and memory per client of the in-memory rate limiters.
+
+The second table replays ``--rate`` requests per second from ``--ips``
+addresses on a simulated clock (half the traffic from 100 chatty clients) and
+reports what the limiters and the request-ID tracker retain afterwards.
+
+Usage: python scripts/bench_rate_limiter.py [--clients N] [--calls N]
+           [--rate N] [--ips N] [--seconds N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.security import (  # noqa: E402
+    FixedWindowRateLimiter,
+    GcraRateLimiter,
+    RequestIdTracker,
+    create_rate_limiter,
+)
+
+ALGORITHMS = ("fixed_window", "gcra")
+
+
+def _build(algorithm: str, clients: int):
+    return create_rate_limiter(
+        algorithm,
+        max_requests=100,
+        window_seconds=60,
+        ttl_seconds=120,
+        max_entries=clients * 2,
+    )
+
+
+def measure_call_cost(algorithm: str, clients: int, calls: int) -> float:
+    limiter = _build(algorithm, clients)
+    rng = random.Random(42)
+    identifiers = [
+        f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)
+    ]
+    sequence = [rng.choice(identifiers) for _ in range(calls)]
+    allow = limiter.allow
+    start = time.perf_counter()
+    for identifier in sequence:
+        allow(identifier)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def measure_memory(algorithm: str, clients: int) -> float:
+    identifiers = [
+        f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)
+    ]
+    tracemalloc.start()
+    limiter = _build(algorithm, clients)
+    baseline = tracemalloc.get_traced_memory()[0]
+    for identifier in identifiers:
+        limiter.allow(identifier)
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used / clients
+
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _traffic(rate: int, ips: int, seconds: int) -> list[str]:
+    rng = random.Random(7)
+    addresses = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(ips)]
+    chatty = addresses[:100]
+    return [
+        rng.choice(chatty) if rng.random() < 0.5 else rng.choice(addresses)
+        for _ in range(rate * seconds)
+    ]
+
+
+def replay(name: str, build, traffic: list[str], rate: int) -> None:
+    clock = SimulatedClock()
+    target = build(clock)
+    call = target.register if isinstance(target, RequestIdTracker) else target.allow
+    step = 1 / rate
+    elapsed = 0.0
+    for index, key in enumerate(traffic):
+        clock.now = index * step
+        started = time.perf_counter()
+        call(key)
+        elapsed += time.perf_counter() - started
+
+    tracemalloc.start()
+    target = build(clock)
+    call = target.register if isinstance(target, RequestIdTracker) else target.allow
+    for index, key in enumerate(traffic):
+        clock.now = index * step
+        call(key)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"{name:<14}{elapsed / len(traffic) * 1e9:>10.0f}"
+        f"{len(target):>10}{retained / 1e6:>12.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--calls", type=int, default=500_000)
+    parser.add_argument("--rate", type=int, default=50_000)
+    parser.add_argument("--ips", type=int, default=100_000)
+    parser.add_argument("--seconds", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<14}{'ns/call':>10}{'bytes/client':>15}")
+    for algorithm in ALGORITHMS:
+        cost = measure_call_cost(algorithm, args.clients, args.calls)
+        memory = measure_memory(algorithm, args.clients)
+        print(f"{algorithm:<14}{cost:>10.0f}{memory:>15.0f}")
+
+    print(f"\n{args.rate} req/s from {args.ips} IPs for {args.seconds}s (simulated)")
+    print(f"{'structure':<14}{'ns/call':>10}{'entries':>10}{'retained MB':>12}")
+    traffic = _traffic(args.rate, args.ips, args.seconds)
+    limits = {"max_requests": 100, "window_seconds": 60, "max_entries": 200_000}
+    replay(
+        "fixed_window",
+        lambda clock: FixedWindowRateLimiter(**limits, clock=clock),
+        traffic,
+        args.rate,
+    )
+    replay(
+        "gcra",
+        lambda clock: GcraRateLimiter(**limits, clock=clock),
+        traffic,
+        args.rate,
+    )
+    replay(
+        "request_ids",
+        lambda clock: RequestIdTracker(300, 200_000, clock=clock),
+        traffic,
+        args.rate,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Adaptive concurrency limit used to shed load before the thread pool queues.
+
+Sync handlers run in anyio's worker pool; once it is saturated extra
+requests wait in an unbounded queue and every caller's latency climbs. The
+limiter admits at most ``limit`` requests at a time and adapts the limit
+with AIMD: each fast completion adds ``1 / limit`` (about +1 per round trip
+of the whole window), and a completion slower than
+``latency_threshold_seconds`` multiplies it by ``backoff_ratio``, at most
+once per ``latency_threshold_seconds``. Only latency counts as a congestion
+signal: a 5xx says nothing about load, and any client can provoke one.
+
+Requests are ranked. Each priority may fill only its share of the limit, so
+as the API approaches the limit anonymous traffic is shed first, then
+authenticated reads, and authenticated writes last.
+
+In front of the limit sits a per-tenant fair queue: once every slot is
+taken, requests wait in one queue per tenant and freed slots are handed out
+by deficit round robin, so one tenant with many users cannot take all the
+slots while other tenants time out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from .utils import deadlines
+
+PRIORITY_SHARES: Dict[str, float] = {
+    "write": 1.0,
+    "read": 0.85,
+    "anonymous": 0.6,
+}
+_WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def request_priority(method: str, authenticated: bool) -> str:
+    if not authenticated:
+        return "anonymous"
+    return "write" if method in _WRITE_METHODS else "read"
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD in-flight request limit with per-priority shares.
+
+    Only the event loop thread calls it, so counters are plain attributes.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 40,
+        min_limit: int = 4,
+        max_limit: int = 200,
+        latency_threshold_seconds: float = 0.5,
+        backoff_ratio: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold_seconds
+        self.backoff_ratio = backoff_ratio
+        self._clock = clock
+        self._last_decrease = -math.inf
+        self.in_flight = 0
+        self.admitted = 0
+        self.decreases = 0
+        self.shed: Dict[str, int] = {priority: 0 for priority in PRIORITY_SHARES}
+
+    def try_acquire(self, priority: str) -> Optional[float]:
+        """Return a start timestamp to pass to ``release``, or ``None`` to shed."""
+        if self.in_flight >= self.limit * PRIORITY_SHARES[priority]:
+            self.shed[priority] += 1
+            return None
+        self.in_flight += 1
+        self.admitted += 1
+        return self._clock()
+
+    def release(self, started: float) -> None:
+        in_flight = self.in_flight
+        self.in_flight = in_flight - 1
+        now = self._clock()
+        if now - started > self.latency_threshold:
+            # One cut per window: requests already in flight when the limit
+            # dropped saw the old load, and a burst of slow completions is
+            # one congestion signal, not many.
+            if (
+                started >= self._last_decrease
+                and now - self._last_decrease >= self.latency_threshold
+            ):
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+                self.decreases += 1
+        elif in_flight * 2 >= self.limit:
+            # Only grow while the limit is actually being used.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def retry_after(self) -> float:
+        return max(1.0, math.ceil(self.latency_threshold))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "decreases": self.decreases,
+            **{f"shed_{priority}": count for priority, count in self.shed.items()},
+        }
+
+
+def tenant_key(user_id: Optional[int], client_ip: str) -> str:
+    """Fair-queue tenant for a request: the authenticated owner.
+
+    API keys count toward the user that owns them. Anonymous requests and
+    credentials not verified yet are queued per client IP.
+    """
+    if user_id is None:
+        return f"ip:{client_ip}"
+    return f"user:{user_id}"
+
+
+class FairQueueRejected(RuntimeError):
+    """Raised when a tenant's queue is full or a request waited too long.
+
+    ``reason`` is ``"queue_full"``, ``"timeout"`` (``max_wait_seconds``
+    passed) or ``"deadline"`` (the request's own deadline ran out first).
+    """
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"Request rejected by the fair queue ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class FairQueue:
+    """Per-tenant queues served by deficit round robin (DRR).
+
+    ``capacity`` is read on every admission so the queue can follow the
+    adaptive limit. While slots are free requests pass straight through;
+    otherwise they wait in their tenant's queue. On each turn a tenant's
+    deficit grows by ``quantum * weight`` and it may start requests whose
+    cost (the route's rate-limit cost) fits in the deficit, so heavy routes
+    use up more of a tenant's share than cheap ones.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: Callable[[], float],
+        max_queue_per_tenant: int = 50,
+        max_wait_seconds: float = 2.0,
+        quantum: float = 1.0,
+        weights: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        if quantum <= 0:
+            raise ValueError("quantum must be positive")
+        self.capacity = capacity
+        self.max_queue_per_tenant = max(max_queue_per_tenant, 0)
+        self.max_wait_seconds = max_wait_seconds
+        self.quantum = quantum
+        self.weights = {
+            tenant: weight for tenant, weight in (weights or {}).items() if weight > 0
+        }
+        self.running = 0
+        self.waiting = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "timeout": 0, "deadline": 0}
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {}
+        self._deficits: Dict[str, float] = {}
+        self._active: Deque[str] = deque()
+        self._credited = False
+
+    async def acquire(self, tenant: str, cost: float = 1.0) -> None:
+        """Wait for a slot; ``release`` must follow once the request is done."""
+        if not self._active and self.running < self.capacity():
+            self.running += 1
+            return
+
+        queue = self._queues.get(tenant)
+        if len(queue or ()) >= self.max_queue_per_tenant:
+            self.rejected["queue_full"] += 1
+            raise FairQueueRejected("queue_full", self.retry_after())
+        if queue is None:
+            queue = self._queues[tenant] = deque()
+            self._deficits[tenant] = 0.0
+            self._active.append(tenant)
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (max(cost, 0.0), waiter)
+        queue.append(entry)
+        self.waiting += 1
+        self.queued += 1
+        self._dispatch()
+        timeout = self.max_wait_seconds
+        left = deadlines.remaining()
+        deadline_bound = left is not None and left < timeout
+        if deadline_bound:
+            timeout = max(left, 0.0)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted as the wait ended; hand it on.
+                self.release()
+            else:
+                self._discard(tenant, entry)
+            if isinstance(exc, asyncio.TimeoutError):
+                reason = "deadline" if deadline_bound else "timeout"
+                self.rejected[reason] += 1
+                raise FairQueueRejected(reason, self.retry_after()) from None
+            raise
+
+    def release(self) -> None:
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._active and self.running < self.capacity():
+            tenant = self._active[0]
+            queue = self._queues[tenant]
+            cost, waiter = queue[0]
+            if not self._credited:
+                self._deficits[tenant] += self.quantum * self.weights.get(tenant, 1.0)
+                self._credited = True
+            if self._deficits[tenant] < cost:
+                self._active.rotate(-1)
+                self._credited = False
+                continue
+            self._deficits[tenant] -= cost
+            queue.popleft()
+            self.waiting -= 1
+            if not queue:
+                self._forget(tenant)
+            if waiter.done():
+                # Timed out and cancelled, but not yet discarded by its task.
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def _discard(self, tenant: str, entry: Tuple[float, asyncio.Future]) -> None:
+        queue = self._queues.get(tenant)
+        if queue is None or entry not in queue:
+            return
+        queue.remove(entry)
+        self.waiting -= 1
+        if not queue:
+            self._forget(tenant)
+
+    def _forget(self, tenant: str) -> None:
+        if self._active and self._active[0] == tenant:
+            self._credited = False
+        self._active.remove(tenant)
+        del self._queues[tenant]
+        del self._deficits[tenant]
+
+    @property
+    def tenants_waiting(self) -> int:
+        return len(self._active)
+
+    def retry_after(self) -> float:
+        return max(1.0, math.ceil(self.max_wait_seconds))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "tenants_waiting": self.tenants_waiting,
+            "queued": self.queued,
+            **{f"rejected_{reason}": count for reason, count in self.rejected.items()},
+        }
@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 import os
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 from pydantic.functional_validators import field_validator
@@ -96,8 +96,213 @@ class RateLimitSettings(BaseModel):
     window_seconds: int = 60
     ttl_seconds: int | None = None
     max_entries: int = 10_000
-    backend: str = Field(default="memory", description="memory or redis")
+    principal_max_requests: int = Field(
+        default=1000,
+        description="Budget per window for requests from a known user or API key",
+    )
+    route_costs: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "/healthz": 0.0,
+            "/ping": 0.0,
+            "POST /api/v1/auth/login": 5.0,
+            "POST /api/v1/auth/register": 5.0,
+            "GET /api/v1/documents": 3.0,
+        },
+        description='Units per request keyed by "METHOD /prefix" or "/prefix"',
+    )
+    algorithm: str = Field(default="fixed_window", description="fixed_window or gcra")
+    top_k_capacity: int = Field(
+        default=64, description="Keys kept per heavy-hitter sketch of 429s"
+    )
+    rejection_log_interval_seconds: float = 10.0
+    backend: str = Field(default="memory", description="memory, shared_memory or redis")
+    shm_path: str = Field(
+        default="/dev/shm/zappro-rate-limit",
+        description="mmap file shared by local workers (shared_memory backend)",
+    )
     redis_url: str | None = None
+    redis_timeout_seconds: float = 0.1
+    redis_retry_seconds: float = Field(
+        default=5.0, description="Use the local limiter this long after a failure"
+    )
+    redis_key_prefix: str = "zappro:rl:"
+
+
+class LoginThrottleSettings(BaseModel):
+    """Failed-login backoff tracked per email and per client IP."""
+
+    enabled: bool = True
+    email_free_attempts: int = 5
+    ip_free_attempts: int = 50
+    base_delay_seconds: float = 1.0
+    max_delay_seconds: float = 900.0
+    window_seconds: float = 900.0
+    expected_failures: int = Field(
+        default=100_000,
+        description="Failed logins per window the sketches are sized for",
+    )
+    sketch_width: int | None = Field(
+        default=None, description="Override the width derived from expected_failures"
+    )
+    sketch_depth: int = 4
+    max_successes: int = Field(
+        default=10_000, description="Emails whose failures a recent login forgave"
+    )
+
+
+class PasswordHashingSettings(BaseModel):
+    """Password hashing scheme, cost and dedicated worker pool."""
+
+    workers: int = 2
+    max_queue: int = 32
+    executor: str = Field(default="thread", description="thread or process")
+    scheme: str = Field(default="pbkdf2_sha256", description="pbkdf2_sha256 or scrypt")
+    iterations: int = 200_000
+    scrypt_n: int = 2**14
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    target_ms: float | None = Field(
+        default=None, description="Calibrate the cost at startup to this latency"
+    )
+    min_iterations: int = 100_000
+
+
+class ExecutorPoolSettings(BaseModel):
+    """Size of one dedicated worker pool."""
+
+    workers: int
+    max_queue: int
+    kind: str = Field(default="thread", description="thread or process")
+
+
+class ExecutorSettings(BaseModel):
+    """Separately sized pools (bulkheads) per class of blocking work."""
+
+    handler_threads: int = Field(
+        default=40, description="anyio threads running sync route handlers"
+    )
+    db: ExecutorPoolSettings = ExecutorPoolSettings(workers=8, max_queue=64)
+    crypto: ExecutorPoolSettings = ExecutorPoolSettings(workers=4, max_queue=256)
+
+
+class CompressionSettings(BaseModel):
+    """Negotiated gzip/zstd response compression."""
+
+    enabled: bool = True
+    minimum_size: int = Field(
+        default=1024, description="Smaller bodies are sent uncompressed"
+    )
+    content_types: List[str] = Field(
+        default_factory=lambda: [
+            "application/json",
+            "application/problem+json",
+            "application/xml",
+            "application/javascript",
+            "image/svg+xml",
+            "text/",
+        ],
+        description="Compressible media types; entries ending in / match a prefix",
+    )
+    gzip_level: int = 6
+    zstd_level: int = 3
+    gzip_route_levels: Dict[str, float] = Field(
+        default_factory=lambda: {"/api/v1/auth": 0, "/metrics": 1},
+        description='Level per "METHOD /prefix" or "/prefix"; 0 disables gzip there',
+    )
+    zstd_route_levels: Dict[str, float] = Field(
+        default_factory=lambda: {"/api/v1/auth": 0, "/metrics": 1},
+        description='Level per "METHOD /prefix" or "/prefix"; 0 disables zstd there',
+    )
+
+    _parse_content_types = field_validator("content_types", mode="before")(
+        _parse_sequence
+    )
+
+
+class AdmissionSettings(BaseModel):
+    """Adaptive (AIMD) concurrency limit that sheds overload with 503."""
+
+    enabled: bool = True
+    initial_limit: int = 40
+    min_limit: int = 4
+    max_limit: int = 200
+    latency_threshold_ms: float = Field(
+        default=500.0, description="Slower completions shrink the limit"
+    )
+    backoff_ratio: float = 0.9
+    always_admit: List[str] = Field(
+        default_factory=lambda: [
+            "/healthz",
+            "/ping",
+            "/health",
+            "/api/v1/admin/profile",
+        ],
+        description="Route prefixes never shed (the metrics path is added)",
+    )
+
+    _parse_always_admit = field_validator("always_admit", mode="before")(
+        _parse_sequence
+    )
+
+
+class FairQueueSettings(BaseModel):
+    """Per-tenant queues served by deficit round robin once all slots are busy."""
+
+    enabled: bool = True
+    concurrency: int = Field(
+        default=32, description="Slots shared by all tenants (capped by admission)"
+    )
+    max_queue_per_tenant: int = Field(
+        default=50, description="Requests past this depth get 429"
+    )
+    max_wait_ms: float = Field(
+        default=2000.0, description="Queued longer than this gets 503"
+    )
+    quantum: float = 1.0
+    weights: Dict[str, float] = Field(
+        default_factory=dict,
+        description='Share per tenant, e.g. {"user:42": 2}',
+    )
+
+
+class DeadlineSettings(BaseModel):
+    """Per-request time budget, pushed down to DB statements and worker pools."""
+
+    enabled: bool = True
+    default_ms: float = 30_000.0
+    route_ms: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "/api/v1/auth": 10_000.0,
+            "GET /api/v1/documents": 10_000.0,
+            "/api/v1/admin/profile": 90_000.0,
+        },
+        description='Budget per "METHOD /prefix" or "/prefix"',
+    )
+    header: str = Field(
+        default="X-Request-Timeout",
+        description="Client budget in seconds; may only shorten the route's",
+    )
+
+
+class ProfilerSettings(BaseModel):
+    """Admin-only sampling profiler (``/api/v1/admin/profile``)."""
+
+    enabled: bool = True
+    max_seconds: float = Field(
+        default=60.0, description="Longest window a single profile may sample"
+    )
+
+
+class MetricsSettings(BaseModel):
+    """Prometheus metrics endpoint, off unless enabled."""
+
+    enabled: bool = False
+    path: str = "/metrics"
+    scrape_token: str | None = Field(
+        default=None,
+        description="Bearer token of the scraper, which skips rate limits; "
+        "without it only admins can read the route",
+    )
 
 
 class SecurityHeaders(BaseModel):
@@ -109,6 +314,16 @@ class SecurityHeaders(BaseModel):
     referrer_policy: str = "strict-origin-when-cross-origin"
     permissions_policy: str = "geolocation=(), microphone=(), camera=()"
     expect_ct: str = "max-age=86400, enforce"
+    cache_control: str = "no-store"
+    cache_control_routes: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "GET /api/v1/projects": "private, no-cache",
+            "GET /api/v1/tasks": "private, no-cache",
+            "GET /api/v1/materials": "private, no-cache",
+            "GET /api/v1/documents": "private, no-cache",
+        },
+        description='Cache-Control per "METHOD /prefix"; ETag routes revalidate',
+    )
 
 
 class Settings(BaseSettings):
@@ -128,6 +343,15 @@ class Settings(BaseSettings):
     enable_cors: bool = True
     cors: CorsSettings = CorsSettings()
     rate_limit: RateLimitSettings = RateLimitSettings()
+    password_hashing: PasswordHashingSettings = PasswordHashingSettings()
+    executors: ExecutorSettings = ExecutorSettings()
+    login_throttle: LoginThrottleSettings = LoginThrottleSettings()
+    compression: CompressionSettings = CompressionSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    fair_queue: FairQueueSettings = FairQueueSettings()
+    deadlines: DeadlineSettings = DeadlineSettings()
+    profiler: ProfilerSettings = ProfilerSettings()
     enforce_https: bool = False
     hsts_seconds: int = 31536000
     include_hsts_subdomains: bool = True
@@ -143,6 +367,12 @@ class Settings(BaseSettings):
     request_id_trusted_hosts: List[str] = Field(default_factory=list)
     request_id_ttl_seconds: int = 300
     request_id_max_entries: int = 20_000
+    request_id_tracker: str = Field(default="exact", description="exact or bloom")
+    request_id_fp_rate: float = 0.001
+    request_id_shm_path: str | None = Field(
+        default=None,
+        description="Share recent request IDs between local workers via this mmap file",
+    )
 
     _parse_allowed_hosts = field_validator("allowed_hosts", mode="before")(
         _parse_sequence
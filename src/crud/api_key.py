@@ -0,0 +1,63 @@
+"""CRUD helpers for API keys owned by users."""
+
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.api_key import ApiKey
+from src.models.user import User
+
+
+def create_api_key(
+    db: Session,
+    *,
+    user_id: int,
+    name: str,
+    scopes: List[str],
+    prefix: str,
+    digest: str,
+) -> ApiKey:
+    db_key = ApiKey(
+        user_id=user_id,
+        name=name,
+        scopes=",".join(scopes),
+        prefix=prefix,
+        digest=digest,
+    )
+    db.add(db_key)
+    db.commit()
+    db.refresh(db_key)
+    return db_key
+
+
+def list_api_keys(db: Session, user_id: int) -> List[ApiKey]:
+    return (
+        db.query(ApiKey)
+        .filter(ApiKey.user_id == user_id)
+        .order_by(ApiKey.created_at.desc())
+        .all()
+    )
+
+
+def get_active_by_prefix(db: Session, prefix: str) -> Optional[Tuple[ApiKey, User]]:
+    row = (
+        db.query(ApiKey, User)
+        .join(User, ApiKey.user_id == User.id)
+        .filter(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None))
+        .first()
+    )
+    return (row[0], row[1]) if row else None
+
+
+def revoke_api_key(db: Session, key_id: int, user_id: int) -> Optional[ApiKey]:
+    db_key = (
+        db.query(ApiKey).filter(ApiKey.id == key_id, ApiKey.user_id == user_id).first()
+    )
+    if not db_key:
+        return None
+    if db_key.revoked_at is None:
+        db_key.revoked_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(db_key)
+    return db_key
@@ -1,10 +1,11 @@
 """CRUD helpers for Project entity."""
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from src.models.project import Project
+from src.models.project import Project, ProjectListVersion
 from src.schemas.project import ProjectCreate, ProjectUpdate
 
 
@@ -30,6 +31,37 @@ def get_project(
     return query.first()
 
 
+def collection_version(
+    db: Session, owner_id: Optional[int], is_admin: bool = False
+) -> Tuple[int, int, int]:
+    """Return ``(count, sum of versions, sum of owners' list versions)``.
+
+    Project versions only grow while a project exists, and creating or
+    deleting one bumps its owner's ``ProjectListVersion``, so the triple changes
+    on any create, update or delete of a project or its child rows, including
+    a delete followed by a create that reuses the id.
+    """
+    owners = db.query(func.coalesce(func.sum(ProjectListVersion.version), 0))
+    query = db.query(
+        func.count(Project.id),
+        func.coalesce(func.sum(Project.version), 0),
+    )
+    if not is_admin:
+        owners = owners.filter(ProjectListVersion.owner_id == owner_id)
+        query = query.filter(Project.owner_id == owner_id)
+    count, versions, owner_versions = query.add_columns(owners.scalar_subquery()).one()
+    return int(count), int(versions), int(owner_versions)
+
+
+def project_version(
+    db: Session, project_id: int, owner_id: Optional[int], is_admin: bool = False
+) -> Optional[int]:
+    query = db.query(Project.version).filter(Project.id == project_id)
+    if not is_admin:
+        query = query.filter(Project.owner_id == owner_id)
+    return query.scalar()
+
+
 def create_project(db: Session, project: ProjectCreate, owner_id: int) -> Project:
     db_project = Project(**project.model_dump(), owner_id=owner_id)
     db.add(db_project)
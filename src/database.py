@@ -2,6 +2,11 @@
 
 Reads DATABASE_URL from environment. If not set, defaults to
 sqlite:///./zappro.db. Provides SessionLocal and get_db dependency.
+
+Statements honour the request deadline from ``src.utils.deadlines``: they
+are refused once it has passed, SQLite interrupts running statements from a
+progress handler and Postgres transactions start with ``statement_timeout``
+set to the remaining budget.
 """
 
 from __future__ import annotations
@@ -9,9 +14,11 @@ from __future__ import annotations
 import os
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from .utils import deadlines
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./zappro.db")
 
 connect_args = {}
@@ -23,6 +30,41 @@ SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, futu
 
 Base = declarative_base()
 
+# Virtual machine instructions between deadline checks in SQLite; about
+# tens of microseconds of work, so an expired statement stops within a ms.
+SQLITE_PROGRESS_INTERVAL = 1000
+
+
+@event.listens_for(engine, "connect")
+def _install_progress_handler(dbapi_connection, connection_record) -> None:
+    if engine.url.get_backend_name() == "sqlite":
+        dbapi_connection.set_progress_handler(
+            deadlines.sqlite_progress_handler, SQLITE_PROGRESS_INTERVAL
+        )
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _refuse_expired(conn, cursor, statement, parameters, context, executemany) -> None:
+    deadlines.check()
+
+
+@event.listens_for(engine, "handle_error")
+def _raise_deadline_exceeded(context) -> None:
+    # Interrupted (SQLite) or cancelled (Postgres) statements surface as
+    # OperationalError; report them as the deadline they really are.
+    if deadlines.expired():
+        raise deadlines.DeadlineExceeded() from context.original_exception
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _set_statement_timeout(session, transaction, connection) -> None:
+    if connection.dialect.name != "postgresql":
+        return
+    timeout_ms = deadlines.statement_timeout_ms()
+    if timeout_ms is not None:
+        # SET LOCAL ends with the transaction, so pooled connections are clean.
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
 
 def get_db() -> Generator:
     db = SessionLocal()
@@ -40,9 +82,11 @@ def init_db() -> None:
     when using SQLite.
     """
     # Import all models so SQLAlchemy metadata is populated before create_all.
+    from .models import api_key  # noqa: F401
     from .models import document  # noqa: F401
     from .models import material  # noqa: F401
     from .models import project  # noqa: F401
+    from .models import revoked_token  # noqa: F401
     from .models import task  # noqa: F401
     from .models import user  # noqa: F401
 
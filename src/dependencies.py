@@ -7,18 +7,22 @@ from typing import Callable, Set
 
 from fastapi import Depends, HTTPException, status
 
-from src.models.user import User, UserRole
-from src.utils.auth import get_current_user
+from src.models.user import UserRole
+from src.utils.auth import Principal, get_current_principal
 
 
-def require_role(required_roles: Sequence[str | UserRole]) -> Callable[..., User]:
+def require_role(
+    required_roles: Sequence[str | UserRole],
+) -> Callable[..., Principal]:
     """Ensure the current user has one of the expected roles."""
 
     allowed: Set[str] = {
         role.value if isinstance(role, UserRole) else role for role in required_roles
     }
 
-    async def _dependency(current_user: User = Depends(get_current_user)) -> User:
+    async def _dependency(
+        current_user: Principal = Depends(get_current_principal),
+    ) -> Principal:
         if current_user.role.value not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,22 +1,38 @@
 """ZapPro API entrypoint with security hardening middleware."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List
+from functools import partial
+from typing import Dict, List
 
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+import anyio
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from starlette.middleware import Middleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
 from . import __version__
+from .admission import AdaptiveConcurrencyLimiter, FairQueue
 from .config import Settings, get_settings
 from .crud import project as project_crud
 from .crud import task as task_crud
-from .database import get_db, init_db
+from .database import SessionLocal, engine, get_db, init_db
+from .dependencies import require_role
+from .metrics import MetricFamily, MetricsRegistry
+from .middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    SecurityMiddleware,
+)
 from .models.user import UserRole
+from .profiler import Profiler
+from .routers import admin as admin_router
+from .routers import api_keys as api_keys_router
 from .routers import auth as auth_router
 from .routers import documents, materials
 from .schemas.project import Project as ProjectSchema
@@ -24,16 +40,250 @@ from .schemas.project import ProjectCreate, ProjectUpdate
 from .schemas.task import Task as TaskSchema
 from .schemas.task import TaskCreate, TaskUpdate
 from .security import (
-    FixedWindowRateLimiter,
+    BloomRequestIdTracker,
+    LoginThrottle,
+    RateLimitHitters,
+    RedisRateLimiter,
     RequestIdTracker,
-    build_request_id,
-    resolve_client_ip,
+    RouteCostTable,
+    RouteTable,
+    SharedMemoryRateLimiter,
+    SharedRequestIdTracker,
+    TrustedProxyMatcher,
+    create_rate_limiter,
+)
+from .utils import passwords
+from .utils.api_keys import api_key_cache
+from .utils.auth import (
+    configure_password_hasher,
+    configure_password_policy,
+    get_current_principal,
+    refresh_revocations,
+    token_cache,
 )
-from .utils.auth import get_current_user
+from .utils.etags import conditional_get
+from .utils.executors import configure_executor, registered_executors
+from .utils.resp import RespClient
+from .utils.shm import SharedMemoryTable
 
 LOGGER = logging.getLogger("zappro.api")
 
 
+def _build_rate_limiter(settings: Settings, *, max_requests: int, quota_class: str):
+    """Build the limiter for one quota class on the configured backend."""
+    config = settings.rate_limit
+    local_limiter = create_rate_limiter(
+        config.algorithm,
+        max_requests=max_requests,
+        window_seconds=config.window_seconds,
+        ttl_seconds=config.ttl_seconds,
+        max_entries=config.max_entries,
+    )
+    # The IP class keeps the original key prefix and file name.
+    key_prefix, shm_path = config.redis_key_prefix, config.shm_path
+    if quota_class != "ip":
+        key_prefix = f"{key_prefix}{quota_class}:"
+        shm_path = f"{shm_path}-{quota_class}"
+    if config.backend == "redis" and config.redis_url:
+        return RedisRateLimiter(
+            RespClient(config.redis_url, timeout=config.redis_timeout_seconds),
+            algorithm=config.algorithm,
+            max_requests=max_requests,
+            window_seconds=config.window_seconds,
+            key_prefix=key_prefix,
+            retry_seconds=config.redis_retry_seconds,
+            fallback=local_limiter,
+        )
+    if config.backend == "shared_memory":
+        return SharedMemoryRateLimiter(
+            SharedMemoryTable(shm_path, max_entries=config.max_entries),
+            algorithm=config.algorithm,
+            max_requests=max_requests,
+            window_seconds=config.window_seconds,
+        )
+    return local_limiter
+
+
+def _runtime_metrics() -> List[MetricFamily]:
+    """Read pool, cache and executor state at scrape time."""
+    families = []
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        families += [
+            MetricFamily(
+                "zappro_db_pool_size",
+                "gauge",
+                "Connections the pool keeps open.",
+                [("", {}, pool.size())],
+            ),
+            MetricFamily(
+                "zappro_db_pool_checked_out",
+                "gauge",
+                "Connections currently in use.",
+                [("", {}, pool.checkedout())],
+            ),
+            MetricFamily(
+                "zappro_db_pool_overflow",
+                "gauge",
+                "Connections open beyond the pool size.",
+                [("", {}, max(pool.overflow(), 0))],
+            ),
+        ]
+
+    caches = {"jwt": token_cache.stats(), "api_key": api_key_cache.stats()}
+    families += [
+        MetricFamily(
+            f"zappro_auth_cache_{field}_total",
+            "counter",
+            f"Verified credential cache {field}.",
+            [("", {"cache": name}, stats[field]) for name, stats in caches.items()],
+        )
+        for field in ("hits", "misses")
+    ]
+    families.append(
+        MetricFamily(
+            "zappro_auth_cache_entries",
+            "gauge",
+            "Entries held by the verified credential caches.",
+            [("", {"cache": name}, stats["entries"]) for name, stats in caches.items()],
+        )
+    )
+
+    return families
+
+
+def _executor_metrics(state) -> List[MetricFamily]:
+    """Per-pool saturation: the dedicated pools plus anyio's handler threads."""
+    pools = registered_executors()
+    # anyio's limiter only knows its size and occupancy, not wait times.
+    handlers: Dict[str, float] = {}
+    limiter = getattr(state, "handler_limiter", None)
+    if limiter is not None:
+        stats = limiter.statistics()
+        handlers = {
+            "max_workers": stats.total_tokens,
+            "queue_depth": stats.tasks_waiting,
+            "pending": stats.borrowed_tokens + stats.tasks_waiting,
+        }
+
+    def samples(field: str) -> list:
+        rows = [("", {"executor": pool.name}, getattr(pool, field)) for pool in pools]
+        if field in handlers:
+            rows.append(("", {"executor": "handlers"}, handlers[field]))
+        return rows
+
+    return [
+        MetricFamily(
+            "zappro_executor_workers",
+            "gauge",
+            "Worker threads or processes in the pool.",
+            samples("max_workers"),
+        ),
+        MetricFamily(
+            "zappro_executor_queue_depth",
+            "gauge",
+            "Jobs waiting for a worker.",
+            samples("queue_depth"),
+        ),
+        MetricFamily(
+            "zappro_executor_pending",
+            "gauge",
+            "Jobs queued or running.",
+            samples("pending"),
+        ),
+        MetricFamily(
+            "zappro_executor_rejected_total",
+            "counter",
+            "Jobs shed because the pool was saturated.",
+            samples("rejected"),
+        ),
+        MetricFamily(
+            "zappro_executor_expired_total",
+            "counter",
+            "Jobs dropped because the request deadline passed in the queue.",
+            samples("expired"),
+        ),
+        MetricFamily(
+            "zappro_executor_completed_total",
+            "counter",
+            "Jobs completed.",
+            samples("completed"),
+        ),
+        MetricFamily(
+            "zappro_executor_queue_wait_seconds_total",
+            "counter",
+            "Time completed jobs spent queued; divide by completed for the mean.",
+            samples("wait_total"),
+        ),
+        MetricFamily(
+            "zappro_executor_queue_wait_max_seconds",
+            "gauge",
+            "Longest queue wait seen since startup.",
+            samples("wait_max"),
+        ),
+    ]
+
+
+def _admission_metrics(
+    admission: AdaptiveConcurrencyLimiter,
+) -> List[MetricFamily]:
+    return [
+        MetricFamily(
+            "zappro_admission_limit",
+            "gauge",
+            "Current adaptive concurrency limit.",
+            [("", {}, admission.limit)],
+        ),
+        MetricFamily(
+            "zappro_admission_in_flight",
+            "gauge",
+            "Admitted requests currently in flight.",
+            [("", {}, admission.in_flight)],
+        ),
+        MetricFamily(
+            "zappro_admission_shed_total",
+            "counter",
+            "Requests shed with 503 by priority.",
+            [
+                ("", {"priority": priority}, count)
+                for priority, count in admission.shed.items()
+            ],
+        ),
+    ]
+
+
+def _fair_queue_metrics(fair_queue: FairQueue) -> List[MetricFamily]:
+    return [
+        MetricFamily(
+            "zappro_fair_queue_running",
+            "gauge",
+            "Requests holding a fair-queue slot.",
+            [("", {}, fair_queue.running)],
+        ),
+        MetricFamily(
+            "zappro_fair_queue_waiting",
+            "gauge",
+            "Requests waiting in per-tenant queues.",
+            [("", {}, fair_queue.waiting)],
+        ),
+        MetricFamily(
+            "zappro_fair_queue_tenants_waiting",
+            "gauge",
+            "Tenants with at least one queued request.",
+            [("", {}, fair_queue.tenants_waiting)],
+        ),
+        MetricFamily(
+            "zappro_fair_queue_rejected_total",
+            "counter",
+            "Queued requests rejected (queue_full: 429, timeout: 503, deadline: 504).",
+            [
+                ("", {"reason": reason}, count)
+                for reason, count in fair_queue.rejected.items()
+            ],
+        ),
+    ]
+
+
 def _build_middlewares(settings: Settings) -> list[Middleware]:
     middlewares: list[Middleware] = []
 
@@ -70,6 +320,24 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         except Exception:  # pragma: no cover - best-effort dev path
             LOGGER.debug("init_db skipped or failed (likely non-SQLite backend)")
 
+        def _load_revocations() -> None:
+            db = SessionLocal()
+            try:
+                refresh_revocations.load(db)
+            finally:
+                db.close()
+
+        await asyncio.to_thread(_load_revocations)
+
+        if settings.password_hashing.target_ms:
+            calibrated = await asyncio.to_thread(
+                passwords.calibrate_policy,
+                password_policy,
+                target_ms=settings.password_hashing.target_ms,
+                min_iterations=settings.password_hashing.min_iterations,
+            )
+            configure_password_policy(calibrated)
+
         try:
             paths = [getattr(route, "path", "<unknown>") for route in app.routes]
             LOGGER.info(
@@ -80,9 +348,24 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         except Exception:  # pragma: no cover - diagnostic
             LOGGER.debug("event=startup route logging failed", exc_info=True)
 
+        # Sync handlers and dependencies get anyio's thread pool to
+        # themselves; every other kind of blocking work has its own pool.
+        handler_limiter = anyio.to_thread.current_default_thread_limiter()
+        handler_limiter.total_tokens = settings.executors.handler_threads
+        app.state.handler_limiter = handler_limiter
+
         try:
             yield
         finally:
+            for pool in registered_executors():
+                pool.shutdown()
+            for quota in (app.state.rate_limiter, app.state.principal_rate_limiter):
+                if isinstance(quota, RedisRateLimiter):
+                    await quota.aclose()
+                elif isinstance(quota, SharedMemoryRateLimiter):
+                    quota.close()
+            if isinstance(app.state.request_id_tracker, SharedRequestIdTracker):
+                app.state.request_id_tracker.close()
             LOGGER.info("event=shutdown service=api")
 
     app = FastAPI(
@@ -92,115 +375,205 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         lifespan=lifespan,
     )
 
+    password_policy = passwords.PasswordPolicy(
+        scheme=settings.password_hashing.scheme,
+        iterations=settings.password_hashing.iterations,
+        scrypt_n=settings.password_hashing.scrypt_n,
+        scrypt_r=settings.password_hashing.scrypt_r,
+        scrypt_p=settings.password_hashing.scrypt_p,
+    )
+    configure_password_policy(password_policy)
+    hasher = configure_password_hasher(
+        workers=settings.password_hashing.workers,
+        max_queue=settings.password_hashing.max_queue,
+        kind=settings.password_hashing.executor,
+    )
+    app.state.password_hasher = hasher
+    for name, pool in (
+        ("db", settings.executors.db),
+        ("crypto", settings.executors.crypto),
+    ):
+        configure_executor(
+            name,
+            max_workers=pool.workers,
+            max_queue=pool.max_queue,
+            kind=pool.kind,
+        )
+
     app.include_router(materials.router, prefix="/api/v1")
     app.include_router(documents.router, prefix="/api/v1")
     app.include_router(auth_router.router)
+    app.include_router(auth_router.well_known_router)
+    app.include_router(api_keys_router.router)
+    app.include_router(admin_router.router)
 
-    if settings.rate_limit.backend != "memory":
+    if settings.rate_limit.backend not in ("memory", "shared_memory", "redis") or (
+        settings.rate_limit.backend == "redis" and not settings.rate_limit.redis_url
+    ):
         LOGGER.warning(
-            "Rate limit backend '%s' not implemented; falling back to memory store.",
+            "Rate limit backend '%s' not configured; falling back to memory store.",
             settings.rate_limit.backend,
         )
-
-    limiter = FixedWindowRateLimiter(
-        max_requests=settings.rate_limit.max_requests,
-        window_seconds=settings.rate_limit.window_seconds,
-        ttl_seconds=settings.rate_limit.ttl_seconds,
-        max_entries=settings.rate_limit.max_entries,
+    limiter = _build_rate_limiter(
+        settings, max_requests=settings.rate_limit.max_requests, quota_class="ip"
     )
+    principal_limiter = _build_rate_limiter(
+        settings,
+        max_requests=settings.rate_limit.principal_max_requests,
+        quota_class="principal",
+    )
+    route_costs = RouteCostTable(settings.rate_limit.route_costs)
+    app.state.principal_rate_limiter = principal_limiter
+    rate_limit_hitters = RateLimitHitters(
+        settings.rate_limit.top_k_capacity,
+        log_interval_seconds=settings.rate_limit.rejection_log_interval_seconds,
+    )
+    app.state.rate_limit_hitters = rate_limit_hitters
     app.state.rate_limiter = limiter
-    request_id_tracker = RequestIdTracker(
-        ttl_seconds=settings.request_id_ttl_seconds,
-        max_entries=settings.request_id_max_entries,
+    app.state.login_throttle = (
+        LoginThrottle(
+            email_free_attempts=settings.login_throttle.email_free_attempts,
+            ip_free_attempts=settings.login_throttle.ip_free_attempts,
+            base_delay_seconds=settings.login_throttle.base_delay_seconds,
+            max_delay_seconds=settings.login_throttle.max_delay_seconds,
+            window_seconds=settings.login_throttle.window_seconds,
+            expected_failures=settings.login_throttle.expected_failures,
+            sketch_width=settings.login_throttle.sketch_width,
+            sketch_depth=settings.login_throttle.sketch_depth,
+            max_successes=settings.login_throttle.max_successes,
+        )
+        if settings.login_throttle.enabled
+        else None
     )
-
-    @app.middleware("http")
-    async def add_security_headers(request: Request, call_next: Any):
-        header_lookup: Dict[str, str] = {
-            key.lower(): value for key, value in request.headers.items()
-        }
-        client_ip = resolve_client_ip(
-            request.client.host if request.client else None,
-            header_lookup,
-            trusted_proxies=settings.trusted_proxies,
-            client_ip_header=settings.client_ip_header.lower(),
+    request_id_tracker: (
+        RequestIdTracker | BloomRequestIdTracker | SharedRequestIdTracker
+    )
+    if settings.request_id_shm_path:
+        request_id_tracker = SharedRequestIdTracker(
+            SharedMemoryTable(
+                settings.request_id_shm_path,
+                max_entries=settings.request_id_max_entries,
+            ),
+            ttl_seconds=settings.request_id_ttl_seconds,
         )
-
-        allowed, retry_after = limiter.allow(client_ip)
-        if not allowed:
-            LOGGER.warning("Rate limit exceeded for client %s", client_ip)
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Too Many Requests"},
-                headers={"Retry-After": f"{retry_after:.0f}"},
-            )
-
-        incoming_request_id = request.headers.get(settings.request_id_header)
-
-        trusted_source = (
-            settings.trust_client_request_id
-            and incoming_request_id
-            and client_ip in settings.request_id_trusted_hosts
+    elif settings.request_id_tracker == "bloom":
+        request_id_tracker = BloomRequestIdTracker(
+            ttl_seconds=settings.request_id_ttl_seconds,
+            max_entries=settings.request_id_max_entries,
+            fp_rate=settings.request_id_fp_rate,
         )
-
-        if incoming_request_id and not trusted_source:
-            LOGGER.debug(
-                "Ignoring external request id from untrusted source %s", client_ip
-            )
-
-        request_id = build_request_id(
-            incoming_request_id,
-            allow_existing=bool(trusted_source),
+    else:
+        request_id_tracker = RequestIdTracker(
+            ttl_seconds=settings.request_id_ttl_seconds,
+            max_entries=settings.request_id_max_entries,
         )
-
-        duplicate = request_id_tracker.register(request_id)
-        if duplicate:
-            LOGGER.warning(
-                "Request ID collision detected: %s from %s", request_id, client_ip
-            )
-
-        try:
-            response = await call_next(request)
-        except Exception:  # pragma: no cover - exercised via tests
-            LOGGER.exception(
-                "Unhandled exception processing request from %s", client_ip
+    app.state.request_id_tracker = request_id_tracker
+
+    metrics: MetricsRegistry | None = None
+    if settings.metrics.enabled:
+        metrics = MetricsRegistry()
+        metrics.add_collector(_runtime_metrics)
+        metrics.add_collector(partial(_executor_metrics, app.state))
+    admission: AdaptiveConcurrencyLimiter | None = None
+    if settings.admission.enabled:
+        admission = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.admission.initial_limit,
+            min_limit=settings.admission.min_limit,
+            max_limit=settings.admission.max_limit,
+            latency_threshold_seconds=settings.admission.latency_threshold_ms / 1000,
+            backoff_ratio=settings.admission.backoff_ratio,
+        )
+        if metrics is not None:
+            metrics.add_collector(partial(_admission_metrics, admission))
+    app.state.admission = admission
+    fair_queue: FairQueue | None = None
+    if settings.fair_queue.enabled:
+        concurrency = settings.fair_queue.concurrency
+        fair_queue = FairQueue(
+            capacity=(
+                (lambda: min(concurrency, admission.limit))
+                if admission is not None
+                else (lambda: concurrency)
+            ),
+            max_queue_per_tenant=settings.fair_queue.max_queue_per_tenant,
+            max_wait_seconds=settings.fair_queue.max_wait_ms / 1000,
+            quantum=settings.fair_queue.quantum,
+            weights=settings.fair_queue.weights,
+        )
+        if metrics is not None:
+            metrics.add_collector(partial(_fair_queue_metrics, fair_queue))
+    app.state.fair_queue = fair_queue
+    app.state.metrics = metrics
+    if settings.compression.enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression.minimum_size,
+            content_types=settings.compression.content_types,
+            gzip_levels=RouteCostTable(
+                settings.compression.gzip_route_levels,
+                default_cost=settings.compression.gzip_level,
+            ),
+            zstd_levels=RouteCostTable(
+                settings.compression.zstd_route_levels,
+                default_cost=settings.compression.zstd_level,
+            ),
+        )
+    app.add_middleware(
+        SecurityMiddleware,
+        settings=settings,
+        limiter=limiter,
+        principal_limiter=principal_limiter,
+        route_costs=route_costs,
+        hitters=rate_limit_hitters,
+        request_id_tracker=request_id_tracker,
+        trusted_proxies=TrustedProxyMatcher(settings.trusted_proxies),
+        metrics=metrics,
+        admission=admission,
+        fair_queue=fair_queue,
+        route_deadlines=(
+            RouteTable(
+                {rule: ms / 1000 for rule, ms in settings.deadlines.route_ms.items()},
+                default=settings.deadlines.default_ms / 1000,
             )
-            response = JSONResponse(
-                status_code=500, content={"detail": "Internal Server Error"}
+            if settings.deadlines.enabled
+            else None
+        ),
+        always_admit=RouteTable(
+            {path: True for path in settings.admission.always_admit}, default=False
+        ),
+    )
+    if metrics is not None:
+        app.add_middleware(MetricsMiddleware, registry=metrics)
+
+        require_admin = require_role([UserRole.admin])
+
+        async def metrics_access(
+            request: Request,
+            credentials: HTTPAuthorizationCredentials | None = Depends(
+                HTTPBearer(auto_error=False)
+            ),
+            db: Session = Depends(get_db),
+        ) -> None:
+            # SecurityMiddleware already checked the scrape token.
+            if request.scope["state"].get("metrics_scraper"):
+                return
+            await require_admin(await get_current_principal(request, credentials, db))
+
+        @app.get(
+            settings.metrics.path,
+            include_in_schema=False,
+            dependencies=[Depends(metrics_access)],
+        )
+        async def prometheus_metrics() -> PlainTextResponse:
+            return PlainTextResponse(
+                metrics.render(), media_type="text/plain; version=0.0.4"
             )
 
-        response.headers.setdefault(settings.api_version_header, __version__)
-        response.headers.setdefault(settings.request_id_header, request_id)
-        if settings.security_headers_enabled:
-            response.headers.setdefault("X-Content-Type-Options", "nosniff")
-            response.headers.setdefault("X-Frame-Options", "DENY")
-            response.headers.setdefault("X-XSS-Protection", "1; mode=block")
-            response.headers.setdefault("Cache-Control", "no-store")
-            response.headers.setdefault(
-                "Content-Security-Policy",
-                settings.security_headers.content_security_policy,
-            )
-            response.headers.setdefault(
-                "Referrer-Policy",
-                settings.security_headers.referrer_policy,
-            )
-            response.headers.setdefault(
-                "Permissions-Policy",
-                settings.security_headers.permissions_policy,
-            )
-            if settings.enforce_https:
-                response.headers.setdefault(
-                    "Strict-Transport-Security",
-                    (
-                        f"max-age={settings.hsts_seconds}; includeSubDomains"
-                        if settings.include_hsts_subdomains
-                        else f"max-age={settings.hsts_seconds}"
-                    ),
-                )
-                response.headers.setdefault(
-                    "Expect-CT", settings.security_headers.expect_ct
-                )
-        return response
+    profiler: Profiler | None = None
+    if settings.profiler.enabled:
+        profiler = Profiler(max_seconds=settings.profiler.max_seconds)
+        app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    app.state.profiler = profiler
 
     @app.get("/health", tags=["health"])
     def health() -> dict[str, str]:
@@ -210,6 +583,18 @@ def create_app(settings: Settings | None = None) -> FastAPI:
             "version": __version__,
             "rate_limit": str(settings.rate_limit.max_requests),
             "rate_limit_window": str(settings.rate_limit.window_seconds),
+            **{
+                f"request_id_{key}": f"{value:g}"
+                for key, value in request_id_tracker.stats().items()
+            },
+            **{
+                f"admission_{key}": f"{value:g}"
+                for key, value in (admission.stats() if admission else {}).items()
+            },
+            **{
+                f"fair_queue_{key}": f"{value:g}"
+                for key, value in (fair_queue.stats() if fair_queue else {}).items()
+            },
         }
 
     @app.get("/ping", tags=["health"])
@@ -218,11 +603,21 @@ def create_app(settings: Settings | None = None) -> FastAPI:
 
     @app.get("/api/v1/projects", response_model=List[ProjectSchema], tags=["projects"])
     def list_projects(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> List[ProjectSchema]:
+        not_modified = conditional_get(
+            request,
+            response,
+            current_user.id,
+            project_crud.collection_version(db, current_user.id),
+        )
+        if not_modified is not None:
+            return not_modified
         return project_crud.get_projects(
             db, owner_id=current_user.id, skip=skip, limit=limit
         )
@@ -235,7 +630,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def create_project(
         project: ProjectCreate,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> ProjectSchema:
         return project_crud.create_project(
@@ -249,7 +644,9 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def get_project(
         project_id: int,
-        current_user=Depends(get_current_user),
+        request: Request,
+        response: Response,
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> ProjectSchema:
         db_project = project_crud.get_project(
@@ -260,6 +657,11 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         )
         if not db_project:
             raise HTTPException(status_code=404, detail="Project not found")
+        not_modified = conditional_get(
+            request, response, current_user.id, db_project.version
+        )
+        if not_modified is not None:
+            return not_modified
         return db_project
 
     @app.put(
@@ -270,7 +672,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     def update_project(
         project_id: int,
         project_update: ProjectUpdate,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> ProjectSchema:
         is_admin = current_user.role == UserRole.admin
@@ -297,7 +699,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def delete_project(
         project_id: int,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> None:
         is_admin = current_user.role == UserRole.admin
@@ -322,9 +724,19 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def list_tasks(
         project_id: int,
-        current_user=Depends(get_current_user),
+        request: Request,
+        response: Response,
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> List[TaskSchema]:
+        # Kanban boards poll this; an unchanged project costs one indexed
+        # lookup and a 304. Missing or foreign projects have no version to
+        # revalidate against, so they are never tagged.
+        version = project_crud.project_version(db, project_id, current_user.id)
+        if version is not None:
+            not_modified = conditional_get(request, response, current_user.id, version)
+            if not_modified is not None:
+                return not_modified
         return task_crud.get_tasks_by_project(
             db, project_id=project_id, owner_id=current_user.id
         )
@@ -337,7 +749,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def create_task_endpoint(
         task: TaskCreate,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> TaskSchema:
         db_task = task_crud.create_task(db, task=task, owner_id=current_user.id)
@@ -353,7 +765,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     def update_task_endpoint(
         task_id: int,
         task_update: TaskUpdate,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> TaskSchema:
         db_task = task_crud.update_task(
@@ -370,7 +782,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     def delete_task_endpoint(
         task_id: int,
-        current_user=Depends(get_current_user),
+        current_user=Depends(get_current_principal),
         db: Session = Depends(get_db),
     ) -> None:
         success = task_crud.delete_task(db, task_id=task_id, owner_id=current_user.id)
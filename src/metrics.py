@@ -0,0 +1,206 @@
+"""In-process metrics registry rendered in the Prometheus text format.
+
+Request latencies go into log-linear (HDR-style) histograms: every power of
+two of microseconds is split into eight sub-buckets, so any recorded value
+is within 12.5% of its bucket bound while a series stays a flat list of
+200 integers. Recording happens on the event loop thread, which is the only
+writer, so the hot path takes no lock: one dict lookup, a ``bit_length``
+and two list increments.
+
+Values that are cheap to read on demand (pool sizes, cache counters) are
+not recorded at all; collectors registered with ``add_collector`` produce
+them at scrape time.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_MAX_SHIFT = 23  # values up to 2**27 us (~134 s) get their own bucket
+_BUCKETS = (_MAX_SHIFT + 2) * _SUB_BUCKETS
+_MAX_MICROS = (1 << (_MAX_SHIFT + _SUB_BITS + 1)) - 1
+# Exposed ``le`` bounds are powers of two so they coincide with bucket edges.
+_EXPORT_EXPONENTS = range(7, _MAX_SHIFT + _SUB_BITS + 2)
+_STATUS_CLASSES = tuple(f"{digit}xx" for digit in range(10))
+# Any other method token is reported as OTHER so clients cannot mint series.
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+Labels = Dict[str, str]
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    kind: str
+    help: str
+    samples: List[Tuple[str, Labels, float]]  # (name suffix, labels, value)
+
+
+def _bucket_index(micros: int) -> int:
+    shift = micros.bit_length() - _SUB_BITS - 1
+    if shift <= 0:
+        return micros
+    if shift > _MAX_SHIFT:
+        return _BUCKETS - 1
+    return shift * _SUB_BUCKETS + (micros >> shift)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    shift = max(index // _SUB_BUCKETS - 1, 0)
+    mantissa = index - shift * _SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations recorded in nanoseconds."""
+
+    __slots__ = ("counts", "count", "sum_ns")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.sum_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        self.counts[_bucket_index(duration_ns // 1000)] += 1
+        self.count += 1
+        self.sum_ns += duration_ns
+
+    def quantile(self, q: float) -> float:
+        """Return the ``q`` quantile in seconds (bucket midpoint)."""
+        if not self.count:
+            return 0.0
+        rank = max(q, 0.0) * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if bucket and seen >= rank:
+                lower, upper = _bucket_bounds(index)
+                return (lower + upper) / 2 / 1e6
+        return _MAX_MICROS / 1e6
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """``(upper bound in seconds, count)`` pairs at the exported edges."""
+        result = []
+        seen = 0
+        index = 0
+        for exponent in _EXPORT_EXPONENTS:
+            edge = _bucket_index(1 << exponent)
+            while index < edge:
+                seen += self.counts[index]
+                index += 1
+            result.append(((1 << exponent) / 1e6, seen))
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Request metrics for one app plus scrape-time collectors."""
+
+    def __init__(self, *, namespace: str = "zappro") -> None:
+        self.namespace = namespace
+        self.in_flight = 0
+        self.rate_limit_rejections: Dict[str, int] = {}
+        self._requests: Dict[Tuple[str, str, int], LatencyHistogram] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def observe(self, method: str, route: str, status: int, duration_ns: int) -> None:
+        key = (method if method in _METHODS else "OTHER", route, status // 100)
+        histogram = self._requests.get(key)
+        if histogram is None:
+            histogram = self._requests.setdefault(key, LatencyHistogram())
+        histogram.record(duration_ns)
+
+    def count_rejection(self, quota_class: str) -> None:
+        rejections = self.rate_limit_rejections
+        rejections[quota_class] = rejections.get(quota_class, 0) + 1
+
+    def histogram(self, method: str, route: str, status: int) -> LatencyHistogram:
+        key = (method if method in _METHODS else "OTHER", route, status // 100)
+        return self._requests.get(key) or LatencyHistogram()
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        self._collectors.append(collector)
+
+    def clear(self) -> None:
+        self._requests.clear()
+        self.rate_limit_rejections.clear()
+
+    def collect(self) -> List[MetricFamily]:
+        prefix = self.namespace + "_"
+        requests: List[Tuple[str, Labels, float]] = []
+        durations: List[Tuple[str, Labels, float]] = []
+        for (method, route, status), histogram in list(self._requests.items()):
+            labels = {
+                "method": method,
+                "route": route,
+                "status": _STATUS_CLASSES[status],
+            }
+            requests.append(("", labels, histogram.count))
+            for upper, count in histogram.cumulative():
+                durations.append(("_bucket", {**labels, "le": repr(upper)}, count))
+            durations.append(("_bucket", {**labels, "le": "+Inf"}, histogram.count))
+            durations.append(("_sum", labels, histogram.sum_ns / 1e9))
+            durations.append(("_count", labels, histogram.count))
+
+        families = [
+            MetricFamily(
+                prefix + "http_requests_total",
+                "counter",
+                "HTTP requests by route template and status class.",
+                requests,
+            ),
+            MetricFamily(
+                prefix + "http_request_duration_seconds",
+                "histogram",
+                "HTTP request latency by route template and status class.",
+                durations,
+            ),
+            MetricFamily(
+                prefix + "http_requests_in_flight",
+                "gauge",
+                "HTTP requests currently being served.",
+                [("", {}, self.in_flight)],
+            ),
+            MetricFamily(
+                prefix + "rate_limit_rejections_total",
+                "counter",
+                "Requests rejected with 429 by quota class.",
+                [
+                    ("", {"quota": quota}, count)
+                    for quota, count in sorted(self.rate_limit_rejections.items())
+                ],
+            ),
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """Render every family in the Prometheus text exposition format 0.0.4."""
+        lines: List[str] = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                lines.append(
+                    f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
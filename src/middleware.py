@@ -0,0 +1,710 @@
+"""Raw ASGI middleware: security and rate limiting, metrics, compression, profiling."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from . import __version__
+from .admission import (
+    AdaptiveConcurrencyLimiter,
+    FairQueue,
+    FairQueueRejected,
+    request_priority,
+    tenant_key,
+)
+from .compression import Encoder, is_compressible, negotiate
+from .config import Settings
+from .metrics import MetricsRegistry
+from .profiler import Profiler
+from .security import (
+    RateLimitHitters,
+    RedisRateLimiter,
+    RouteCostTable,
+    RouteTable,
+    SharedMemoryRateLimiter,
+    SharedRequestIdTracker,
+    TrustedProxyMatcher,
+    build_request_id,
+    resolve_client_ip,
+)
+from .utils import deadlines
+from .utils.auth import CachedIdentity, cached_identity
+
+LOGGER = logging.getLogger("zappro.api")
+
+Scope = dict
+Message = dict
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+RawHeaders = List[Tuple[bytes, bytes]]
+
+_TOO_MANY_REQUESTS = json.dumps({"detail": "Too Many Requests"}).encode()
+_INTERNAL_ERROR = json.dumps({"detail": "Internal Server Error"}).encode()
+_SERVICE_UNAVAILABLE = json.dumps({"detail": "Service overloaded"}).encode()
+_TENANT_QUEUE_FULL = json.dumps({"detail": "Too many queued requests"}).encode()
+_DEADLINE_EXCEEDED = json.dumps({"detail": "Request deadline exceeded"}).encode()
+
+
+class RawHeaderLookup:
+    """Read-only ``get`` over ASGI header pairs that decodes only what is asked for.
+
+    ASGI servers deliver lower-cased names, so a lookup is a short scan of
+    the raw list and no per-request dict is built.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: Iterable[Tuple[bytes, bytes]]) -> None:
+        self._raw = raw
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        key = name.lower().encode("latin-1")
+        for header, value in self._raw:
+            if header == key:
+                return value.decode("latin-1")
+        return default
+
+
+def security_header_block(settings: Settings) -> RawHeaders:
+    """Encode the static response headers once, in ``setdefault`` order.
+
+    ``Cache-Control`` is not part of the block; it varies per route.
+    """
+    headers = [(settings.api_version_header, __version__)]
+    if settings.security_headers_enabled:
+        headers += [
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            (
+                "Content-Security-Policy",
+                settings.security_headers.content_security_policy,
+            ),
+            ("Referrer-Policy", settings.security_headers.referrer_policy),
+            ("Permissions-Policy", settings.security_headers.permissions_policy),
+        ]
+        if settings.enforce_https:
+            hsts = f"max-age={settings.hsts_seconds}"
+            if settings.include_hsts_subdomains:
+                hsts += "; includeSubDomains"
+            headers += [
+                ("Strict-Transport-Security", hsts),
+                ("Expect-CT", settings.security_headers.expect_ct),
+            ]
+    return [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers
+    ]
+
+
+class SecurityMiddleware:
+    """Resolve the client, enforce rate limits and stamp security headers.
+
+    Written against raw ASGI so responses stream through untouched: the only
+    per-response work is appending the precomputed header block (minus any
+    header the route already set) to ``http.response.start``.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[Scope, Receive, Send], Awaitable[None]],
+        *,
+        settings: Settings,
+        limiter: Any,
+        principal_limiter: Any,
+        route_costs: RouteCostTable,
+        hitters: RateLimitHitters,
+        request_id_tracker: Any,
+        trusted_proxies: TrustedProxyMatcher,
+        metrics: Optional[MetricsRegistry] = None,
+        admission: Optional[AdaptiveConcurrencyLimiter] = None,
+        always_admit: Optional[RouteTable[bool]] = None,
+        fair_queue: Optional[FairQueue] = None,
+        route_deadlines: Optional[RouteTable[float]] = None,
+    ) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.admission = admission
+        self.fair_queue = fair_queue
+        self.route_deadlines = route_deadlines
+        self.deadline_header = settings.deadlines.header.lower()
+        self.always_admit = always_admit or RouteTable({}, default=False)
+        self.settings = settings
+        self.limiter = limiter
+        self.principal_limiter = principal_limiter
+        self.route_costs = route_costs
+        self.hitters = hitters
+        self.request_id_tracker = request_id_tracker
+        self.trusted_proxies = trusted_proxies
+        self.client_ip_header = settings.client_ip_header.lower()
+        self.request_id_header = settings.request_id_header.lower()
+        self.request_id_header_raw = self.request_id_header.encode("latin-1")
+        self.header_block = security_header_block(settings)
+        self._no_store = (
+            [(b"cache-control", b"no-store")]
+            if settings.security_headers_enabled
+            else []
+        )
+        self.cache_control: Optional[RouteTable[bytes]] = None
+        if settings.security_headers_enabled:
+            policies = settings.security_headers
+            self.cache_control = RouteTable(
+                {
+                    rule: value.encode("latin-1")
+                    for rule, value in policies.cache_control_routes.items()
+                },
+                default=policies.cache_control.encode("latin-1"),
+            )
+        self.trust_client_request_id = settings.trust_client_request_id
+        self.request_id_trusted_hosts = frozenset(settings.request_id_trusted_hosts)
+        scraping = settings.metrics.enabled and settings.metrics.scrape_token
+        self.scrape_path = settings.metrics.path if scraping else None
+        self.scrape_authorization = (
+            f"Bearer {settings.metrics.scrape_token}".encode("latin-1")
+            if scraping
+            else b""
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.route_deadlines is None:
+            await self._handle(scope, receive, send)
+            return
+
+        token = deadlines.start(self._budget(scope))
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            deadlines.reset(token)
+
+    def _is_scraper(self, headers: RawHeaderLookup) -> bool:
+        presented = headers.get("authorization") or ""
+        return secrets.compare_digest(
+            presented.encode("latin-1"), self.scrape_authorization
+        )
+
+    def _budget(self, scope: Scope) -> float:
+        """Route budget in seconds, shortened by the client's timeout header."""
+        assert self.route_deadlines is not None
+        budget = self.route_deadlines.lookup(scope["method"], scope["path"])
+        requested = RawHeaderLookup(scope["headers"]).get(self.deadline_header)
+        if requested:
+            try:
+                budget = min(budget, max(float(requested), 0.0))
+            except ValueError:
+                pass
+        return budget
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = RawHeaderLookup(scope["headers"])
+        client = scope.get("client")
+        client_ip = resolve_client_ip(
+            client[0] if client else None,
+            headers,
+            trusted_proxies=self.trusted_proxies,
+            client_ip_header=self.client_ip_header,
+        )
+        scope.setdefault("state", {})["client_ip"] = client_ip
+
+        method, path = scope["method"], scope["path"]
+        cost = self.route_costs.cost(method, path)
+        admit = (
+            self.admission is not None or self.fair_queue is not None
+        ) and not self.always_admit.lookup(method, path)
+        if path == self.scrape_path and self._is_scraper(headers):
+            # Only the authorised scraper skips rate limits and admission.
+            scope["state"]["metrics_scraper"] = True
+            cost, admit = 0.0, False
+        identity = (
+            cached_identity(headers.get("authorization")) if cost > 0 or admit else None
+        )
+        principal_key = identity.key if identity is not None else None
+        if cost > 0:
+            quota, quota_key = (
+                (self.principal_limiter, principal_key)
+                if principal_key
+                else (self.limiter, client_ip)
+            )
+            if isinstance(quota, (RedisRateLimiter, SharedMemoryRateLimiter)):
+                allowed, retry_after = await quota.allow_async(quota_key, cost)
+            else:
+                allowed, retry_after = quota.allow(quota_key, cost)
+            if not allowed:
+                self._record_rejection(
+                    client_ip, principal_key, quota_key, method, path
+                )
+                await self._send_json(
+                    send,
+                    429,
+                    _TOO_MANY_REQUESTS,
+                    [
+                        (b"retry-after", f"{retry_after:.0f}".encode()),
+                        *self._no_store,
+                    ],
+                )
+                return
+
+        fair_queue = self.fair_queue if admit else None
+        if fair_queue is not None:
+            try:
+                await fair_queue.acquire(
+                    tenant_key(identity.user_id if identity else None, client_ip),
+                    cost,
+                )
+            except FairQueueRejected as exc:
+                if exc.reason == "deadline":
+                    await self._send_json(
+                        send, 504, _DEADLINE_EXCEEDED, [*self._no_store]
+                    )
+                    return
+                full = exc.reason == "queue_full"
+                await self._send_json(
+                    send,
+                    429 if full else 503,
+                    _TENANT_QUEUE_FULL if full else _SERVICE_UNAVAILABLE,
+                    [
+                        (b"retry-after", f"{exc.retry_after:.0f}".encode()),
+                        *self._no_store,
+                    ],
+                )
+                return
+        try:
+            await self._serve(scope, receive, send, headers, client_ip, identity, admit)
+        finally:
+            if fair_queue is not None:
+                fair_queue.release()
+
+    async def _serve(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        headers: RawHeaderLookup,
+        client_ip: str,
+        identity: Optional[CachedIdentity],
+        admit: bool,
+    ) -> None:
+        method, path = scope["method"], scope["path"]
+        admitted_at: Optional[float] = None
+        if admit and self.admission is not None:
+            admitted_at = self.admission.try_acquire(
+                request_priority(method, identity is not None)
+            )
+            if admitted_at is None:
+                await self._send_json(
+                    send,
+                    503,
+                    _SERVICE_UNAVAILABLE,
+                    [
+                        (
+                            b"retry-after",
+                            f"{self.admission.retry_after():.0f}".encode(),
+                        ),
+                        *self._no_store,
+                    ],
+                )
+                return
+
+        request_id = await self._request_id(headers, client_ip)
+        extra = [(self.request_id_header_raw, request_id.encode("latin-1"))]
+        if self.cache_control is not None:
+            extra.append((b"cache-control", self.cache_control.lookup(method, path)))
+        started = False
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                message["headers"] = self._merge(message.get("headers", ()), extra)
+            await send(message)
+
+        # Cancels async work at the deadline; threads stop on their own
+        # because DB statements and pool jobs check the same deadline.
+        # The deadline is on time.monotonic; asyncio needs the loop's clock.
+        left = deadlines.remaining()
+        timeout = asyncio.timeout_at(
+            None if left is None else asyncio.get_running_loop().time() + left
+        )
+        try:
+            async with timeout:
+                await self.app(scope, receive, send_with_headers)
+        except Exception as exc:
+            timed_out = isinstance(exc, deadlines.DeadlineExceeded) or (
+                isinstance(exc, TimeoutError) and timeout.expired()
+            )
+            if timed_out:
+                LOGGER.info(
+                    "Deadline exceeded for %s %s from %s", method, path, client_ip
+                )
+            else:
+                LOGGER.exception(
+                    "Unhandled exception processing request from %s", client_ip
+                )
+            if started:
+                raise
+            await self._send_json(
+                send,
+                504 if timed_out else 500,
+                _DEADLINE_EXCEEDED if timed_out else _INTERNAL_ERROR,
+                [extra[0], *self._no_store],
+            )
+        finally:
+            if admitted_at is not None:
+                assert self.admission is not None
+                self.admission.release(admitted_at)
+
+    async def _request_id(self, headers: RawHeaderLookup, client_ip: str) -> str:
+        incoming_request_id = headers.get(self.request_id_header)
+        trusted_source = bool(
+            self.trust_client_request_id
+            and incoming_request_id
+            and client_ip in self.request_id_trusted_hosts
+        )
+        if incoming_request_id and not trusted_source:
+            LOGGER.debug(
+                "Ignoring external request id from untrusted source %s", client_ip
+            )
+
+        request_id = build_request_id(
+            incoming_request_id, allow_existing=trusted_source
+        )
+        if isinstance(self.request_id_tracker, SharedRequestIdTracker):
+            collision = await self.request_id_tracker.register_async(request_id)
+        else:
+            collision = self.request_id_tracker.register(request_id)
+        if collision:
+            LOGGER.warning(
+                "Request ID collision detected: %s from %s", request_id, client_ip
+            )
+        return request_id
+
+    def _record_rejection(
+        self,
+        client_ip: str,
+        principal_key: Optional[str],
+        quota_key: str,
+        method: str,
+        path: str,
+    ) -> None:
+        self.hitters.record(client_ip, principal_key, f"{method} {path}")
+        if self.metrics is not None:
+            self.metrics.count_rejection("principal" if principal_key else "ip")
+        suppressed = self.hitters.log_due()
+        if suppressed is not None:
+            LOGGER.warning(
+                "Rate limit exceeded for client %s "
+                "(%d more rejections since last report)",
+                quota_key,
+                suppressed,
+            )
+
+    def _merge(
+        self, headers: Iterable[Tuple[bytes, bytes]], extra: RawHeaders
+    ) -> RawHeaders:
+        merged = list(headers)
+        present = {name.lower() for name, _ in merged}
+        for name, value in self.header_block:
+            if name not in present:
+                merged.append((name, value))
+        for name, value in extra:
+            if name not in present:
+                merged.append((name, value))
+        return merged
+
+    async def _send_json(
+        self, send: Send, status: int, body: bytes, headers: RawHeaders
+    ) -> None:
+        raw = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": self._merge(raw, []),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class MetricsMiddleware:
+    """Count in-flight requests and record latency per route template.
+
+    Sits outside every other middleware so rejected and failed requests are
+    timed too. The route template is read from ``scope["route"]`` after the
+    router ran; requests that never reached a route (404s, 429s) are
+    labelled ``unmatched`` and unknown methods ``OTHER`` to keep label
+    cardinality bounded.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[Scope, Receive, Send], Awaitable[None]],
+        *,
+        registry: MetricsRegistry,
+    ) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        started = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")
+            registry.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter_ns() - started,
+            )
+
+
+class ProfilingMiddleware:
+    """Report requests to an armed request-mode profile.
+
+    Outermost, so every other middleware runs inside the profiled window;
+    when no profile is armed the cost is one attribute check.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[Scope, Receive, Send], Awaitable[None]],
+        *,
+        profiler: Profiler,
+    ) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if not profiler.armed or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        generation = profiler.request_started(scope["method"], scope["path"])
+        if generation is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_finished(generation)
+
+
+class _CompressingSend:
+    """``send`` wrapper for one response; decides once the start message is seen."""
+
+    __slots__ = (
+        "send",
+        "coding",
+        "level",
+        "minimum_size",
+        "content_types",
+        "passthrough",
+        "start",
+        "buffer",
+        "size",
+        "encoder",
+    )
+
+    def __init__(
+        self,
+        send: Send,
+        coding: str,
+        level: int,
+        minimum_size: int,
+        content_types: Tuple[str, ...],
+    ) -> None:
+        self.send = send
+        self.coding = coding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.passthrough = False
+        self.start: Optional[Message] = None
+        self.buffer: List[bytes] = []
+        self.size = 0
+        self.encoder: Optional[Encoder] = None
+
+    def _eligible(self, message: Message) -> Tuple[bool, bool]:
+        """Return ``(vary, compress)`` for a response start message."""
+        status = message["status"]
+        if status < 200 or status in (204, 304):
+            return False, False
+        content_type = content_length = None
+        for name, value in message.get("headers", ()):
+            if name == b"content-encoding":
+                return False, False
+            if name == b"cache-control" and b"no-transform" in value.lower():
+                return False, False
+            if name == b"content-type":
+                content_type = value
+            elif name == b"content-length":
+                content_length = value
+        if content_type is None or not is_compressible(
+            content_type, self.content_types
+        ):
+            return False, False
+        if content_length is not None and int(content_length) < self.minimum_size:
+            return True, False
+        return True, True
+
+    def _headers(self, *, encoded: bool, length: Optional[int] = None) -> RawHeaders:
+        assert self.start is not None
+        headers: RawHeaders = []
+        vary = b"Accept-Encoding"
+        for name, value in self.start.get("headers", ()):
+            if name == b"vary":
+                vary = value + b", Accept-Encoding"
+            elif name == b"etag" and encoded:
+                # The encoded bytes differ, so the validator can only be weak.
+                headers.append(
+                    (name, value if value.startswith(b"W/") else b"W/" + value)
+                )
+            elif name != b"content-length" or not encoded:
+                headers.append((name, value))
+        headers.append((b"vary", vary))
+        if encoded:
+            headers.append((b"content-encoding", self.coding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return headers
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            vary, compress = self._eligible(message)
+            if not compress:
+                self.passthrough = True
+                if vary:
+                    self.start = message
+                    message["headers"] = self._headers(encoded=False)
+                await self.send(message)
+                return
+            self.start = message
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            chunk = self.encoder.compress(body)
+            if not more_body:
+                chunk += self.encoder.flush()
+            if chunk or not more_body:
+                await self.send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": more_body,
+                    }
+                )
+            return
+
+        assert self.start is not None
+        self.buffer.append(body)
+        self.size += len(body)
+        if self.size < self.minimum_size:
+            if more_body:
+                return
+            self.start["headers"] = self._headers(encoded=False)
+            await self.send(self.start)
+            await self.send(
+                {"type": "http.response.body", "body": b"".join(self.buffer)}
+            )
+            return
+
+        data = b"".join(self.buffer)
+        self.buffer = []
+        self.encoder = Encoder(self.coding, self.level)
+        chunk = self.encoder.compress(data)
+        if not more_body:
+            chunk += self.encoder.flush()
+            self.start["headers"] = self._headers(encoded=True, length=len(chunk))
+        else:
+            self.start["headers"] = self._headers(encoded=True)
+        await self.send(self.start)
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+
+class CompressionMiddleware:
+    """Negotiate gzip or zstd and compress large, compressible responses.
+
+    Bodies below ``minimum_size`` and media types outside ``content_types``
+    pass through untouched. A response that arrives in one message is
+    compressed in one go with an exact ``Content-Length``; a streamed
+    response is compressed chunk by chunk as it is produced, so the full
+    body is never held in memory. Levels come from per-route tables; a level
+    of 0 disables that coding for the route.
+    """
+
+    def __init__(
+        self,
+        app: Callable[[Scope, Receive, Send], Awaitable[None]],
+        *,
+        minimum_size: int,
+        content_types: Iterable[str],
+        gzip_levels: RouteCostTable,
+        zstd_levels: RouteCostTable,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(entry.lower() for entry in content_types)
+        self.gzip_levels = gzip_levels
+        self.zstd_levels = zstd_levels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = RawHeaderLookup(scope["headers"]).get("accept-encoding")
+        coding = negotiate(accept_encoding) if accept_encoding else None
+        method, path = scope["method"], scope["path"]
+        level = 0
+        if coding == "zstd":
+            level = int(self.zstd_levels.cost(method, path))
+            if level <= 0:
+                coding = negotiate(accept_encoding, False)
+        if coding == "gzip":
+            level = int(self.gzip_levels.cost(method, path))
+        if coding is None or level <= 0:
+            await self.app(scope, receive, send)
+            return
+        await self.app(
+            scope,
+            receive,
+            _CompressingSend(
+                send, coding, level, self.minimum_size, self.content_types
+            ),
+        )
@@ -1,5 +1,7 @@
+from .api_key import ApiKey  # noqa: F401
 from .document import Document  # noqa: F401
 from .material import Material  # noqa: F401
-from .project import Project, ProjectStatus  # noqa: F401
+from .project import Project, ProjectListVersion, ProjectStatus  # noqa: F401
+from .revoked_token import RevokedToken  # noqa: F401
 from .task import Task, TaskStatus  # noqa: F401
 from .user import User, UserRole  # noqa: F401
@@ -0,0 +1,26 @@
+"""API keys for machine clients, stored as prefix plus HMAC digest."""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from src.database import Base
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    name = Column(String, nullable=False)
+    prefix = Column(String(16), nullable=False, unique=True, index=True)
+    digest = Column(String(64), nullable=False)
+    scopes = Column(String, nullable=False, server_default="read")
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    revoked_at = Column(DateTime(timezone=True))
+
+    user = relationship("User")
@@ -1,9 +1,15 @@
-"""Project model and status enumeration."""
+"""Project model, status enumeration and change-version tracking."""
 
 import enum
+from itertools import chain
+from typing import Any, Set
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, relationship
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.sql import func
 
 from src.database import Base
@@ -41,6 +47,9 @@ class Project(Base):
         onupdate=func.now(),
         nullable=False,
     )
+    # Bumped whenever the project or one of its tasks, materials or
+    # documents changes; list endpoints derive their ETags from it.
+    version = Column(Integer, default=0, server_default="0", nullable=False)
 
     owner = relationship("User", back_populates="projects")
     tasks = relationship(
@@ -58,3 +67,91 @@ class Project(Base):
         back_populates="project",
         cascade="all,delete-orphan",
     )
+
+
+class ProjectListVersion(Base):
+    """Per-owner counter bumped whenever a project is created, deleted or
+    reassigned; project list ETags include it, so a new project that reuses
+    a deleted one's id still changes the tag."""
+
+    __tablename__ = "project_list_versions"
+
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+def _touched_owner_ids(project: Project) -> Set[int]:
+    """Current and previous ``owner_id`` of a project."""
+    ids = {project.owner_id}
+    ids.update(sa_inspect(project).attrs.owner_id.history.deleted or ())
+    ids.discard(None)
+    return ids
+
+
+def _touched_project_ids(obj: Any) -> Set[int]:
+    """Current and previous ``project_id`` of a row that belongs to a project."""
+    ids = {obj.project_id}
+    history = sa_inspect(obj).attrs.project_id.history
+    ids.update(history.deleted or ())
+    ids.discard(None)
+    return ids
+
+
+def _bump_list_versions(session: Session, owners: Set[int]) -> None:
+    connection = session.connection()
+    insert = (
+        postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    )
+    table = ProjectListVersion.__table__
+    statement = insert(table).values(
+        [{"owner_id": owner_id, "version": 1} for owner_id in owners]
+    )
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.owner_id], set_={"version": table.c.version + 1}
+        )
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_project_versions(
+    session: Session, flush_context: Any, instances: Any
+) -> None:
+    """Increment ``Project.version`` for every project whose data is flushed.
+
+    Creating, deleting or reassigning a project also increments the owners'
+    ``ProjectListVersion``.
+
+    The increment is a SQL expression (``version + 1``), so concurrent
+    writers in other workers never lose a bump.
+    """
+    touched: Set[int] = set()
+    bumped: Set[int] = set()
+    owners: Set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Project):
+            if obj in session.dirty and session.is_modified(obj):
+                obj.version = Project.version + 1
+                bumped.add(obj.id)
+                if sa_inspect(obj).attrs.owner_id.history.has_changes():
+                    owners.update(_touched_owner_ids(obj))
+            elif obj not in session.dirty:
+                owners.update(_touched_owner_ids(obj))
+        elif hasattr(obj, "project_id"):
+            if obj not in session.dirty or session.is_modified(obj):
+                touched.update(_touched_project_ids(obj))
+    if owners:
+        _bump_list_versions(session, owners)
+    touched -= bumped
+    if not touched:
+        return
+    table = Project.__table__
+    session.connection().execute(
+        update(table).where(table.c.id.in_(touched)).values(version=table.c.version + 1)
+    )
+    for project_id in touched:
+        project = session.identity_map.get(identity_key(Project, project_id))
+        if project is not None:
+            session.expire(project, ["version"])
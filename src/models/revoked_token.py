@@ -0,0 +1,16 @@
+"""Revoked refresh-token identifiers (jti and session family markers)."""
+
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.sql import func
+
+from src.database import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(BigInteger, nullable=False, index=True)
+    revoked_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -28,6 +28,7 @@ class User(Base):
         server_default=UserRole.operador.value,
         nullable=False,
     )
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -0,0 +1,272 @@
+"""Sampling CPU profiler that is safe to run on a live worker.
+
+A daemon thread wakes every ``interval`` seconds, reads every thread's
+Python stack with ``sys._current_frames()`` and counts identical stacks.
+Nothing is traced or instrumented: each tick walks the stacks of busy
+threads only (an idle thread costs one lookup), and nothing at all runs
+unless a profile was requested. Frames are labelled ``module.qualname``, so time lands on
+``src.middleware.SecurityMiddleware.__call__``,
+``src.utils.auth._decode_token``, ``sqlalchemy.orm.query.Query.all`` or
+``fastapi.routing.serialize_response`` as it would in a flame graph.
+
+Stacks whose leaf frame is a known wait (idle pool workers, the event loop's
+``select``) are skipped unless ``include_idle`` is set, so the profile shows
+where CPU went rather than where threads slept.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from collections import Counter
+from types import CodeType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import __version__
+from .security import RouteTable
+
+IDLE_LEAVES = frozenset(
+    {
+        "threading.Condition.wait",
+        "threading.Thread._wait_for_tstate_lock",
+        "selectors.EpollSelector.select",
+        "selectors.KqueueSelector.select",
+        "selectors.PollSelector.select",
+        "selectors.SelectSelector.select",
+        "queue.Queue.get",
+        "concurrent.futures.thread._worker",
+        "anyio._backends._asyncio.WorkerThread.run",
+        "multiprocessing.connection.Connection._recv",
+        # uvloop waits in C, so an idle loop's innermost Python frame is this.
+        "asyncio.runners.Runner.run",
+    }
+)
+_TRUNCATED = "[truncated]"
+
+
+class StackSampler:
+    """Count the stacks of all threads, sampled every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.01,
+        include_idle: bool = False,
+        max_depth: int = 128,
+        max_stacks: int = 20_000,
+    ) -> None:
+        self.interval = max(interval, 0.001)
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.counts: Counter[Tuple[str, ...]] = Counter()
+        self.ticks = 0
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+        self._locations: Dict[str, Tuple[str, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._gate: Optional[Callable[[], bool]] = None
+
+    def start(self, gate: Optional[Callable[[], bool]] = None) -> None:
+        """Sample in a daemon thread; ``gate`` returning False skips a tick."""
+        self._gate = gate
+        self._thread = threading.Thread(
+            target=self._run, name="zappro-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self._gate is None or self._gate():
+                self.sample(skip=own)
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        label = self._labels[code] = f"{module}.{code.co_qualname}"
+        self._locations[label] = (code.co_filename, code.co_firstlineno)
+        return label
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        """Record the current stack of every thread except ``skip``."""
+        labels, counts = self._labels, self.counts
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            # Idle threads are the common case: decide on the leaf alone.
+            leaf = labels.get(frame.f_code) or self._label(frame)
+            if not self.include_idle and leaf in IDLE_LEAVES:
+                continue
+            stack = [leaf]
+            frame = frame.f_back
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(labels.get(frame.f_code) or self._label(frame))
+                frame = frame.f_back
+            stack.append(f"thread:{names.get(ident, ident)}")
+            key = tuple(reversed(stack))
+            if key not in counts and len(counts) >= self.max_stacks:
+                key = (key[0], _TRUNCATED)
+            counts[key] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, one ``a;b;c count`` line per stack."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.counts.most_common()
+        )
+
+    def speedscope(self, name: str) -> dict:
+        """A sampled profile in speedscope's file format, weighted in ms."""
+        index: Dict[str, int] = {}
+        frames: List[dict] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.counts.most_common():
+            row = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    file, line = self._locations.get(label, (None, None))
+                    frames.append(
+                        {"name": label, "file": file, "line": line}
+                        if file is not None
+                        else {"name": label}
+                    )
+                row.append(index[label])
+            samples.append(row)
+            weights.append(count * self.interval * 1000)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": f"zappro-api@{__version__}",
+            "name": name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+class Profiler:
+    """Runs one profile at a time, for a fixed window or for sampled requests.
+
+    In request mode ``ProfilingMiddleware`` reports every request; every
+    ``every``-th one matching the route is selected and the sampler only
+    ticks while a selected request is in flight. Selected requests are
+    counted per profile generation, so one still running from an earlier,
+    timed-out profile cannot disturb the next profile's count.
+    """
+
+    def __init__(self, *, max_seconds: float = 60.0) -> None:
+        self.max_seconds = max_seconds
+        self.armed = False
+        self._lock = threading.Lock()
+        self._route: Optional[RouteTable[bool]] = None
+        self._every = 1
+        self._seen = 0
+        self._remaining = 0
+        self._generation = 0
+        self._in_flight: Counter[int] = Counter()
+        self._done: Optional[asyncio.Event] = None
+
+    def _claim(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+
+    async def profile_for(self, sampler: StackSampler, seconds: float) -> None:
+        """Sample every thread for ``seconds``."""
+        self._claim()
+        try:
+            sampler.start()
+            try:
+                await asyncio.sleep(min(seconds, self.max_seconds))
+            finally:
+                await asyncio.to_thread(sampler.stop)
+        finally:
+            self._lock.release()
+
+    async def profile_requests(
+        self,
+        sampler: StackSampler,
+        route: str,
+        *,
+        every: int = 1,
+        requests: int = 10,
+        timeout: float = 30.0,
+    ) -> int:
+        """Sample while selected requests run; return how many were profiled."""
+        self._claim()
+        try:
+            self._route = RouteTable({route: True}, default=False)
+            self._every = max(every, 1)
+            self._seen = 0
+            self._remaining = requests
+            self._generation += 1
+            generation = self._generation
+            self._done = asyncio.Event()
+            sampler.start(gate=lambda: self._in_flight[generation] > 0)
+            self.armed = True
+            try:
+                await asyncio.wait_for(
+                    self._done.wait(), min(timeout, self.max_seconds)
+                )
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.armed = False
+                await asyncio.to_thread(sampler.stop)
+            return requests - self._remaining
+        finally:
+            self._route = None
+            self._lock.release()
+
+    def request_started(self, method: str, path: str) -> Optional[int]:
+        """Called by the middleware while armed; a generation selects the request.
+
+        Pass the returned generation to ``request_finished``.
+        """
+        if self._route is None or self._remaining <= 0:
+            return None
+        if not self._route.lookup(method, path):
+            return None
+        self._seen += 1
+        if (self._seen - 1) % self._every:
+            return None
+        self._remaining -= 1
+        self._in_flight[self._generation] += 1
+        return self._generation
+
+    def request_finished(self, generation: int) -> None:
+        in_flight = self._in_flight
+        in_flight[generation] -= 1
+        if in_flight[generation] <= 0:
+            del in_flight[generation]
+        if (
+            generation == self._generation
+            and generation not in in_flight
+            and self._remaining <= 0
+            and self._done is not None
+        ):
+            self._done.set()
@@ -0,0 +1,100 @@
+"""Operational endpoints restricted to administrators."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from src.dependencies import require_role
+from src.models.user import UserRole
+from src.profiler import Profiler, ProfilerBusy, StackSampler
+from src.schemas.admin import RateLimitTop
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_role([UserRole.admin]))],
+)
+
+
+@router.get("/rate-limit/top", response_model=RateLimitTop)
+def rate_limit_top(request: Request, k: int = Query(10, ge=1, le=1000)) -> RateLimitTop:
+    """Heaviest rate-limited client IPs, principals and routes since startup.
+
+    Counts are approximate: each may overestimate by at most ``error``.
+    """
+    return RateLimitTop(**request.app.state.rate_limit_hitters.snapshot(k))
+
+
+ProfileFormat = Literal["collapsed", "speedscope"]
+
+
+def _profiler(request: Request) -> Profiler:
+    profiler = getattr(request.app.state, "profiler", None)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    return profiler
+
+
+def _profile_response(
+    sampler: StackSampler, output: ProfileFormat, name: str, **extra: str
+) -> Response:
+    headers = {"X-Profile-Samples": str(sampler.samples), **extra}
+    if output == "speedscope":
+        headers["Content-Disposition"] = 'attachment; filename="zappro.speedscope.json"'
+        return JSONResponse(sampler.speedscope(name), headers=headers)
+    return PlainTextResponse(sampler.collapsed(), headers=headers)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def cpu_profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    output: ProfileFormat = Query("collapsed", alias="format"),
+    idle: bool = Query(False, description="Keep stacks of waiting threads"),
+) -> Response:
+    """Sample every thread's stack for ``seconds`` (capped by the settings).
+
+    ``collapsed`` feeds flamegraph.pl or speedscope; ``speedscope`` is the
+    native JSON file format of https://www.speedscope.app.
+    """
+    sampler = StackSampler(interval=interval_ms / 1000, include_idle=idle)
+    try:
+        await _profiler(request).profile_for(sampler, seconds)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return _profile_response(sampler, output, f"{seconds:g}s of all threads")
+
+
+@router.get("/profile/requests", response_class=PlainTextResponse)
+async def request_profile(
+    request: Request,
+    route: str = Query(..., description='"METHOD /prefix" or "/prefix"'),
+    every: int = Query(1, ge=1, description="Profile every Nth matching request"),
+    requests: int = Query(10, ge=1, le=10_000),
+    timeout: float = Query(30.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    output: ProfileFormat = Query("collapsed", alias="format"),
+    idle: bool = Query(False, description="Keep stacks of waiting threads"),
+) -> Response:
+    """Sample all threads while selected requests to ``route`` are in flight.
+
+    Returns after ``requests`` selected requests finished or after
+    ``timeout`` seconds, whichever comes first.
+    """
+    sampler = StackSampler(interval=interval_ms / 1000, include_idle=idle)
+    try:
+        profiled = await _profiler(request).profile_requests(
+            sampler, route, every=every, requests=requests, timeout=timeout
+        )
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return _profile_response(
+        sampler,
+        output,
+        f"{profiled} requests to {route}",
+        **{"X-Profiled-Requests": str(profiled)},
+    )
@@ -0,0 +1,85 @@
+"""API key management for machine clients (N8N/Kestra automations)."""
+
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from src.crud import api_key as api_key_crud
+from src.database import get_db
+from src.schemas.api_key import ApiKey as ApiKeySchema
+from src.schemas.api_key import ApiKeyCreate, ApiKeyCreated
+from src.utils import api_keys
+from src.utils.auth import Principal, get_current_principal
+
+router = APIRouter(prefix="/api/v1/auth/api-keys", tags=["api-keys"])
+
+
+def _interactive_principal(
+    current_user: Principal = Depends(get_current_principal),
+) -> Principal:
+    """API keys cannot mint or revoke other keys; a user token is required."""
+    if current_user.api_key_id is not None:
+        raise HTTPException(status_code=403, detail="API keys cannot manage API keys")
+    return current_user
+
+
+@router.post("", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+def create_api_key_endpoint(
+    payload: ApiKeyCreate,
+    current_user: Principal = Depends(_interactive_principal),
+    db: Session = Depends(get_db),
+) -> ApiKeyCreated:
+    """Create a scoped key; the plaintext value is only returned here.
+
+    Example:
+        POST /api/v1/auth/api-keys {"name": "n8n", "scopes": ["read"]}
+    """
+
+    plaintext, prefix = api_keys.generate_api_key()
+    db_key = api_key_crud.create_api_key(
+        db,
+        user_id=current_user.id,
+        name=payload.name,
+        scopes=payload.scopes,
+        prefix=prefix,
+        digest=api_keys.digest(plaintext),
+    )
+    return ApiKeyCreated(
+        **ApiKeySchema.model_validate(db_key).model_dump(), key=plaintext
+    )
+
+
+@router.get("", response_model=List[ApiKeySchema])
+def list_api_keys_endpoint(
+    current_user: Principal = Depends(_interactive_principal),
+    db: Session = Depends(get_db),
+) -> List[ApiKeySchema]:
+    """List the caller's keys (prefix and scopes only).
+
+    Example:
+        GET /api/v1/auth/api-keys
+    """
+
+    return api_key_crud.list_api_keys(db, user_id=current_user.id)
+
+
+@router.delete("/{key_id}", response_model=ApiKeySchema)
+def revoke_api_key_endpoint(
+    key_id: int,
+    current_user: Principal = Depends(_interactive_principal),
+    db: Session = Depends(get_db),
+) -> ApiKeySchema:
+    """Revoke a key.
+
+    Example:
+        DELETE /api/v1/auth/api-keys/4
+    """
+
+    db_key = api_key_crud.revoke_api_key(db, key_id=key_id, user_id=current_user.id)
+    if not db_key:
+        raise HTTPException(status_code=404, detail="API key not found")
+    api_keys.api_key_cache.invalidate(db_key.prefix)
+    return db_key
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-import asyncio
+import logging
+import math
+import time
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
@@ -17,25 +19,35 @@ from src.schemas.auth import (
     UserLogin,
 )
 from src.utils.auth import (
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    access_token_claims,
     create_access_token,
     generate_refresh_token,
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    jwks,
+    password_needs_rehash,
+    refresh_revocations,
+    run_db,
+    verify_password_async,
     verify_refresh_token,
 )
+from src.utils.revocation import REUSED, REVOKED, family_key
+
+LOGGER = logging.getLogger("zappro.auth")
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
+well_known_router = APIRouter(tags=["auth"])
 optional_bearer = HTTPBearer(auto_error=False)
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate, db: Session = Depends(get_db)) -> User:
-    def _register_sync() -> UserModel:
+    def _ensure_available() -> None:
         existing = db.query(UserModel).filter(UserModel.email == user.email).first()
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
 
-        hashed_password = get_password_hash(user.password)
+    def _register_sync(hashed_password: str) -> UserModel:
         db_user = UserModel(
             email=user.email,
             name=user.name,
@@ -47,29 +59,69 @@ async def register(user: UserCreate, db: Session = Depends(get_db)) -> User:
         db.refresh(db_user)
         return db_user  # type: ignore[return-value]
 
-    return await asyncio.to_thread(_register_sync)
+    await run_db(_ensure_available)
+    hashed_password = await hash_password_async(user.password)
+    return await run_db(_register_sync, hashed_password)
+
+
+async def _upgrade_password_hash(db: Session, user: UserModel, password: str) -> None:
+    """Re-store the hash with the current policy; failures keep the old hash."""
+    try:
+        new_hash = await hash_password_async(password)
+    except HTTPException:
+        return
+
+    def _store() -> None:
+        user.hashed_password = new_hash
+        db.commit()
+        db.refresh(user)
+
+    await run_db(_store)
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)) -> Token:
-    def _login_sync() -> UserModel:
-        user = (
+async def login(
+    user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)
+) -> Token:
+    throttle = getattr(request.app.state, "login_throttle", None)
+    client_ip = getattr(request.state, "client_ip", None) or (
+        request.client.host if request.client else "anonymous"
+    )
+    if throttle is not None:
+        allowed, retry_after = throttle.check(user_credentials.email, client_ip)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts",
+                headers={"Retry-After": f"{math.ceil(retry_after)}"},
+            )
+
+    def _fetch_user() -> UserModel | None:
+        return (
             db.query(UserModel)
             .filter(UserModel.email == user_credentials.email)
             .first()
         )
-        if not user or not verify_password(
-            user_credentials.password, user.hashed_password
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password",
-            )
-        return user
 
-    user = await asyncio.to_thread(_login_sync)
-    access_token = await create_access_token(data={"sub": user.email})
-    refresh_token = await generate_refresh_token(data={"sub": user.email})
+    user = await run_db(_fetch_user)
+    if not user or not await verify_password_async(
+        user_credentials.password, user.hashed_password
+    ):
+        if throttle is not None:
+            throttle.record_failure(user_credentials.email, client_ip)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
+    if throttle is not None:
+        throttle.record_success(user_credentials.email, client_ip)
+    if password_needs_rehash(user.hashed_password):
+        await _upgrade_password_hash(db, user, user_credentials.password)
+
+    claims = access_token_claims(user)
+    access_token = await create_access_token(data=claims)
+    refresh_token = await generate_refresh_token(data=claims)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -78,29 +130,76 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)) -> T
     }
 
 
-@router.post("/refresh", response_model=RefreshResponse)
-async def refresh_token_endpoint(
-    payload: RefreshRequest | None = None,
-    credentials: HTTPAuthorizationCredentials | None = Depends(optional_bearer),
-    db: Session = Depends(get_db),
-) -> RefreshResponse:
+def _presented_refresh_token(
+    payload: RefreshRequest | None,
+    credentials: HTTPAuthorizationCredentials | None,
+) -> str:
     token = (payload.refresh_token if payload else None) or (
         credentials.credentials if credentials else None
     )
     if not token:
         raise HTTPException(status_code=400, detail="Refresh token required")
+    return token
+
+
+def _family_expiry() -> int:
+    # Any token of the family was issued before now, so it expires before this.
+    return int(time.time()) + REFRESH_TOKEN_EXPIRE_DAYS * 86400
 
+
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh_token_endpoint(
+    payload: RefreshRequest | None = None,
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_bearer),
+    db: Session = Depends(get_db),
+) -> RefreshResponse:
+    token = _presented_refresh_token(payload, credentials)
     decoded = await verify_refresh_token(token)
     email = decoded.get("sub")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token")
-
-    def _fetch_user() -> UserModel | None:
+    jti = str(decoded["jti"])
+    family = str(decoded["fam"])
+
+    def _consume_and_fetch_user() -> UserModel | None:
+        outcome = refresh_revocations.consume(db, jti, family, int(decoded["exp"]))
+        if outcome == REVOKED:
+            raise HTTPException(status_code=401, detail="Token revoked")
+        if outcome == REUSED:
+            # A rotated token came back: assume it leaked and end the session.
+            refresh_revocations.revoke(db, family_key(family), _family_expiry())
+            LOGGER.warning("Refresh token reuse detected for family %s", family)
+            raise HTTPException(status_code=401, detail="Token revoked")
         return db.query(UserModel).filter(UserModel.email == email).first()
 
-    user = await asyncio.to_thread(_fetch_user)
+    user = await run_db(_consume_and_fetch_user)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    token_version = decoded.get("ver")
+    if token_version is not None and token_version != (user.token_version or 0):
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    claims = access_token_claims(user)
+    access_token = await create_access_token(claims)
+    refresh_token = await generate_refresh_token(claims, family=family)
+    return RefreshResponse(access_token=access_token, refresh_token=refresh_token)
 
-    access_token = await create_access_token({"sub": user.email})
-    return RefreshResponse(access_token=access_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
+async def logout(
+    payload: RefreshRequest | None = None,
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_bearer),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Revoke the refresh token's whole rotation family."""
+    decoded = await verify_refresh_token(_presented_refresh_token(payload, credentials))
+    family = str(decoded["fam"])
+    await run_db(refresh_revocations.revoke, db, family_key(family), _family_expiry())
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@well_known_router.get("/.well-known/jwks.json")
+def jwks_endpoint(response: Response) -> dict:
+    """Publish the verification keys so other services can validate our tokens."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return jwks()
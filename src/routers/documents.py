@@ -4,31 +4,33 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from src.crud import document as document_crud
+from src.crud import project as project_crud
 from src.database import get_db
 from src.dependencies import require_role
 from src.models.document import Document as DocumentModel
 from src.models.project import Project
 from src.models.task import Task
-from src.models.user import User, UserRole
+from src.models.user import UserRole
 from src.schemas.document import Document as DocumentSchema
 from src.schemas.document import DocumentCreate, DocumentUpdate
-from src.utils.auth import get_current_user
+from src.utils.auth import Principal, get_current_principal
+from src.utils.etags import conditional_get
 
 router = APIRouter(tags=["documents"])
 
 
-def _is_admin(user: User) -> bool:
+def _is_admin(user: Principal) -> bool:
     return user.role == UserRole.admin
 
 
 def _ensure_project_access(
     db: Session,
     project_id: int,
-    current_user: User,
+    current_user: Principal,
 ) -> Project:
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -41,7 +43,7 @@ def _ensure_project_access(
 def _ensure_task_access(
     db: Session,
     task_id: int,
-    current_user: User,
+    current_user: Principal,
 ) -> Task:
     task = db.query(Task).join(Project).filter(Task.id == task_id).first()
     if not task:
@@ -55,7 +57,7 @@ def _resolve_document_or_error(
     *,
     db: Session,
     document_id: int,
-    current_user: User,
+    current_user: Principal,
 ) -> DocumentModel:
     document = document_crud.get_document(
         db,
@@ -80,7 +82,7 @@ def _resolve_document_or_error(
 )
 def create_document_endpoint(
     document: DocumentCreate,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> DocumentSchema:
     """Create a document associated with a project or task.
@@ -110,7 +112,9 @@ def create_document_endpoint(
 
 @router.get("/documents", response_model=List[DocumentSchema])
 def list_documents_endpoint(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> List[DocumentSchema]:
     """List all documents accessible to the authenticated user.
@@ -119,15 +123,24 @@ def list_documents_endpoint(
         GET /api/v1/documents
     """
 
-    return document_crud.list_documents(
-        db, owner_id=current_user.id, is_admin=_is_admin(current_user)
+    is_admin = _is_admin(current_user)
+    not_modified = conditional_get(
+        request,
+        response,
+        current_user.id,
+        project_crud.collection_version(db, current_user.id, is_admin),
     )
+    if not_modified is not None:
+        return not_modified
+    return document_crud.list_documents(db, owner_id=current_user.id, is_admin=is_admin)
 
 
 @router.get("/projects/{project_id}/documents", response_model=List[DocumentSchema])
 def list_project_documents(
     project_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> List[DocumentSchema]:
     """List documents for a specific project.
@@ -136,7 +149,10 @@ def list_project_documents(
         GET /api/v1/projects/7/documents
     """
 
-    _ensure_project_access(db, project_id, current_user)
+    project = _ensure_project_access(db, project_id, current_user)
+    not_modified = conditional_get(request, response, current_user.id, project.version)
+    if not_modified is not None:
+        return not_modified
     return document_crud.list_documents_by_project(
         db,
         project_id=project_id,
@@ -148,7 +164,9 @@ def list_project_documents(
 @router.get("/tasks/{task_id}/documents", response_model=List[DocumentSchema])
 def list_task_documents(
     task_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> List[DocumentSchema]:
     """List documents associated with a task.
@@ -157,7 +175,12 @@ def list_task_documents(
         GET /api/v1/tasks/3/documents
     """
 
-    _ensure_task_access(db, task_id, current_user)
+    task = _ensure_task_access(db, task_id, current_user)
+    not_modified = conditional_get(
+        request, response, current_user.id, task.project.version
+    )
+    if not_modified is not None:
+        return not_modified
     return document_crud.list_documents_by_task(
         db,
         task_id=task_id,
@@ -169,7 +192,9 @@ def list_task_documents(
 @router.get("/documents/{document_id}", response_model=DocumentSchema)
 def get_document_endpoint(
     document_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> DocumentSchema:
     """Retrieve a document by id.
@@ -178,18 +203,24 @@ def get_document_endpoint(
         GET /api/v1/documents/12
     """
 
-    return _resolve_document_or_error(
+    db_document = _resolve_document_or_error(
         db=db,
         document_id=document_id,
         current_user=current_user,
     )
+    not_modified = conditional_get(
+        request, response, current_user.id, db_document.project.version
+    )
+    if not_modified is not None:
+        return not_modified
+    return db_document
 
 
 @router.put("/documents/{document_id}", response_model=DocumentSchema)
 def update_document_endpoint(
     document_id: int,
     document_update: DocumentUpdate,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> DocumentSchema:
     """Update document metadata such as URL or description.
@@ -220,7 +251,7 @@ def update_document_endpoint(
 )
 def delete_document_endpoint(
     document_id: int,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> Response:
     """Delete a document.
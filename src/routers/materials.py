@@ -4,30 +4,32 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from src.crud import material as material_crud
+from src.crud import project as project_crud
 from src.database import get_db
 from src.dependencies import require_role
 from src.models.material import Material as MaterialModel
 from src.models.project import Project
-from src.models.user import User, UserRole
+from src.models.user import UserRole
 from src.schemas.material import Material as MaterialSchema
 from src.schemas.material import MaterialCreate, MaterialUpdate
-from src.utils.auth import get_current_user
+from src.utils.auth import Principal, get_current_principal
+from src.utils.etags import conditional_get
 
 router = APIRouter(tags=["materials"])
 
 
-def _is_admin(user: User) -> bool:
+def _is_admin(user: Principal) -> bool:
     return user.role == UserRole.admin
 
 
 def _ensure_project_access(
     db: Session,
     project_id: int,
-    current_user: User,
+    current_user: Principal,
 ) -> Project:
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -41,7 +43,7 @@ def _resolve_material_or_error(
     *,
     db: Session,
     material_id: int,
-    current_user: User,
+    current_user: Principal,
 ) -> MaterialModel:
     material = material_crud.get_material(
         db,
@@ -66,7 +68,7 @@ def _resolve_material_or_error(
 )
 def create_material_endpoint(
     material: MaterialCreate,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> MaterialSchema:
     """Create a material for a project.
@@ -90,7 +92,9 @@ def create_material_endpoint(
 
 @router.get("/materials", response_model=List[MaterialSchema])
 def list_materials_endpoint(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> List[MaterialSchema]:
     """List all materials accessible to the authenticated user.
@@ -99,15 +103,24 @@ def list_materials_endpoint(
         GET /api/v1/materials
     """
 
-    return material_crud.list_materials(
-        db, owner_id=current_user.id, is_admin=_is_admin(current_user)
+    is_admin = _is_admin(current_user)
+    not_modified = conditional_get(
+        request,
+        response,
+        current_user.id,
+        project_crud.collection_version(db, current_user.id, is_admin),
     )
+    if not_modified is not None:
+        return not_modified
+    return material_crud.list_materials(db, owner_id=current_user.id, is_admin=is_admin)
 
 
 @router.get("/projects/{project_id}/materials", response_model=List[MaterialSchema])
 def list_project_materials(
     project_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> List[MaterialSchema]:
     """List materials for a specific project.
@@ -116,7 +129,10 @@ def list_project_materials(
         GET /api/v1/projects/1/materials
     """
 
-    _ensure_project_access(db, project_id, current_user)
+    project = _ensure_project_access(db, project_id, current_user)
+    not_modified = conditional_get(request, response, current_user.id, project.version)
+    if not_modified is not None:
+        return not_modified
     return material_crud.list_materials_by_project(
         db,
         project_id=project_id,
@@ -128,7 +144,9 @@ def list_project_materials(
 @router.get("/materials/{material_id}", response_model=MaterialSchema)
 def get_material_endpoint(
     material_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ) -> MaterialSchema:
     """Retrieve a material by id.
@@ -137,18 +155,24 @@ def get_material_endpoint(
         GET /api/v1/materials/10
     """
 
-    return _resolve_material_or_error(
+    db_material = _resolve_material_or_error(
         db=db,
         material_id=material_id,
         current_user=current_user,
     )
+    not_modified = conditional_get(
+        request, response, current_user.id, db_material.project.version
+    )
+    if not_modified is not None:
+        return not_modified
+    return db_material
 
 
 @router.put("/materials/{material_id}", response_model=MaterialSchema)
 def update_material_endpoint(
     material_id: int,
     material_update: MaterialUpdate,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> MaterialSchema:
     """Update a material's stock or supplier information.
@@ -179,7 +203,7 @@ def update_material_endpoint(
 )
 def delete_material_endpoint(
     material_id: int,
-    current_user: User = Depends(require_role([UserRole.admin, UserRole.gestor])),
+    current_user: Principal = Depends(require_role([UserRole.admin, UserRole.gestor])),
     db: Session = Depends(get_db),
 ) -> Response:
     """Delete a material.
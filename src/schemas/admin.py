@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import List
+
+from pydantic import BaseModel
+
+
+class HeavyHitter(BaseModel):
+    key: str
+    count: int
+    error: int
+
+
+class RateLimitTop(BaseModel):
+    rejected_total: int
+    clients: List[HeavyHitter]
+    principals: List[HeavyHitter]
+    routes: List[HeavyHitter]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from src.utils.api_keys import API_KEY_SCOPES
+
+
+class ApiKeyCreate(BaseModel):
+    name: str
+    scopes: List[str] = Field(default_factory=lambda: ["read"])
+
+    @field_validator("scopes")
+    @classmethod
+    def _known_scopes(cls, value: List[str]) -> List[str]:
+        unknown = set(value) - API_KEY_SCOPES
+        if unknown or not value:
+            raise ValueError(
+                f"Scopes must be a non-empty subset of {sorted(API_KEY_SCOPES)}"
+            )
+        return sorted(set(value))
+
+
+class ApiKey(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    scopes: List[str]
+    created_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("scopes", mode="before")
+    @classmethod
+    def _split_scopes(cls, value: object) -> object:
+        if isinstance(value, str):
+            return sorted(part for part in value.split(",") if part)
+        return value
+
+
+class ApiKeyCreated(ApiKey):
+    key: str
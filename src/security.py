@@ -2,19 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import math
 import re
 import secrets
 import time
-from collections import deque
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from ipaddress import ip_address, ip_network
-from typing import Deque, Dict, List, Optional, Tuple
+from itertools import islice
+from typing import Any, Callable, Dict, Generic, List, Mapping, Optional, Tuple, TypeVar
+
+from .sketches import CountMinSketch, RotatingBloomFilter, SpaceSaving
+from .utils.resp import RespClient, RespError
+from .utils.shm import SharedMemoryTable
 
 LOGGER = logging.getLogger("zappro.security")
 REQUEST_ID_PATTERN = re.compile(r"^[A-Fa-f0-9-]{16,128}$")
 
+V = TypeVar("V")
+
 
 def build_request_id(
     existing: str | None = None, *, allow_existing: bool = False
@@ -25,15 +35,50 @@ def build_request_id(
     return secrets.token_hex(16)
 
 
-@dataclass
+@dataclass(slots=True)
 class _RateBucket:
     window_start: float
-    count: int
-    last_seen: float
+    count: float
+
+
+class _Generations:
+    """Two dicts rotated every ``period`` seconds or when the young one fills.
+
+    Entries touched within the last period stay in (or are promoted to)
+    ``current``; rotation drops ``previous`` wholesale. Idle entries therefore
+    live between one and two periods, memory is bounded by ``max_entries``
+    distinct keys regardless of request rate, and eviction is amortized O(1)
+    with nothing appended per request.
+    """
+
+    __slots__ = ("period", "capacity", "current", "previous", "rotate_at")
+
+    def __init__(self, period: float, max_entries: int, now: float) -> None:
+        self.period = period
+        self.capacity = max(max_entries // 2, 1)
+        self.current: Dict[str, Any] = {}
+        self.previous: Dict[str, Any] = {}
+        self.rotate_at = now + period
+
+    def rotate(self, now: float) -> None:
+        if now >= self.rotate_at + self.period:
+            # Idle for two periods: everything has expired.
+            self.previous = {}
+        else:
+            self.previous = self.current
+        self.current = {}
+        self.rotate_at = now + self.period
+
+    def clear(self) -> None:
+        self.current.clear()
+        self.previous.clear()
+
+    def __len__(self) -> int:
+        return len(self.current) + len(self.previous)
 
 
 class FixedWindowRateLimiter:
-    """Fixed-window rate limiter with TTL eviction."""
+    """Fixed-window rate limiter with generational TTL eviction."""
 
     def __init__(
         self,
@@ -42,138 +87,905 @@ class FixedWindowRateLimiter:
         *,
         ttl_seconds: Optional[int] = None,
         max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
     ) -> None:
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.ttl_seconds = ttl_seconds or window_seconds * 2
         self.max_entries = max_entries
-        self._buckets: Dict[str, _RateBucket] = {}
-        self._order: Deque[Tuple[float, str]] = deque()
+        self._clock = clock
+        self._buckets = _Generations(self.ttl_seconds, max_entries, clock())
 
-    def allow(self, identifier: str) -> Tuple[bool, float]:
-        """Return whether the identifier can proceed and the retry-after seconds."""
+    def allow(self, identifier: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Return whether the identifier can proceed and the retry-after seconds.
+
+        ``cost`` is how many units of the window budget the request consumes.
+        """
         if self.max_requests <= 0:
             return True, 0.0
 
-        now = time.monotonic()
+        now = self._clock()
+        cost = min(cost, self.max_requests)
+        buckets = self._buckets
+        if now >= buckets.rotate_at:
+            buckets.rotate(now)
         window_start = math.floor(now / self.window_seconds) * self.window_seconds
-        bucket = self._buckets.get(identifier)
-
-        if bucket and bucket.window_start == window_start:
-            if bucket.count >= self.max_requests:
-                retry_after = max(0.0, window_start + self.window_seconds - now)
-                bucket.last_seen = now
-                self._order.append((now, identifier))
-                self._evict(now)
-                return False, retry_after
-
-            bucket.count += 1
-            bucket.last_seen = now
-        else:
-            bucket = _RateBucket(window_start=window_start, count=1, last_seen=now)
-            self._buckets[identifier] = bucket
-
-        self._order.append((now, identifier))
-        self._evict(now)
+        bucket = buckets.current.get(identifier)
+        if bucket is None:
+            bucket = buckets.previous.pop(identifier, None)
+            if bucket is None or bucket.window_start != window_start:
+                bucket = _RateBucket(window_start=window_start, count=0)
+            buckets.current[identifier] = bucket
+            if len(buckets.current) >= buckets.capacity:
+                buckets.rotate(now)
+        elif bucket.window_start != window_start:
+            bucket.window_start = window_start
+            bucket.count = 0
+
+        if bucket.count + cost > self.max_requests:
+            return False, max(0.0, window_start + self.window_seconds - now)
+        bucket.count += cost
         return True, 0.0
 
     def reset(self, identifier: str) -> None:
         """Clear stored hits for the identifier."""
-        self._buckets.pop(identifier, None)
+        self._buckets.current.pop(identifier, None)
+        self._buckets.previous.pop(identifier, None)
 
     def clear(self) -> None:
         """Remove all tracked identifiers."""
         self._buckets.clear()
-        self._order.clear()
 
-    def _evict(self, now: float) -> None:
-        """Remove stale or excess entries."""
-        while self._order:
-            ts, key = self._order[0]
-            bucket = self._buckets.get(key)
+    def __len__(self) -> int:
+        return len(self._buckets)
 
-            expired = bucket is None or (now - bucket.last_seen) > self.ttl_seconds
-            oversized = len(self._buckets) > self.max_entries
 
-            if not expired and not oversized:
-                break
+class GcraRateLimiter:
+    """Generic cell-rate algorithm limiter storing one float per client.
+
+    Each identifier keeps its theoretical arrival time (TAT). Requests are
+    spaced ``window_seconds / max_requests`` apart with a burst tolerance of
+    ``max_requests``, so there is no 2x burst at window boundaries and
+    ``Retry-After`` is the exact time until the next request conforms.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        *,
+        ttl_seconds: Optional[int] = None,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        # A TAT in the past is equivalent to an absent entry, so idle clients
+        # need no timer; they are simply the first dropped at capacity.
+        self.ttl_seconds = ttl_seconds or window_seconds * 2
+        self.max_entries = max(max_entries, 1)
+        self.emission_interval = window_seconds / max(max_requests, 1)
+        self._clock = clock
+        self._tat: Dict[str, float] = {}
+
+    def allow(self, identifier: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Return whether the identifier can proceed and the retry-after seconds."""
+        if self.max_requests <= 0:
+            return True, 0.0
+
+        now = self._clock()
+        tats = self._tat
+        # Popping and re-inserting keeps the dict in least-recently-seen order.
+        tat = tats.pop(identifier, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + self.emission_interval * min(cost, self.max_requests)
+        allow_at = new_tat - self.window_seconds
+        if allow_at > now:
+            tats[identifier] = tat
+            return False, allow_at - now
+
+        tats[identifier] = new_tat
+        if len(tats) > self.max_entries:
+            self._evict()
+        return True, 0.0
+
+    def reset(self, identifier: str) -> None:
+        """Clear stored state for the identifier."""
+        self._tat.pop(identifier, None)
+
+    def clear(self) -> None:
+        """Remove all tracked identifiers."""
+        self._tat.clear()
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def _evict(self) -> None:
+        """Drop the least-recently-seen tenth in one pass (amortized O(1))."""
+        tats = self._tat
+        excess = len(tats) - self.max_entries + max(self.max_entries // 10, 1)
+        for key in list(islice(tats, excess)):
+            del tats[key]
+
+
+def create_rate_limiter(
+    algorithm: str,
+    *,
+    max_requests: int,
+    window_seconds: int,
+    ttl_seconds: Optional[int] = None,
+    max_entries: int = 10_000,
+) -> FixedWindowRateLimiter | GcraRateLimiter:
+    """Build the in-memory limiter named by ``RateLimitSettings.algorithm``."""
+    if algorithm == "gcra":
+        limiter_cls = GcraRateLimiter
+    elif algorithm == "fixed_window":
+        limiter_cls = FixedWindowRateLimiter
+    else:
+        raise ValueError(f"Unknown rate limit algorithm {algorithm!r}")
+    return limiter_cls(
+        max_requests=max_requests,
+        window_seconds=window_seconds,
+        ttl_seconds=ttl_seconds,
+        max_entries=max_entries,
+    )
+
+
+class SharedMemoryRateLimiter:
+    """Limiter whose buckets live in a ``SharedMemoryTable`` for all local workers.
+
+    Slots hold ``(tat, 0)`` for GCRA and ``(window_start, count)`` for fixed
+    windows; the update runs under the slot's stripe lock, so concurrent
+    workers never lose increments.
+    """
+
+    def __init__(
+        self,
+        table: SharedMemoryTable,
+        *,
+        algorithm: str = "fixed_window",
+        max_requests: int,
+        window_seconds: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if algorithm not in ("fixed_window", "gcra"):
+            raise ValueError(f"Unknown rate limit algorithm {algorithm!r}")
+        self.table = table
+        self.algorithm = algorithm
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.emission_interval = window_seconds / max(max_requests, 1)
+        self._clock = clock
+
+    def _step(self, cost: float):
+        now = self._clock()
+        window = self.window_seconds
+        cost = min(cost, self.max_requests)
+
+        if self.algorithm == "gcra":
+            interval = self.emission_interval * cost
+
+            def step(tat: float, _: float, found: bool):
+                if not found or tat < now:
+                    tat = now
+                allow_at = tat + interval - window
+                if allow_at > now:
+                    return tat, 0.0, (False, allow_at - now)
+                return tat + interval, 0.0, (True, 0.0)
+
+        else:
+            window_start = math.floor(now / window) * window
+            limit = self.max_requests
+
+            def step(start: float, count: float, found: bool):
+                if not found or start != window_start:
+                    start, count = window_start, 0.0
+                if count + cost > limit:
+                    return start, count, (False, max(0.0, start + window - now))
+                return start, count + cost, (True, 0.0)
+
+        return step
+
+    def allow(self, identifier: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Return whether the identifier can proceed and the retry-after seconds."""
+        if self.max_requests <= 0:
+            return True, 0.0
+        return self.table.update(identifier, self._step(cost))
+
+    async def allow_async(
+        self, identifier: str, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """``allow`` without blocking the event loop on a contended stripe."""
+        if self.max_requests <= 0:
+            return True, 0.0
+        return await self.table.update_async(identifier, self._step(cost))
+
+    def reset(self, identifier: str) -> None:
+        """Clear stored hits for the identifier."""
+        self.table.delete(identifier)
+
+    def clear(self) -> None:
+        """Remove all tracked identifiers."""
+        self.table.clear()
+
+    def close(self) -> None:
+        self.table.close()
+
+
+# Both scripts read the server clock so every worker shares one time base, and
+# set a TTL so idle clients cost nothing. ARGV[3] is the request cost; it can
+# be fractional, so the GCRA TTL is rounded up because PX only takes integers.
+# Replies are ``{allowed, retry_ms}``.
+GCRA_SCRIPT = b"""
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local interval = tonumber(ARGV[1]) * tonumber(ARGV[3])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if allow_at > now then return {0, allow_at - now} end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.max(math.ceil(new_tat - now), 1))
+return {1, 0}
+"""
+
+FIXED_WINDOW_SCRIPT = b"""
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+local cost = tonumber(ARGV[3])
+if count + cost > tonumber(ARGV[1]) then
+  return {0, math.max(redis.call('PTTL', KEYS[1]), 0)}
+end
+redis.call('INCRBYFLOAT', KEYS[1], cost)
+if count == 0 then redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return {1, 0}
+"""
+
+
+class RedisRateLimiter:
+    """Limiter shared by all workers through Redis, with a local fallback.
+
+    Each decision is one ``EVALSHA`` round trip running the algorithm
+    atomically on the server. Concurrent requests are pipelined over a single
+    connection. When Redis is unreachable the in-process limiter takes over
+    for ``retry_seconds`` before the shared store is tried again.
+    """
+
+    def __init__(
+        self,
+        client: RespClient,
+        *,
+        algorithm: str = "fixed_window",
+        max_requests: int,
+        window_seconds: int,
+        key_prefix: str = "zappro:rl:",
+        retry_seconds: float = 5.0,
+        fallback: FixedWindowRateLimiter | GcraRateLimiter | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if algorithm == "gcra":
+            self._script = GCRA_SCRIPT
+            interval_ms = window_seconds * 1000 / max(max_requests, 1)
+            self._args: Tuple[int, ...] = (
+                max(round(interval_ms), 1),
+                window_seconds * 1000,
+            )
+        elif algorithm == "fixed_window":
+            self._script = FIXED_WINDOW_SCRIPT
+            self._args = (max_requests, window_seconds * 1000)
+        else:
+            raise ValueError(f"Unknown rate limit algorithm {algorithm!r}")
+        self.client = client
+        self.algorithm = algorithm
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.key_prefix = key_prefix
+        self.retry_seconds = retry_seconds
+        self.fallback = fallback or create_rate_limiter(
+            algorithm, max_requests=max_requests, window_seconds=window_seconds
+        )
+        self._clock = clock
+        self._down_until = 0.0
+        self.fallback_decisions = 0
+
+    def allow(self, identifier: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Synchronous check; only the local fallback can answer without I/O."""
+        self.fallback_decisions += 1
+        return self.fallback.allow(identifier, cost)
+
+    async def allow_async(
+        self, identifier: str, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """Return whether the identifier can proceed and the retry-after seconds."""
+        if self.max_requests <= 0:
+            return True, 0.0
+        if self._down_until and self._clock() < self._down_until:
+            return self.allow(identifier, cost)
+        try:
+            allowed, retry_ms = await self.client.evalsha(
+                self._script,
+                (self.key_prefix + identifier,),
+                (*self._args, min(cost, self.max_requests)),
+            )
+        except (OSError, ConnectionError, asyncio.TimeoutError, RespError) as exc:
+            if not self._down_until:
+                LOGGER.warning(
+                    "Redis rate limit backend unavailable (%s); using local limiter.",
+                    exc,
+                )
+            self._down_until = self._clock() + self.retry_seconds
+            return self.allow(identifier, cost)
+        if self._down_until:
+            LOGGER.info("Redis rate limit backend recovered.")
+            self._down_until = 0.0
+        return bool(allowed), retry_ms / 1000
+
+    def reset(self, identifier: str) -> None:
+        """Clear local fallback state; shared keys expire on their own."""
+        self.fallback.reset(identifier)
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
 
-            self._order.popleft()
-            if bucket is None:
+class RouteTable(Generic[V]):
+    """Map ``(method, path)`` to a per-route value.
+
+    Rules are ``"METHOD /prefix"`` or ``"/prefix"`` and match whole path
+    segments; the longest prefix wins and a method-specific rule beats a
+    method-less one of the same length. Unmatched routes get ``default``.
+    """
+
+    def __init__(
+        self,
+        rules: Mapping[str, V],
+        *,
+        default: V,
+        cache_size: int = 2048,
+    ) -> None:
+        compiled: List[Tuple[int, bool, str, Optional[str], V]] = []
+        for rule, value in rules.items():
+            method, _, prefix = rule.strip().rpartition(" ")
+            prefix = prefix.rstrip("/") or "/"
+            method_key = method.strip().upper() or None
+            compiled.append(
+                (len(prefix), method_key is not None, prefix, method_key, value)
+            )
+        compiled.sort(key=lambda item: item[:3], reverse=True)
+        self._rules = [
+            (method, prefix, value) for _, _, prefix, method, value in compiled
+        ]
+        self.default = default
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, method: str, path: str) -> V:
+        for rule_method, prefix, value in self._rules:
+            if rule_method is not None and rule_method != method:
                 continue
-            if expired or oversized:
-                self._buckets.pop(key, None)
+            if (
+                prefix == "/"
+                or path == prefix
+                or (path.startswith(prefix) and path[len(prefix)] == "/")
+            ):
+                return value
+        return self.default
+
+
+class RouteCostTable(RouteTable[float]):
+    """Map ``(method, path)`` to the rate-limit units a request consumes.
+
+    Uses ``RouteTable`` rules; unmatched routes cost ``default_cost`` and a
+    cost of 0 exempts the route.
+    """
+
+    def __init__(
+        self,
+        rules: Mapping[str, float],
+        *,
+        default_cost: float = 1.0,
+        cache_size: int = 2048,
+    ) -> None:
+        super().__init__(
+            {rule: float(cost) for rule, cost in rules.items()},
+            default=default_cost,
+            cache_size=cache_size,
+        )
+        self.default_cost = default_cost
+        self.cost = self.lookup
+
+
+class RateLimitHitters:
+    """Heaviest rejected client IPs, principals and routes in constant memory.
+
+    Each dimension is a ``SpaceSaving`` sketch of ``capacity`` keys. Warning
+    logs are sampled to one per ``log_interval_seconds`` so an incident does
+    not flood the security log; the sketches keep the full picture.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        *,
+        log_interval_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.clients = SpaceSaving(capacity)
+        self.principals = SpaceSaving(capacity)
+        self.routes = SpaceSaving(capacity)
+        self.log_interval_seconds = log_interval_seconds
+        self._clock = clock
+        self._next_log_at = 0.0
+        self._suppressed = 0
+
+    def record(self, client_ip: str, principal: Optional[str], route: str) -> None:
+        self.clients.add(client_ip)
+        if principal:
+            self.principals.add(principal)
+        self.routes.add(route)
+
+    def log_due(self) -> Optional[int]:
+        """Return the rejections suppressed since the last log, or None to skip."""
+        now = self._clock()
+        if now < self._next_log_at:
+            self._suppressed += 1
+            return None
+        suppressed, self._suppressed = self._suppressed, 0
+        self._next_log_at = now + self.log_interval_seconds
+        return suppressed
+
+    def snapshot(self, k: int = 10) -> Dict[str, Any]:
+        def rows(sketch: SpaceSaving) -> List[Dict[str, Any]]:
+            return [
+                {"key": key, "count": count, "error": error}
+                for key, count, error in sketch.top(k)
+            ]
+
+        return {
+            "rejected_total": self.routes.total,
+            "clients": rows(self.clients),
+            "principals": rows(self.principals),
+            "routes": rows(self.routes),
+        }
+
+    def clear(self) -> None:
+        self.clients.clear()
+        self.principals.clear()
+        self.routes.clear()
 
 
 class RequestIdTracker:
     """Track request IDs to spot collisions."""
 
-    def __init__(self, ttl_seconds: int = 300, max_entries: int = 20_000) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_entries: int = 20_000,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self.ttl_seconds = max(ttl_seconds, 1)
         self.max_entries = max(max_entries, 1)
-        self._seen: Dict[str, float] = {}
-        self._order: Deque[Tuple[float, str]] = deque()
+        self._clock = clock
+        self._seen = _Generations(self.ttl_seconds, self.max_entries, clock())
 
     def register(self, request_id: str) -> bool:
         """Register a request id and return True if it has been observed recently."""
-        now = time.monotonic()
-        duplicate = request_id in self._seen
+        now = self._clock()
+        seen = self._seen
+        if now >= seen.rotate_at:
+            seen.rotate(now)
+        seen_at = seen.current.get(request_id)
+        if seen_at is None:
+            seen_at = seen.previous.get(request_id)
+        seen.current[request_id] = now
+        if len(seen.current) >= seen.capacity:
+            seen.rotate(now)
+        return seen_at is not None and now - seen_at <= self.ttl_seconds
 
-        self._seen[request_id] = now
-        self._order.append((now, request_id))
-        self._evict(now)
+    def __len__(self) -> int:
+        return len(self._seen)
 
-        return duplicate
+    def stats(self) -> Dict[str, float]:
+        return {"entries": len(self._seen)}
 
-    def _evict(self, now: float) -> None:
-        while self._order:
-            ts, rid = self._order[0]
-            if len(self._seen) <= self.max_entries and (now - ts) <= self.ttl_seconds:
-                break
-            self._order.popleft()
-            latest = self._seen.get(rid)
-            if latest is None:
+
+class BloomRequestIdTracker:
+    """Approximate ``RequestIdTracker`` on rotating Bloom filters.
+
+    Memory is fixed by ``max_entries`` and ``fp_rate`` (about 1.8 bytes per
+    entry at 0.1%) instead of a dict entry per ID. IDs are remembered for one
+    to two ``ttl_seconds``; a false positive only costs a spurious warning.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_entries: int = 20_000,
+        *,
+        fp_rate: float = 0.001,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = max(ttl_seconds, 1)
+        self.max_entries = max(max_entries, 1)
+        self._filter = RotatingBloomFilter(
+            self.max_entries, fp_rate, period=self.ttl_seconds, clock=clock
+        )
+
+    def register(self, request_id: str) -> bool:
+        """Register a request id and return True if it has (probably) been seen."""
+        return self._filter.add_if_absent(request_id)
+
+    def __len__(self) -> int:
+        return self._filter.count
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": self._filter.count,
+            "memory_bytes": self._filter.memory_bytes,
+            "fp_rate": self._filter.estimated_fp_rate(),
+        }
+
+
+class SharedRequestIdTracker:
+    """``RequestIdTracker`` backed by a ``SharedMemoryTable`` for all local workers."""
+
+    def __init__(
+        self,
+        table: SharedMemoryTable,
+        ttl_seconds: int = 300,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.table = table
+        self.ttl_seconds = max(ttl_seconds, 1)
+        self._clock = clock
+
+    def _step(self):
+        now = self._clock()
+        horizon = now - self.ttl_seconds
+
+        def step(seen_at: float, _: float, found: bool):
+            return now, 0.0, found and seen_at >= horizon
+
+        return step
+
+    def register(self, request_id: str) -> bool:
+        """Register a request id and return True if it has been observed recently."""
+        return self.table.update(request_id, self._step())
+
+    async def register_async(self, request_id: str) -> bool:
+        """``register`` without blocking the event loop on a contended stripe."""
+        return await self.table.update_async(request_id, self._step())
+
+    def stats(self) -> Dict[str, float]:
+        return {"memory_bytes": self.table.memory_bytes()}
+
+    def close(self) -> None:
+        self.table.close()
+
+
+class _Failures:
+    __slots__ = ("counts", "last_failure")
+
+    def __init__(self, width: int, depth: int) -> None:
+        self.counts = CountMinSketch(width, depth)
+        self.last_failure = CountMinSketch(width, depth, track_max=True)
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self.last_failure.clear()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.counts.memory_bytes + self.last_failure.memory_bytes
+
+
+class _FailureGeneration:
+    __slots__ = ("email", "ip")
+
+    def __init__(self, email_width: int, ip_width: int, depth: int) -> None:
+        self.email = _Failures(email_width, depth)
+        self.ip = _Failures(ip_width, depth)
+
+    def clear(self) -> None:
+        self.email.clear()
+        self.ip.clear()
+
+
+def login_sketch_width(expected_failures: int, free_attempts: int) -> int:
+    """Columns keeping a key with no failures under ``free_attempts``.
+
+    A count-min estimate overcounts by at most ``e / width`` of the stream, so
+    with ``expected_failures`` per generation the width below keeps that
+    bound one short of the free attempts.
+    """
+    tolerance = max(free_attempts - 1, 1)
+    return max(math.ceil(math.e * max(expected_failures, 1) / tolerance), 64)
+
+
+class LoginThrottle:
+    """Exponential backoff for failed logins, keyed by email and client IP.
+
+    Failures live in count-min sketches (two generations of ``window_seconds``)
+    so memory is fixed no matter how many distinct emails an attacker tries.
+    Emails and IPs have separate sketches, each sized from
+    ``expected_failures`` per window so that sprayed failures do not push an
+    innocent key over its free attempts. A successful login discounts the
+    email's failures recorded so far; the IP keeps its count.
+    """
+
+    def __init__(
+        self,
+        *,
+        email_free_attempts: int = 5,
+        ip_free_attempts: int = 50,
+        base_delay_seconds: float = 1.0,
+        max_delay_seconds: float = 900.0,
+        window_seconds: float = 900.0,
+        expected_failures: int = 100_000,
+        sketch_width: Optional[int] = None,
+        sketch_depth: int = 4,
+        max_successes: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.email_free_attempts = max(email_free_attempts, 1)
+        self.ip_free_attempts = max(ip_free_attempts, 1)
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.window_seconds = window_seconds
+        self.max_successes = max(max_successes, 0)
+        email_width = sketch_width or login_sketch_width(
+            expected_failures, self.email_free_attempts
+        )
+        ip_width = sketch_width or login_sketch_width(
+            expected_failures, self.ip_free_attempts
+        )
+        self._clock = clock
+        self._current = _FailureGeneration(email_width, ip_width, sketch_depth)
+        self._previous = _FailureGeneration(email_width, ip_width, sketch_depth)
+        self._rotated_at = clock()
+        self._generation = 0
+        # email key -> (generation, current and previous failure estimates at
+        # the last successful login)
+        self._successes: OrderedDict[str, Tuple[int, float, float]] = OrderedDict()
+        self.rejected = 0
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self._rotated_at
+        if elapsed < self.window_seconds:
+            return
+        self._previous, self._current = self._current, self._previous
+        self._current.clear()
+        self._generation += 1
+        if elapsed >= 2 * self.window_seconds:
+            self._previous.clear()
+            self._generation += 1
+        self._rotated_at = now
+
+    def _forgiven(self, key: str) -> Tuple[float, float]:
+        """Failures to discount from (current, previous) after a success."""
+        success = self._successes.get(key)
+        if success is None:
+            return 0.0, 0.0
+        generation, current, previous = success
+        if generation == self._generation:
+            return current, previous
+        if generation == self._generation - 1:
+            return 0.0, current
+        del self._successes[key]
+        return 0.0, 0.0
+
+    def _delay(self, kind: str, key: str, free_attempts: int, now: float) -> float:
+        current = getattr(self._current, kind)
+        previous = getattr(self._previous, kind)
+        forgiven_current, forgiven_previous = self._forgiven(key)
+        failures = max(current.counts.estimate(key) - forgiven_current, 0.0) + max(
+            previous.counts.estimate(key) - forgiven_previous, 0.0
+        )
+        if failures < free_attempts:
+            return 0.0
+        # Cap the exponent; a sprayed IP can reach millions of failures.
+        exponent = min(failures - free_attempts, 64)
+        backoff = min(self.max_delay_seconds, self.base_delay_seconds * 2**exponent)
+        last_failure = max(
+            current.last_failure.estimate(key), previous.last_failure.estimate(key)
+        )
+        return max(0.0, last_failure + backoff - now)
+
+    @staticmethod
+    def _keys(email: str, client_ip: str) -> Tuple[str, str]:
+        return f"e:{email.strip().lower()}", f"i:{client_ip}"
+
+    def check(self, email: str, client_ip: str) -> Tuple[bool, float]:
+        """Return whether a login attempt may run and the retry-after seconds."""
+        now = self._clock()
+        self._rotate(now)
+        email_key, ip_key = self._keys(email, client_ip)
+        retry_after = max(
+            self._delay("email", email_key, self.email_free_attempts, now),
+            self._delay("ip", ip_key, self.ip_free_attempts, now),
+        )
+        if retry_after > 0:
+            self.rejected += 1
+            return False, retry_after
+        return True, 0.0
+
+    def record_failure(self, email: str, client_ip: str) -> None:
+        now = self._clock()
+        self._rotate(now)
+        email_key, ip_key = self._keys(email, client_ip)
+        for failures, key in (
+            (self._current.email, email_key),
+            (self._current.ip, ip_key),
+        ):
+            failures.counts.add(key)
+            failures.last_failure.add(key, now)
+
+    def record_success(self, email: str, client_ip: str) -> None:
+        """Forgive the email's failures so far; later failures count again."""
+        if not self.max_successes:
+            return
+        self._rotate(self._clock())
+        email_key, _ = self._keys(email, client_ip)
+        self._successes.pop(email_key, None)
+        self._successes[email_key] = (
+            self._generation,
+            self._current.email.counts.estimate(email_key),
+            self._previous.email.counts.estimate(email_key),
+        )
+        while len(self._successes) > self.max_successes:
+            self._successes.popitem(last=False)
+
+    def clear(self) -> None:
+        self._current.clear()
+        self._previous.clear()
+        self._successes.clear()
+        self._rotated_at = self._clock()
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(
+            generation.email.memory_bytes + generation.ip.memory_bytes
+            for generation in (self._current, self._previous)
+        )
+
+
+class TrustedProxyMatcher:
+    """Trusted-proxy CIDRs compiled into sorted, merged integer ranges.
+
+    Membership is a ``bisect`` over the ranges of the address family, and
+    decisions for recently seen hosts are memoized in a small LRU, so long
+    CIDR lists cost nothing per request. Invalid entries are logged once,
+    at compile time.
+    """
+
+    def __init__(self, entries: List[str], *, cache_size: int = 4096) -> None:
+        ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = ip_network(entry.strip(), strict=False)
+            except ValueError:
+                LOGGER.warning("Invalid trusted proxy entry configured: %s", entry)
                 continue
-            if (now - latest) > self.ttl_seconds or len(self._seen) > self.max_entries:
-                self._seen.pop(rid, None)
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, spans in ranges.items():
+            merged: List[List[int]] = []
+            for start, end in sorted(spans):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+        self.empty = not any(self._starts.values())
+        self.is_trusted = lru_cache(maxsize=cache_size)(self._is_trusted)
+
+    def _is_trusted(self, host: str) -> bool:
+        try:
+            address = ip_address(host)
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        value = int(address)
+        starts = self._starts[address.version]
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= self._ends[address.version][index]
+
+    def __contains__(self, host: str) -> bool:
+        return self.is_trusted(host)
+
+
+@lru_cache(maxsize=8)
+def _compile_trusted_proxies(entries: Tuple[str, ...]) -> TrustedProxyMatcher:
+    return TrustedProxyMatcher(list(entries))
+
+
+def _split_unquoted(value: str, separator: str) -> List[str]:
+    """Split on ``separator`` outside double-quoted strings."""
+    if '"' not in value:
+        return value.split(separator)
+    parts, current, quoted = [], [], False
+    for char in value:
+        if char == '"':
+            quoted = not quoted
+        elif char == separator and not quoted:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _parse_node(node: str) -> str:
+    """Normalize a hop: strip quotes, brackets and ports (RFC 7239 section 6)."""
+    node = node.strip().strip('"')
+    if node.startswith("["):
+        return node[1 : node.find("]")] if "]" in node else node[1:]
+    if node.count(":") == 1:
+        return node.split(":", 1)[0]
+    return node
+
+
+def parse_forwarded_for(header_value: str) -> List[str]:
+    """Return the ``for=`` nodes of an RFC 7239 ``Forwarded`` header in order."""
+    hops: List[str] = []
+    for element in _split_unquoted(header_value, ","):
+        for pair in _split_unquoted(element, ";"):
+            key, _, value = pair.partition("=")
+            if key.strip().lower() == "for" and value:
+                hops.append(_parse_node(value))
+                break
+    return hops
 
 
 def resolve_client_ip(
     client_host: Optional[str],
-    headers: Dict[str, str],
+    headers: Mapping[str, str],
     *,
-    trusted_proxies: List[str],
+    trusted_proxies: TrustedProxyMatcher | List[str],
     client_ip_header: str,
 ) -> str:
-    """Return normalized client IP considering trusted proxies."""
+    """Return normalized client IP considering trusted proxies.
+
+    Only a trusted peer's forwarding header is honoured, and its hops are
+    walked right to left: the first hop that is not itself a trusted proxy
+    is the client, so addresses prepended by the client cannot spoof it.
+    ``client_ip_header="forwarded"`` parses RFC 7239; anything else is read
+    as an ``X-Forwarded-For`` style comma-separated list.
+    """
     candidate = client_host or "anonymous"
-    if not trusted_proxies:
+    matcher = (
+        trusted_proxies
+        if isinstance(trusted_proxies, TrustedProxyMatcher)
+        else _compile_trusted_proxies(tuple(trusted_proxies))
+    )
+    if matcher.empty or not matcher.is_trusted(candidate):
         return candidate
 
-    try:
-        remote_ip = ip_address(candidate)
-    except ValueError:
+    header_value = headers.get(client_ip_header.lower())
+    if not header_value:
         return candidate
+    if client_ip_header.lower() == "forwarded":
+        hops = parse_forwarded_for(header_value)
+    else:
+        hops = [_parse_node(part) for part in header_value.split(",")]
 
-    for proxy_entry in trusted_proxies:
-        try:
-            network = ip_network(proxy_entry, strict=False)
-        except ValueError:
-            LOGGER.warning("Invalid trusted proxy entry configured: %s", proxy_entry)
+    for hop in reversed(hops):
+        if not hop:
             continue
-        if remote_ip in network:
-            header_value = headers.get(client_ip_header.lower())
-            if not header_value:
-                continue
-            forwarded = _extract_first_forwarded_ip(header_value)
-            if forwarded:
-                return forwarded
+        if hop.lower() == "unknown":
+            break
+        if not matcher.is_trusted(hop):
+            return hop
+        candidate = hop
     return candidate
-
-
-def _extract_first_forwarded_ip(header_value: str) -> Optional[str]:
-    for part in header_value.split(","):
-        candidate = part.strip()
-        if candidate:
-            return candidate
-    return None
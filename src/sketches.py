@@ -0,0 +1,280 @@
+"""Fixed-memory probabilistic data structures used by the security layer."""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import time
+from array import array
+from typing import Callable, Dict, List, Tuple
+
+
+def _hash_pair(item: bytes) -> Tuple[int, int]:
+    digest = hashlib.blake2b(item, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return h1, h2
+
+
+def _as_bytes(item: str | bytes) -> bytes:
+    return item if isinstance(item, bytes) else item.encode("utf-8")
+
+
+class BloomFilter:
+    """Classic Bloom filter sized from a capacity and a target false-positive rate."""
+
+    def __init__(self, capacity: int, fp_rate: float = 0.001) -> None:
+        if capacity <= 0:
+            raise ValueError("Bloom filter capacity must be positive")
+        if not 0 < fp_rate < 1:
+            raise ValueError("Bloom filter fp_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        # Kept up to date by add() so the fill ratio is O(1) for /health.
+        self.set_bits = 0
+        self.count = 0
+
+    def _positions(self, item: str | bytes) -> List[int]:
+        h1, h2 = _hash_pair(_as_bytes(item))
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str | bytes) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                self.set_bits += 1
+        self.count += 1
+
+    def __contains__(self, item: str | bytes) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self.set_bits = 0
+        self.count = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def fill_ratio(self) -> float:
+        return self.set_bits / self.num_bits
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive probability implied by the current fill ratio."""
+        return self.fill_ratio() ** self.num_hashes
+
+
+class RotatingBloomFilter:
+    """Ring of Bloom filters that forgets items after roughly ``generations * period``.
+
+    New items go to the newest generation; lookups check all of them. A
+    generation is retired when ``period`` seconds pass or it reaches its share
+    of ``capacity``, so memory stays fixed no matter how many items arrive.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        fp_rate: float = 0.001,
+        *,
+        generations: int = 2,
+        period: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.generations = max(generations, 2)
+        self.period = period
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._clock = clock
+        per_generation = max(1, math.ceil(capacity / (self.generations - 1)))
+        # Lookups query every generation, so split the error budget between them.
+        self._generation_fp = fp_rate / self.generations
+        self._per_generation = per_generation
+        self._filters = [
+            BloomFilter(per_generation, self._generation_fp)
+            for _ in range(self.generations)
+        ]
+        self._rotated_at = clock()
+        self.rotations = 0
+
+    def _maybe_rotate(self) -> None:
+        now = self._clock()
+        elapsed = now - self._rotated_at
+        if elapsed >= self.period:
+            # Catch up on every period that passed while idle.
+            steps = min(int(elapsed // self.period), self.generations)
+        elif self._filters[0].count >= self._per_generation:
+            steps = 1
+        else:
+            return
+        for _ in range(steps):
+            oldest = self._filters.pop()
+            oldest.clear()
+            self._filters.insert(0, oldest)
+        self._rotated_at = now
+        self.rotations += steps
+
+    def add(self, item: str | bytes) -> None:
+        self._maybe_rotate()
+        self._filters[0].add(item)
+
+    def __contains__(self, item: str | bytes) -> bool:
+        self._maybe_rotate()
+        # Every generation shares the same geometry, so hash once.
+        positions = self._filters[0]._positions(item)
+        for bloom in self._filters:
+            bits = bloom._bits
+            if all(bits[p >> 3] & (1 << (p & 7)) for p in positions):
+                return True
+        return False
+
+    def add_if_absent(self, item: str | bytes) -> bool:
+        """Insert ``item`` and return True if it was (probably) already present."""
+        present = item in self
+        if not present:
+            self._filters[0].add(item)
+        return present
+
+    def clear(self) -> None:
+        for bloom in self._filters:
+            bloom.clear()
+        self._rotated_at = self._clock()
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(bloom.memory_bytes for bloom in self._filters)
+
+    @property
+    def count(self) -> int:
+        return sum(bloom.count for bloom in self._filters)
+
+    def estimated_fp_rate(self) -> float:
+        """Probability that an unseen item matches at least one generation."""
+        miss = 1.0
+        for bloom in self._filters:
+            miss *= 1.0 - bloom.estimated_fp_rate()
+        return 1.0 - miss
+
+
+class CountMinSketch:
+    """Count-min sketch with conservative update.
+
+    Estimates never undercount; with ``width`` columns the overcount is at most
+    ``e / width`` of the total stream with probability ``1 - exp(-depth)``.
+    ``track_max`` switches the cells to keep the largest value seen instead of
+    a sum, which gives an upper bound on e.g. a key's last-seen timestamp.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, *, track_max: bool = False):
+        if width <= 0 or depth <= 0:
+            raise ValueError("Sketch width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.track_max = track_max
+        self._rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+
+    def _columns(self, item: str | bytes) -> List[int]:
+        h1, h2 = _hash_pair(_as_bytes(item))
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, item: str | bytes, value: float = 1.0) -> float:
+        """Record ``value`` for ``item`` and return the new estimate."""
+        columns = self._columns(item)
+        rows = self._rows
+        if self.track_max:
+            for row, column in zip(rows, columns):
+                if row[column] < value:
+                    row[column] = value
+            return self.estimate_columns(columns)
+        target = self.estimate_columns(columns) + value
+        for row, column in zip(rows, columns):
+            if row[column] < target:
+                row[column] = target
+        return target
+
+    def estimate_columns(self, columns: List[int]) -> float:
+        return min(row[column] for row, column in zip(self._rows, columns))
+
+    def estimate(self, item: str | bytes) -> float:
+        return self.estimate_columns(self._columns(item))
+
+    def clear(self) -> None:
+        for row in self._rows:
+            row[:] = array("d", bytes(8 * self.width))
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class SpaceSaving:
+    """Space-saving top-k sketch (Metwally et al.) over at most ``capacity`` keys.
+
+    A new key evicts the current minimum and inherits its count as the error
+    bound, so every reported count overestimates by at most ``error`` and any
+    key with true frequency above ``total / capacity`` is guaranteed present.
+    Each key has one heap entry holding a lower bound of its count; stale
+    entries are refreshed only when they surface, so eviction is O(log k).
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        if capacity <= 0:
+            raise ValueError("Sketch capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, List[int]] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, weight: int = 1) -> None:
+        self.total += weight
+        entry = self._counts.get(key)
+        if entry is not None:
+            entry[0] += weight
+            return
+        error = 0
+        if len(self._counts) >= self.capacity:
+            error = self._pop_min()
+        self._counts[key] = [error + weight, error]
+        heapq.heappush(self._heap, (error + weight, key))
+
+    def _pop_min(self) -> int:
+        heap, counts = self._heap, self._counts
+        while True:
+            count, key = heapq.heappop(heap)
+            entry = counts[key]
+            if entry[0] != count:
+                # Stale: the key grew since this heap entry was pushed.
+                heapq.heappush(heap, (entry[0], key))
+                continue
+            del counts[key]
+            return count
+
+    def top(self, k: int | None = None) -> List[Tuple[str, int, int]]:
+        """Return ``(key, count, error)`` for the heaviest keys, largest first."""
+        ranked = sorted(
+            ((key, count, error) for key, (count, error) in self._counts.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked if k is None else ranked[:k]
+
+    def clear(self) -> None:
+        self.total = 0
+        self._counts.clear()
+        self._heap.clear()
+
+    def __len__(self) -> int:
+        return len(self._counts)
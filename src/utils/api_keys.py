@@ -0,0 +1,146 @@
+"""API key format, HMAC digests and a short-lived verified-key cache."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Tuple
+
+LOGGER = logging.getLogger("zappro.auth")
+
+API_KEY_PREFIX = "zpk_"
+API_KEY_SCOPES = frozenset({"read", "write"})
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("ZAPPRO_API_KEY_CACHE_TTL_SECONDS", "30"))
+_PREFIX_BYTES = 6
+_SECRET_BYTES = 32
+
+
+@lru_cache(maxsize=1)
+def _hmac_key() -> bytes:
+    configured = os.getenv("ZAPPRO_API_KEY_SECRET")
+    if configured:
+        return configured.encode("utf-8")
+    LOGGER.warning(
+        "ZAPPRO_API_KEY_SECRET not configured; generating an ephemeral secret for "
+        "local development. API keys will stop working after a restart."
+    )
+    return secrets.token_bytes(32)
+
+
+def is_api_key(token: str) -> bool:
+    return token.startswith(API_KEY_PREFIX)
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """Return ``(plaintext_key, prefix)``; only the prefix and digest are stored."""
+    prefix = secrets.token_hex(_PREFIX_BYTES)
+    secret = secrets.token_urlsafe(_SECRET_BYTES)
+    return f"{API_KEY_PREFIX}{prefix}_{secret}", prefix
+
+
+def parse_prefix(token: str) -> str | None:
+    if not is_api_key(token):
+        return None
+    prefix, _, secret = token[len(API_KEY_PREFIX) :].partition("_")
+    if len(prefix) != 2 * _PREFIX_BYTES or not secret:
+        return None
+    return prefix
+
+
+def digest(token: str) -> str:
+    return hmac.new(_hmac_key(), token.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def digests_match(token: str, stored_digest: str) -> bool:
+    return hmac.compare_digest(digest(token), stored_digest)
+
+
+def parse_scopes(value: str) -> FrozenSet[str]:
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
+
+
+@dataclass(frozen=True)
+class VerifiedApiKey:
+    key_id: int
+    user_id: int
+    email: str
+    role: str
+    scopes: FrozenSet[str]
+
+
+class ApiKeyCache:
+    """Remember verified keys briefly so hot integrations skip the lookup.
+
+    Revocations made by this process evict immediately; other workers stop
+    accepting a revoked key within ``ttl_seconds``.
+    """
+
+    def __init__(
+        self, ttl_seconds: float = API_KEY_CACHE_TTL_SECONDS, max_entries: int = 4096
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[float, str, VerifiedApiKey]] = {}
+
+    def get(self, token: str) -> VerifiedApiKey | None:
+        prefix = parse_prefix(token)
+        entry = self._entries.get(prefix) if prefix else None
+        if entry is None:
+            self.misses += 1
+            return None
+        cached_at, stored_digest, verified = entry
+        if time.monotonic() - cached_at > self.ttl_seconds or not digests_match(
+            token, stored_digest
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return verified
+
+    def peek(self, token: str) -> VerifiedApiKey | None:
+        """Like ``get`` but without counting a hit or miss."""
+        prefix = parse_prefix(token)
+        entry = self._entries.get(prefix) if prefix else None
+        if entry is None:
+            return None
+        cached_at, stored_digest, verified = entry
+        if time.monotonic() - cached_at > self.ttl_seconds or not digests_match(
+            token, stored_digest
+        ):
+            return None
+        return verified
+
+    def put(self, prefix: str, stored_digest: str, verified: VerifiedApiKey) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[prefix] = (time.monotonic(), stored_digest, verified)
+
+    def invalidate(self, prefix: str) -> None:
+        self._entries.pop(prefix, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+api_key_cache = ApiKeyCache()
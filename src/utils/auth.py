@@ -1,37 +1,130 @@
-"""Authentication helpers with async-friendly JWT (RS256) and PBKDF2 hashing."""
+"""Authentication helpers with async-friendly JWT (RS256/ES256/EdDSA) and PBKDF2."""
 
 from __future__ import annotations
 
-import asyncio
 import base64
 import binascii
 import hashlib
-import hmac
 import json
 import logging
 import os
+import re
 import secrets
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, FrozenSet, NamedTuple, Tuple
 
 from cryptography.exceptions import InvalidSignature
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from fastapi import Depends, HTTPException
+from cryptography.hazmat.primitives import serialization
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
+from src.crud import api_key as api_key_crud
 from src.database import get_db
-from src.models.user import User
+from src.models.user import User, UserRole
+from src.utils import api_keys
+from src.utils import keys as jwt_keys
+from src.utils import passwords
+from src.utils.executors import (
+    BoundedExecutor,
+    ExecutorSaturated,
+    configure_executor,
+    get_executor,
+)
+from src.utils.revocation import RefreshTokenRevocationStore
 
 LOGGER = logging.getLogger("zappro.auth")
 
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ZAPPRO_JWT_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
-TOKEN_ALG = "RS256"
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("ZAPPRO_JWT_CACHE_MAX_ENTRIES", "4096"))
+STATELESS_PRINCIPAL = os.getenv(
+    "ZAPPRO_AUTH_STATELESS_PRINCIPAL", "false"
+).strip().lower() in {"1", "true", "yes", "on"}
+PRINCIPAL_VERSION_TTL_SECONDS = float(
+    os.getenv("ZAPPRO_PRINCIPAL_VERSION_TTL_SECONDS", "30")
+)
+TOKEN_ALG = jwt_keys.normalize_algorithm(os.getenv("ZAPPRO_JWT_ALG", "RS256"))
 security = HTTPBearer(auto_error=False)
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_PEM_BLOCK = re.compile(rb"-----BEGIN [A-Z ]+-----.+?-----END [A-Z ]+-----", re.DOTALL)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified tokens, each kept until its ``exp``.
+
+    Entries are keyed by a SHA-256 digest of the raw token so the cache never
+    holds bearer credentials; a hit skips the signature check, base64 decoding
+    and JSON parsing entirely.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max(max_entries, 0)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Dict[str, Any] | None:
+        """Return a copy of the cached payload, or ``None`` on a miss."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        exp_ts, payload = entry
+        if time.time() > exp_ts:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(payload)
+
+    def peek(self, token: str) -> Dict[str, Any] | None:
+        """Return the cached payload without touching LRU order or hit stats."""
+        entry = self._entries.get(self._key(token))
+        if entry is None or time.time() > entry[0]:
+            return None
+        return entry[1]
+
+    def put(self, token: str, payload: Dict[str, Any], exp_ts: int) -> None:
+        if self.max_entries == 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (exp_ts, dict(payload))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+token_cache = VerifiedTokenCache()
+refresh_revocations = RefreshTokenRevocationStore(
+    retention_seconds=REFRESH_TOKEN_EXPIRE_DAYS * 86400
+)
 
 
 def _normalize_pem(value: str) -> bytes:
@@ -52,12 +145,13 @@ def _read_pem_from_path(path_value: str | None) -> bytes | None:
     return None
 
 
-def _generate_dev_key_pair() -> tuple[bytes, bytes]:
+def _generate_dev_key_pair(algorithm: str) -> tuple[bytes, bytes]:
     LOGGER.warning(
-        "ZAPPRO_JWT_PRIVATE_KEY not configured; generating ephemeral RSA key pair "
-        "for local development."
+        "ZAPPRO_JWT_PRIVATE_KEY not configured; generating ephemeral %s key pair "
+        "for local development.",
+        algorithm,
     )
-    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_key = jwt_keys.generate_private_key(algorithm)
     private_pem = private_key.private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
@@ -72,7 +166,7 @@ def _generate_dev_key_pair() -> tuple[bytes, bytes]:
 
 @lru_cache(maxsize=1)
 def _dev_key_pair() -> tuple[bytes, bytes]:
-    return _generate_dev_key_pair()
+    return _generate_dev_key_pair(TOKEN_ALG)
 
 
 def _load_private_pem() -> bytes:
@@ -85,24 +179,96 @@ def _load_private_pem() -> bytes:
     return _dev_key_pair()[0]
 
 
-def _load_public_pem() -> bytes:
+def _split_pem_blocks(data: bytes) -> list[bytes]:
+    return [match.group(0) for match in _PEM_BLOCK.finditer(data)]
+
+
+def _load_public_pem() -> list[bytes]:
+    """Return every configured verification key, primary first.
+
+    ``ZAPPRO_JWT_PUBLIC_KEY(_PATH)`` holds the current key while
+    ``ZAPPRO_JWT_PREVIOUS_PUBLIC_KEYS(_PATH)`` may list several concatenated PEM
+    blocks for keys being rotated out. The public half of the signing key is
+    always trusted, so only rotated keys need configuring.
+    """
+    pems: list[bytes] = []
     env_value = os.getenv("ZAPPRO_JWT_PUBLIC_KEY")
     if env_value:
-        return _normalize_pem(env_value)
-    file_bytes = _read_pem_from_path(os.getenv("ZAPPRO_JWT_PUBLIC_KEY_PATH"))
-    if file_bytes:
-        return file_bytes
-    return _dev_key_pair()[1]
+        pems.append(_normalize_pem(env_value))
+    else:
+        file_bytes = _read_pem_from_path(os.getenv("ZAPPRO_JWT_PUBLIC_KEY_PATH"))
+        if file_bytes:
+            pems.append(file_bytes)
+
+    previous = os.getenv("ZAPPRO_JWT_PREVIOUS_PUBLIC_KEYS")
+    if previous:
+        pems.extend(_split_pem_blocks(_normalize_pem(previous)))
+    previous_file = _read_pem_from_path(
+        os.getenv("ZAPPRO_JWT_PREVIOUS_PUBLIC_KEYS_PATH")
+    )
+    if previous_file:
+        pems.extend(_split_pem_blocks(previous_file))
+    return pems
 
 
-@lru_cache(maxsize=1)
-def _private_key() -> rsa.RSAPrivateKey:
-    return serialization.load_pem_private_key(_load_private_pem(), password=None)
+class _KeyRing:
+    """Signing key plus every accepted verification key indexed by ``kid``."""
+
+    def __init__(
+        self,
+        signing_key: jwt_keys.PrivateKey,
+        verification_keys: Dict[str, jwt_keys.VerificationKey],
+    ) -> None:
+        self.signing_key = signing_key
+        self.algorithm = jwt_keys.algorithm_for_key(signing_key)
+        self.kid = jwt_keys.key_id(signing_key.public_key())
+        self.verification_keys = verification_keys
+
+    def verification_key(self, kid: str | None) -> jwt_keys.VerificationKey | None:
+        # Tokens minted before key IDs existed carry no ``kid``; they can only
+        # have been signed by the current key.
+        return self.verification_keys.get(kid or self.kid)
+
+    def jwks(self) -> Dict[str, Any]:
+        return {"keys": [key.jwk() for key in self.verification_keys.values()]}
 
 
 @lru_cache(maxsize=1)
-def _public_key() -> rsa.RSAPublicKey:
-    return serialization.load_pem_public_key(_load_public_pem())
+def _key_ring() -> _KeyRing:
+    signing_key = serialization.load_pem_private_key(_load_private_pem(), password=None)
+    algorithm = jwt_keys.algorithm_for_key(signing_key)
+    if algorithm != TOKEN_ALG:
+        LOGGER.warning(
+            "ZAPPRO_JWT_ALG=%s does not match the configured private key; signing "
+            "with %s",
+            TOKEN_ALG,
+            algorithm,
+        )
+
+    verification_keys: Dict[str, jwt_keys.VerificationKey] = {}
+    candidates = [signing_key.public_key()]
+    for pem in _load_public_pem():
+        try:
+            candidates.append(serialization.load_pem_public_key(pem))
+        except ValueError:
+            LOGGER.warning("Ignoring unreadable JWT public key entry")
+    for public_key in candidates:
+        try:
+            entry = jwt_keys.VerificationKey(
+                kid=jwt_keys.key_id(public_key),
+                algorithm=jwt_keys.algorithm_for_key(public_key),
+                key=public_key,
+            )
+        except ValueError as exc:
+            LOGGER.warning("Ignoring unsupported JWT public key: %s", exc)
+            continue
+        verification_keys.setdefault(entry.kid, entry)
+    return _KeyRing(signing_key, verification_keys)
+
+
+def jwks() -> Dict[str, Any]:
+    """Public JSON Web Key Set for every key accepted by ``_decode_token``."""
+    return _key_ring().jwks()
 
 
 def _b64url(data: bytes) -> str:
@@ -120,15 +286,13 @@ async def _create_token(
     payload = data.copy()
     exp = datetime.now(timezone.utc) + expires_delta
     payload.update({"exp": int(exp.timestamp()), "type": token_type})
-    header = {"alg": TOKEN_ALG, "typ": "JWT"}
+    ring = _key_ring()
+    header = {"alg": ring.algorithm, "typ": "JWT", "kid": ring.kid}
     header_b64 = _b64url(json.dumps(header, separators=",:").encode("utf-8"))
     payload_b64 = _b64url(json.dumps(payload, separators=",:").encode("utf-8"))
     signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
-    signature = await asyncio.to_thread(
-        _private_key().sign,
-        signing_input,
-        padding.PKCS1v15(),
-        hashes.SHA256(),
+    signature = await _run_crypto(
+        jwt_keys.sign, ring.signing_key, ring.algorithm, signing_input
     )
     return f"{header_b64}.{payload_b64}.{_b64url(signature)}"
 
@@ -136,23 +300,40 @@ async def _create_token(
 async def _decode_token(token: str) -> Dict[str, Any]:
     if not token:
         raise HTTPException(status_code=401, detail="Missing token")
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         header_b64, payload_b64, signature_b64 = token.split(".")
     except ValueError as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
 
-    signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
     try:
+        header = json.loads(_b64url_decode(header_b64))
         signature = _b64url_decode(signature_b64)
-    except binascii.Error as exc:
+        # UnicodeEncodeError is a ValueError: non-ASCII segments are invalid.
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+    except ValueError as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
+    if not isinstance(header, dict):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    kid = header.get("kid")
+    if kid is not None and not isinstance(kid, str):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    verification_key = _key_ring().verification_key(kid)
+    if verification_key is None or header.get("alg") != verification_key.algorithm:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
     try:
-        await asyncio.to_thread(
-            _public_key().verify,
+        await _run_crypto(
+            jwt_keys.verify,
+            verification_key.key,
+            verification_key.algorithm,
             signature,
             signing_input,
-            padding.PKCS1v15(),
-            hashes.SHA256(),
         )
     except InvalidSignature as exc:  # pragma: no cover - deterministic path in tests
         raise HTTPException(status_code=401, detail="Invalid token") from exc
@@ -179,6 +360,7 @@ async def _decode_token(token: str) -> Dict[str, Any]:
     if int(datetime.now(timezone.utc).timestamp()) > exp_ts:
         raise HTTPException(status_code=401, detail="Token expired")
 
+    token_cache.put(token, payload, exp_ts)
     return payload
 
 
@@ -191,15 +373,31 @@ async def create_access_token(data: Dict[str, Any]) -> str:
 
 
 async def generate_refresh_token(
-    data: Dict[str, Any], expires_delta: timedelta | None = None
+    data: Dict[str, Any],
+    expires_delta: timedelta | None = None,
+    *,
+    family: str | None = None,
 ) -> str:
+    """Issue a single-use refresh token; rotations keep the original ``family``."""
     delta = expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    return await _create_token(data, expires_delta=delta, token_type="refresh")
+    jti = secrets.token_hex(16)
+    claims = {**data, "jti": jti, "fam": family or jti}
+    return await _create_token(claims, expires_delta=delta, token_type="refresh")
 
 
-async def verify_token(
+def access_token_claims(user: User) -> Dict[str, Any]:
+    """Claims embedded in tokens so requests can be served without a user lookup."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role.value if isinstance(user.role, UserRole) else user.role,
+        "ver": user.token_version or 0,
+    }
+
+
+async def _access_payload(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-) -> str:
+) -> Dict[str, Any]:
     if credentials is None or not credentials.credentials:
         raise HTTPException(status_code=401, detail="Missing token")
 
@@ -207,51 +405,392 @@ async def verify_token(
     token_type = payload.get("type") or "access"
     if token_type != "access":
         raise HTTPException(status_code=401, detail="Invalid token")
-
-    email = payload.get("sub")
-    if not email:
+    if not payload.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid token")
-    return str(email)
+    return payload
+
+
+async def verify_token(payload: Dict[str, Any] = Depends(_access_payload)) -> str:
+    return str(payload["sub"])
 
 
 async def verify_refresh_token(token: str) -> Dict[str, Any]:
     payload = await _decode_token(token)
     if payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid token")
+    # Tokens minted before rotation existed cannot be revoked, so refuse them.
+    if not payload.get("jti") or not payload.get("fam"):
+        raise HTTPException(status_code=401, detail="Invalid token")
     return payload
 
 
-async def get_current_user(
-    email: str = Depends(verify_token), db: Session = Depends(get_db)
-) -> User:
+class Principal:
+    """Authenticated caller identity resolved from token claims or an API key.
+
+    Only ``id``, ``email`` and ``role`` are available up front; the ORM ``User``
+    is loaded from the request session the first time ``user`` is accessed.
+    ``scopes`` is ``None`` for user tokens and the granted set for API keys.
+    """
+
+    __slots__ = (
+        "id",
+        "email",
+        "role",
+        "token_version",
+        "scopes",
+        "api_key_id",
+        "_db",
+        "_user",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: int,
+        email: str,
+        role: UserRole,
+        token_version: int = 0,
+        scopes: FrozenSet[str] | None = None,
+        api_key_id: int | None = None,
+        db: Session | None = None,
+        user: User | None = None,
+    ) -> None:
+        self.id = id
+        self.email = email
+        self.role = role
+        self.token_version = token_version
+        self.scopes = scopes
+        self.api_key_id = api_key_id
+        self._db = db
+        self._user = user
+
+    @classmethod
+    def from_user(cls, user: User, db: Session | None = None) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            token_version=user.token_version or 0,
+            db=db,
+            user=user,
+        )
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            if self._db is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            user = self._db.get(User, self.id)
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            self._user = user
+        return self._user
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id!r}, email={self.email!r}, role={self.role!r})"
+
+
+class PrincipalVersionCache:
+    """Remember each user's ``token_version`` for a short TTL.
+
+    Role changes bump the version (see ``revoke_user_tokens``); commits made by
+    this process invalidate the entry immediately, other workers notice within
+    ``ttl_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_VERSION_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[int, Tuple[float, int | None]] = {}
+
+    def get(self, user_id: int) -> Tuple[bool, int | None]:
+        """Return ``(fresh, version)``; ``version`` is ``None`` for deleted users."""
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return False, None
+        checked_at, version = entry
+        if time.monotonic() - checked_at > self.ttl_seconds:
+            return False, None
+        return True, version
+
+    def set(self, user_id: int, version: int | None) -> None:
+        self._versions[user_id] = (time.monotonic(), version)
+
+    def invalidate(self, user_id: int) -> None:
+        self._versions.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._versions.clear()
+
+
+principal_versions = PrincipalVersionCache()
+
+
+def revoke_user_tokens(user: User) -> None:
+    """Invalidate every token issued to ``user`` by bumping its version."""
+    user.token_version = (user.token_version or 0) + 1
+
+
+@event.listens_for(User.role, "set", active_history=True)
+def _bump_version_on_role_change(
+    target: User, value: Any, oldvalue: Any, initiator: Any
+) -> None:
+    if target.id is None or oldvalue in (None, value):
+        return
+    if not isinstance(oldvalue, (UserRole, str)):
+        return
+    revoke_user_tokens(target)
+
+
+@event.listens_for(User, "after_update")
+def _track_version_change(mapper: Any, connection: Any, target: User) -> None:
+    if inspect(target).attrs.token_version.history.has_changes():
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("zappro_revoked_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_versions(session: Session) -> None:
+    for user_id in session.info.pop("zappro_revoked_users", ()):
+        principal_versions.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session: Session) -> None:
+    session.info.pop("zappro_revoked_users", None)
+
+
+async def _current_version(db: Session, user_id: int) -> int | None:
+    fresh, version = principal_versions.get(user_id)
+    if fresh:
+        return version
+
+    def _fetch_version() -> int | None:
+        return db.query(User.token_version).filter(User.id == user_id).scalar()
+
+    version = await run_db(_fetch_version)
+    principal_versions.set(user_id, version)
+    return version
+
+
+async def _api_key_principal(token: str, db: Session) -> Principal:
+    verified = api_keys.api_key_cache.get(token)
+    if verified is None:
+        prefix = api_keys.parse_prefix(token)
+        if prefix is None:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        row = await run_db(api_key_crud.get_active_by_prefix, db, prefix)
+        if row is None or not api_keys.digests_match(token, row[0].digest):
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        db_key, user = row
+        verified = api_keys.VerifiedApiKey(
+            key_id=db_key.id,
+            user_id=user.id,
+            email=user.email,
+            role=user.role.value,
+            scopes=api_keys.parse_scopes(db_key.scopes),
+        )
+        api_keys.api_key_cache.put(prefix, db_key.digest, verified)
+    return Principal(
+        id=verified.user_id,
+        email=verified.email,
+        role=UserRole(verified.role),
+        scopes=verified.scopes,
+        api_key_id=verified.key_id,
+        db=db,
+    )
+
+
+class CachedIdentity(NamedTuple):
+    """Principal of an already verified credential, read from the auth caches."""
+
+    key: str
+    user_id: int
+
+
+def cached_identity(authorization: str | None) -> CachedIdentity | None:
+    """Identify the caller from the verified-token and API-key caches only.
+
+    No signature checks or queries run, so middleware can key rate limits
+    and fair queuing on the principal. Credentials not seen before return
+    ``None`` and are treated per IP.
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None
+    if api_keys.is_api_key(token):
+        verified = api_keys.api_key_cache.peek(token)
+        if verified is None:
+            return None
+        return CachedIdentity(f"key:{verified.key_id}", verified.user_id)
+    payload = token_cache.peek(token)
+    if payload is None or payload.get("uid") is None:
+        return None
+    return CachedIdentity(f"user:{payload['uid']}", payload["uid"])
+
+
+def rate_limit_identity(authorization: str | None) -> str | None:
+    """Return ``user:<id>`` or ``key:<id>`` for an already verified credential."""
+    identity = cached_identity(authorization)
+    return identity.key if identity is not None else None
+
+
+async def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Resolve the caller from a JWT or API key, skipping the user SELECT when possible."""
+    if credentials is None or not credentials.credentials:
+        raise HTTPException(status_code=401, detail="Missing token")
+
+    if api_keys.is_api_key(credentials.credentials):
+        principal = await _api_key_principal(credentials.credentials, db)
+        if "write" not in principal.scopes and request.method not in _SAFE_METHODS:
+            raise HTTPException(
+                status_code=403, detail="API key scope does not allow this operation"
+            )
+        return principal
+
+    payload = await _access_payload(credentials)
+    user_id = payload.get("uid")
+    role = payload.get("role")
+    token_version = payload.get("ver")
+
+    if (
+        STATELESS_PRINCIPAL
+        and user_id is not None
+        and role
+        and token_version is not None
+    ):
+        try:
+            principal = Principal(
+                id=int(user_id),
+                email=str(payload["sub"]),
+                role=UserRole(role),
+                token_version=int(token_version),
+                db=db,
+            )
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(status_code=401, detail="Invalid token") from exc
+        current = await _current_version(db, principal.id)
+        if current is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        if current != principal.token_version:
+            raise HTTPException(status_code=401, detail="Token revoked")
+        return principal
+
+    email = str(payload["sub"])
+
     def _fetch_user() -> User | None:
         return db.query(User).filter(User.email == email).first()
 
-    user = await asyncio.to_thread(_fetch_user)
+    user = await run_db(_fetch_user)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    if token_version is not None and token_version != (user.token_version or 0):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return Principal.from_user(user, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+) -> User:
+    if principal._user is not None:
+        return principal._user
+    return await run_db(lambda: principal.user)
 
 
-def get_password_hash(password: str) -> str:
-    salt = secrets.token_bytes(16)
-    iterations = 200_000
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
-    return "pbkdf2_sha256$%d$%s$%s" % (
-        iterations,
-        _b64url(salt),
-        _b64url(dk),
+_password_policy = passwords.PasswordPolicy()
+
+
+def configure_password_policy(policy: passwords.PasswordPolicy) -> None:
+    """Set the scheme and cost used for newly stored password hashes."""
+    global _password_policy
+    if policy.scheme not in passwords.SUPPORTED_SCHEMES:
+        raise ValueError(f"Unsupported password scheme {policy.scheme!r}")
+    _password_policy = policy
+
+
+def password_policy() -> passwords.PasswordPolicy:
+    return _password_policy
+
+
+def get_password_hash(
+    password: str, policy: passwords.PasswordPolicy | None = None
+) -> str:
+    return passwords.hash_password(password, policy or _password_policy)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return passwords.needs_rehash(hashed_password, _password_policy)
+
+
+_password_hasher: BoundedExecutor | None = None
+
+
+def configure_password_hasher(
+    *, workers: int = 2, max_queue: int = 32, kind: str = "thread"
+) -> BoundedExecutor:
+    """Replace the dedicated password hashing pool."""
+    global _password_hasher
+    _password_hasher = configure_executor(
+        "password-hashing", max_workers=workers, max_queue=max_queue, kind=kind
     )
+    return _password_hasher
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def password_hasher() -> BoundedExecutor:
+    if _password_hasher is None:
+        return configure_password_hasher()
+    return _password_hasher
+
+
+async def _run_bounded(
+    pool: BoundedExecutor, busy_detail: str, fn: Any, *args: Any
+) -> Any:
     try:
-        algo, iters_str, salt_b64, hash_b64 = hashed_password.split("$")
-        assert algo == "pbkdf2_sha256"
-    except Exception:  # noqa: BLE001
-        return False
-    iterations = int(iters_str)
-    salt = _b64url_decode(salt_b64)
-    expected = _b64url_decode(hash_b64)
-    dk = hashlib.pbkdf2_hmac("sha256", plain_password.encode("utf-8"), salt, iterations)
-    return hmac.compare_digest(dk, expected)
+        return await pool.run(fn, *args)
+    except ExecutorSaturated as exc:
+        LOGGER.warning("Executor %s saturated; shedding request", pool.name)
+        raise HTTPException(
+            status_code=503,
+            detail=busy_detail,
+            headers={"Retry-After": f"{exc.retry_after:.0f}"},
+        ) from exc
+
+
+async def _run_hasher(fn: Any, *args: Any) -> Any:
+    return await _run_bounded(
+        password_hasher(), "Authentication service busy", fn, *args
+    )
+
+
+async def _run_crypto(fn: Any, *args: Any) -> Any:
+    """JWT signing and verification; hashing bursts never delay token checks."""
+    return await _run_bounded(
+        get_executor("crypto"), "Authentication service busy", fn, *args
+    )
+
+
+async def run_db(fn: Any, *args: Any) -> Any:
+    """Blocking ORM work issued from async code, on the dedicated ``db`` pool."""
+    return await _run_bounded(get_executor("db"), "Database busy", fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash on the dedicated pool so login bursts never borrow CRUD threads."""
+    # The policy travels with the job so process-pool workers use the
+    # calibrated parameters rather than their own module defaults.
+    return await _run_hasher(get_password_hash, password, _password_policy)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return passwords.verify_password(plain_password, hashed_password)
@@ -0,0 +1,71 @@
+"""Per-request deadlines carried in a context variable.
+
+``SecurityMiddleware`` sets the deadline when a request arrives; the code
+underneath reads the remaining budget and stops once it is spent, instead of
+finishing work nobody is waiting for:
+
+* every DB statement checks it first, SQLite statements are interrupted by
+  a progress handler and Postgres transactions get ``statement_timeout``;
+* the worker pools (DB, JWT crypto, password hashing) refuse new jobs and
+  drop queued ones whose deadline passed before a worker picked them up.
+
+Starlette's thread pool and thread-kind ``BoundedExecutor`` jobs copy the
+context, so sync handlers, dependencies and pool jobs see the same deadline.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("zappro_deadline", default=None)
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when the request's time budget ran out."""
+
+    def __init__(self, message: str = "Request deadline exceeded") -> None:
+        super().__init__(message)
+
+
+def start(seconds: float) -> Token:
+    """Give the current context ``seconds`` from now; pass the token to ``reset``."""
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def current() -> Optional[float]:
+    """Absolute ``time.monotonic`` deadline, or ``None`` outside a request."""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired(deadline: Optional[float] = None) -> bool:
+    if deadline is None:
+        deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check() -> None:
+    if expired():
+        raise DeadlineExceeded()
+
+
+def statement_timeout_ms() -> Optional[int]:
+    """Remaining budget as a Postgres ``statement_timeout`` (0 would disable it)."""
+    left = remaining()
+    return None if left is None else max(math.ceil(left * 1000), 1)
+
+
+def sqlite_progress_handler() -> int:
+    """``sqlite3`` progress handler: a non-zero return interrupts the statement."""
+    return 1 if expired() else 0
@@ -0,0 +1,49 @@
+"""Weak ETags and ``If-None-Match`` handling for read endpoints.
+
+Tags are derived from cheap version data (``Project.version`` or the
+aggregate from ``collection_version``) rather than from the response body,
+so a matching request is answered with 304 before any row is loaded or
+serialized.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for ``If-None-Match`` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(
+    request: Request, response: Response, *version: Any
+) -> Optional[Response]:
+    """Tag ``response``; return a 304 when the client already has this version.
+
+    The tag covers the path and query string and the caller's ``version``
+    parts, which should include whatever scopes the data (e.g. the user).
+    """
+    etag = weak_etag(
+        request.scope["path"], request.scope.get("query_string", b""), *version
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
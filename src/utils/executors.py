@@ -0,0 +1,188 @@
+"""Bounded worker pools with admission control and wait/compute metrics.
+
+Each class of blocking work (DB calls from async code, JWT crypto, password
+hashing) gets its own named pool, so saturating one cannot stall the
+others; sync route handlers keep anyio's thread limiter to themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from src.utils import deadlines
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool already holds ``max_workers + max_queue`` jobs."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Executor '{name}' is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def _timed_call(
+    fn: Callable[..., T], args: Tuple[Any, ...], deadline: Optional[float] = None
+) -> Tuple[float, float, T]:
+    """Run ``fn`` and report when it started and how long it computed.
+
+    ``time.monotonic`` is system-wide on Linux, so start times reported by
+    worker processes are comparable with the submitting process, and so is
+    the request ``deadline``: a job that waited past it is dropped unrun.
+    """
+    started = time.monotonic()
+    if deadline is not None and started >= deadline:
+        raise deadlines.DeadlineExceeded()
+    result = fn(*args)
+    return started, time.monotonic() - started, result
+
+
+class BoundedExecutor:
+    """Dedicated thread or process pool that rejects work instead of queueing forever."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_workers: int,
+        max_queue: int,
+        kind: str = "thread",
+    ) -> None:
+        if kind not in {"thread", "process"}:
+            raise ValueError("Executor kind must be 'thread' or 'process'.")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(max_workers, 1)
+        self.max_queue = max(max_queue, 0)
+        self._executor: Executor | None = None
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.compute_total = 0.0
+        self.compute_max = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently queued or running."""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._pending - self.max_workers, 0)
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"zappro-{self.name}",
+                )
+        return self._executor
+
+    def retry_after(self) -> float:
+        """Estimate seconds until a slot frees up, based on observed compute time."""
+        average = (self.compute_total / self.completed) if self.completed else 0.1
+        waves = math.ceil((self._pending + 1) / self.max_workers)
+        return max(1.0, math.ceil(average * waves))
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Execute ``fn(*args)`` in the pool or raise ``ExecutorSaturated``.
+
+        Raises ``DeadlineExceeded`` if the request deadline passes before the
+        job starts.
+        """
+        deadlines.check()
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(self.name, self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        call: Callable[..., Tuple[float, float, T]] = _timed_call
+        if self.kind == "thread":
+            # Like asyncio.to_thread: the job sees the caller's context
+            # variables, including the request deadline.
+            call = functools.partial(contextvars.copy_context().run, _timed_call)
+        self._pending += 1
+        self.submitted += 1
+        submitted_at = time.monotonic()
+        try:
+            started, elapsed, result = await loop.run_in_executor(
+                self._ensure_executor(), call, fn, args, deadlines.current()
+            )
+        except deadlines.DeadlineExceeded:
+            self.expired += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        waited = max(started - submitted_at, 0.0)
+        self.completed += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.compute_total += elapsed
+        self.compute_max = max(self.compute_max, elapsed)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        completed = self.completed or 1
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_wait_avg_ms": self.wait_total / completed * 1000,
+            "queue_wait_max_ms": self.wait_max * 1000,
+            "compute_avg_ms": self.compute_total / completed * 1000,
+            "compute_max_ms": self.compute_max * 1000,
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_pools: Dict[str, BoundedExecutor] = {}
+
+
+def configure_executor(
+    name: str, *, max_workers: int, max_queue: int, kind: str = "thread"
+) -> BoundedExecutor:
+    """Create, or replace and shut down, the named pool."""
+    previous = _pools.pop(name, None)
+    if previous is not None:
+        previous.shutdown()
+    pool = _pools[name] = BoundedExecutor(
+        name, max_workers=max_workers, max_queue=max_queue, kind=kind
+    )
+    return pool
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Return the named pool, created with small defaults if never configured."""
+    pool = _pools.get(name)
+    if pool is None:
+        pool = configure_executor(name, max_workers=4, max_queue=64)
+    return pool
+
+
+def registered_executors() -> List[BoundedExecutor]:
+    return list(_pools.values())
@@ -0,0 +1,149 @@
+"""JWS signing keys: per-algorithm sign/verify, JWK export and key IDs."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Union
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+
+PrivateKey = Union[
+    rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey, ed25519.Ed25519PrivateKey
+]
+PublicKey = Union[rsa.RSAPublicKey, ec.EllipticCurvePublicKey, ed25519.Ed25519PublicKey]
+
+SUPPORTED_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+_ES256_COORDINATE_BYTES = 32
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _int_bytes(value: int, length: int | None = None) -> bytes:
+    length = length or max(1, (value.bit_length() + 7) // 8)
+    return value.to_bytes(length, "big")
+
+
+def normalize_algorithm(value: str) -> str:
+    """Map user supplied names (``eddsa``, ``ed25519``...) to JOSE identifiers."""
+    candidate = value.strip()
+    aliases = {"EDDSA": "EdDSA", "ED25519": "EdDSA", "RS256": "RS256", "ES256": "ES256"}
+    normalized = aliases.get(candidate.upper())
+    if normalized is None:
+        raise ValueError(
+            f"Unsupported JWT algorithm {value!r}; expected one of "
+            f"{', '.join(SUPPORTED_ALGORITHMS)}"
+        )
+    return normalized
+
+
+def generate_private_key(algorithm: str) -> PrivateKey:
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def algorithm_for_key(key: PrivateKey | PublicKey) -> str:
+    """Return the JOSE algorithm implied by the key type."""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if not isinstance(key.curve, ec.SECP256R1):
+            raise ValueError("Only P-256 EC keys are supported (ES256)")
+        return "ES256"
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+
+def sign(key: PrivateKey, algorithm: str, signing_input: bytes) -> bytes:
+    if algorithm == "EdDSA":
+        return key.sign(signing_input)  # type: ignore[call-arg]
+    if algorithm == "ES256":
+        der = key.sign(signing_input, ec.ECDSA(hashes.SHA256()))  # type: ignore[call-arg]
+        r, s = decode_dss_signature(der)
+        return _int_bytes(r, _ES256_COORDINATE_BYTES) + _int_bytes(
+            s, _ES256_COORDINATE_BYTES
+        )
+    return key.sign(  # type: ignore[call-arg]
+        signing_input, padding.PKCS1v15(), hashes.SHA256()
+    )
+
+
+def verify(
+    key: PublicKey, algorithm: str, signature: bytes, signing_input: bytes
+) -> None:
+    """Raise ``cryptography.exceptions.InvalidSignature`` on mismatch."""
+    if algorithm == "EdDSA":
+        key.verify(signature, signing_input)  # type: ignore[call-arg]
+        return
+    if algorithm == "ES256":
+        from cryptography.exceptions import InvalidSignature
+
+        if len(signature) != 2 * _ES256_COORDINATE_BYTES:
+            raise InvalidSignature()
+        r = int.from_bytes(signature[:_ES256_COORDINATE_BYTES], "big")
+        s = int.from_bytes(signature[_ES256_COORDINATE_BYTES:], "big")
+        key.verify(  # type: ignore[call-arg]
+            encode_dss_signature(r, s), signing_input, ec.ECDSA(hashes.SHA256())
+        )
+        return
+    key.verify(  # type: ignore[call-arg]
+        signature, signing_input, padding.PKCS1v15(), hashes.SHA256()
+    )
+
+
+def public_jwk(key: PublicKey) -> Dict[str, str]:
+    """Return the RFC 7517 public members of ``key`` (no ``kid``/``alg``)."""
+    if isinstance(key, ed25519.Ed25519PublicKey):
+        raw = key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw,
+        )
+        return {"kty": "OKP", "crv": "Ed25519", "x": _b64url(raw)}
+    if isinstance(key, ec.EllipticCurvePublicKey):
+        numbers = key.public_numbers()
+        return {
+            "kty": "EC",
+            "crv": "P-256",
+            "x": _b64url(_int_bytes(numbers.x, _ES256_COORDINATE_BYTES)),
+            "y": _b64url(_int_bytes(numbers.y, _ES256_COORDINATE_BYTES)),
+        }
+    numbers = key.public_numbers()
+    return {
+        "kty": "RSA",
+        "n": _b64url(_int_bytes(numbers.n)),
+        "e": _b64url(_int_bytes(numbers.e)),
+    }
+
+
+def key_id(key: PublicKey) -> str:
+    """RFC 7638 JWK thumbprint, stable across workers without extra config."""
+    canonical = json.dumps(public_jwk(key), sort_keys=True, separators=(",", ":"))
+    return _b64url(hashlib.sha256(canonical.encode("utf-8")).digest())
+
+
+@dataclass(frozen=True)
+class VerificationKey:
+    kid: str
+    algorithm: str
+    key: PublicKey
+
+    def jwk(self) -> Dict[str, Any]:
+        return {
+            **public_jwk(self.key),
+            "kid": self.kid,
+            "alg": self.algorithm,
+            "use": "sig",
+        }
@@ -0,0 +1,181 @@
+"""Password hashing schemes, cost policy and hardware calibration."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from dataclasses import dataclass, replace
+from typing import Callable
+
+LOGGER = logging.getLogger("zappro.auth")
+
+PBKDF2_SCHEME = "pbkdf2_sha256"
+SCRYPT_SCHEME = "scrypt"
+SUPPORTED_SCHEMES = (PBKDF2_SCHEME, SCRYPT_SCHEME)
+_SALT_BYTES = 16
+_SCRYPT_KEY_BYTES = 32
+_MAX_SCRYPT_N = 2**20
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(data: str) -> bytes:
+    pad = "=" * (-len(data) % 4)
+    return base64.urlsafe_b64decode(data + pad)
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    """Target hashing parameters for newly stored passwords.
+
+    ``tolerance`` is the relative PBKDF2 iteration drift accepted before a
+    stored hash is considered outdated; calibration sets it so that small
+    timing differences between restarts do not rehash every account.
+    """
+
+    scheme: str = PBKDF2_SCHEME
+    iterations: int = 200_000
+    scrypt_n: int = 2**14
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    tolerance: float = 0.0
+
+
+def _scrypt(password: bytes, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password,
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=129 * n * r * p + (1 << 20),
+        dklen=_SCRYPT_KEY_BYTES,
+    )
+
+
+def hash_password(password: str, policy: PasswordPolicy) -> str:
+    salt = secrets.token_bytes(_SALT_BYTES)
+    encoded = password.encode("utf-8")
+    if policy.scheme == SCRYPT_SCHEME:
+        dk = _scrypt(encoded, salt, policy.scrypt_n, policy.scrypt_r, policy.scrypt_p)
+        return "%s$%d$%d$%d$%s$%s" % (
+            SCRYPT_SCHEME,
+            policy.scrypt_n,
+            policy.scrypt_r,
+            policy.scrypt_p,
+            _b64url(salt),
+            _b64url(dk),
+        )
+    dk = hashlib.pbkdf2_hmac("sha256", encoded, salt, policy.iterations)
+    return "%s$%d$%s$%s" % (
+        PBKDF2_SCHEME,
+        policy.iterations,
+        _b64url(salt),
+        _b64url(dk),
+    )
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    parts = hashed_password.split("$")
+    try:
+        if parts[0] == PBKDF2_SCHEME and len(parts) == 4:
+            iterations = int(parts[1])
+            salt = _b64url_decode(parts[2])
+            expected = _b64url_decode(parts[3])
+            dk = hashlib.pbkdf2_hmac(
+                "sha256", plain_password.encode("utf-8"), salt, iterations
+            )
+        elif parts[0] == SCRYPT_SCHEME and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt = _b64url_decode(parts[4])
+            expected = _b64url_decode(parts[5])
+            dk = _scrypt(plain_password.encode("utf-8"), salt, n, r, p)
+        else:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(dk, expected)
+
+
+def needs_rehash(hashed_password: str, policy: PasswordPolicy) -> bool:
+    """Return True when the stored parameters differ from ``policy``."""
+    parts = hashed_password.split("$")
+    try:
+        if policy.scheme == PBKDF2_SCHEME:
+            if parts[0] != PBKDF2_SCHEME or len(parts) != 4:
+                return True
+            drift = abs(int(parts[1]) - policy.iterations) / policy.iterations
+            return drift > policy.tolerance
+        if parts[0] != SCRYPT_SCHEME or len(parts) != 6:
+            return True
+        stored = (int(parts[1]), int(parts[2]), int(parts[3]))
+    except (ValueError, ZeroDivisionError):
+        return True
+    return stored != (policy.scrypt_n, policy.scrypt_r, policy.scrypt_p)
+
+
+def _best_of(runs: int, fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def calibrate_policy(
+    base: PasswordPolicy,
+    *,
+    target_ms: float,
+    min_iterations: int = 100_000,
+    max_iterations: int = 5_000_000,
+    min_scrypt_n: int = 2**14,
+    tolerance: float = 0.25,
+) -> PasswordPolicy:
+    """Pick the cost that makes one hash take about ``target_ms`` on this host."""
+    target = max(target_ms, 1.0) / 1000
+    salt = secrets.token_bytes(_SALT_BYTES)
+
+    if base.scheme == SCRYPT_SCHEME:
+        n = min_scrypt_n
+        while n < _MAX_SCRYPT_N:
+            candidate = n * 2
+            elapsed = _best_of(
+                2,
+                lambda: _scrypt(
+                    b"calibration", salt, candidate, base.scrypt_r, base.scrypt_p
+                ),
+            )
+            if elapsed > target:
+                break
+            n = candidate
+        policy = replace(base, scrypt_n=n, tolerance=tolerance)
+        LOGGER.info(
+            "event=password_calibration scheme=scrypt n=%d r=%d p=%d target_ms=%.0f",
+            policy.scrypt_n,
+            policy.scrypt_r,
+            policy.scrypt_p,
+            target_ms,
+        )
+        return policy
+
+    probe_iterations = 20_000
+    elapsed = _best_of(
+        3,
+        lambda: hashlib.pbkdf2_hmac("sha256", b"calibration", salt, probe_iterations),
+    )
+    scaled = int(probe_iterations * target / max(elapsed, 1e-6))
+    iterations = max(min_iterations, min(max_iterations, round(scaled, -4)))
+    policy = replace(base, iterations=iterations, tolerance=tolerance)
+    LOGGER.info(
+        "event=password_calibration scheme=pbkdf2_sha256 iterations=%d target_ms=%.0f",
+        policy.iterations,
+        target_ms,
+    )
+    return policy
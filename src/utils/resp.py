@@ -0,0 +1,191 @@
+"""Minimal asyncio Redis (RESP2) client used by the shared rate-limit backend.
+
+Only what the limiter needs is implemented: a single connection per event
+loop, pipelined commands (replies are matched to callers in FIFO order, so
+concurrent requests share one socket without waiting on each other) and
+``EVALSHA`` with a transparent ``SCRIPT LOAD`` on ``NOSCRIPT``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import deque
+from typing import Any, Deque, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+Reply = Any
+
+
+class RespError(Exception):
+    """Error reply (``-ERR ...``) returned by the server."""
+
+
+def encode_command(*args: Any) -> bytes:
+    """Serialize a command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        elif isinstance(arg, float):
+            data = repr(arg).encode()
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Reply:
+    """Read one reply; error replies are returned as ``RespError`` instances."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by server")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode()
+    if prefix == b"-":
+        return RespError(body.decode())
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected RESP prefix {prefix!r}")
+
+
+class RespClient:
+    """Single-connection pipelining client bound to the running event loop."""
+
+    def __init__(self, url: str, *, timeout: float = 0.1) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported Redis URL scheme {parsed.scheme!r}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connecting: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scripts: dict[bytes, str] = {}
+
+    async def execute(self, *args: Any) -> Reply:
+        """Send one command and wait for its reply."""
+        (reply,) = await self.pipeline([args])
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Reply]:
+        """Write all commands in one go and return their replies in order.
+
+        Error replies are returned in place rather than raised so callers can
+        inspect partial failures. Timeouts and socket errors drop the
+        connection; the next call reconnects.
+        """
+        await self._ensure_connected()
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        self._pending.extend(futures)
+        assert self._writer is not None
+        self._writer.write(b"".join(encode_command(*cmd) for cmd in commands))
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        except (asyncio.TimeoutError, OSError, ConnectionError):
+            await self.close()
+            raise
+
+    async def evalsha(self, script: bytes, keys: Sequence[Any], args: Sequence[Any]):
+        """Run a Lua script by digest, loading it on first ``NOSCRIPT``."""
+        sha = self._scripts.get(script)
+        if sha is None:
+            sha = hashlib.sha1(script).hexdigest()
+            self._scripts[script] = sha
+        command = ("EVALSHA", sha, len(keys), *keys, *args)
+        reply = (await self.pipeline([command]))[0]
+        if isinstance(reply, RespError) and str(reply).startswith("NOSCRIPT"):
+            _, reply = await self.pipeline([("SCRIPT", "LOAD", script), command])
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def close(self) -> None:
+        """Close the connection and fail any outstanding replies."""
+        writer, task = self._writer, self._reader_task
+        self._reader = self._writer = self._reader_task = None
+        self._loop = None
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(ConnectionError("Connection closed"))
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, RuntimeError):
+                pass
+
+    async def _ensure_connected(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._writer is not None and self._loop is loop:
+            return
+        if self._lock_loop is not loop:
+            # Connections cannot cross event loops; forget the old one.
+            self._reader = self._writer = self._reader_task = None
+            self._pending.clear()
+            self._connecting = asyncio.Lock()
+            self._lock_loop = loop
+        assert self._connecting is not None
+        async with self._connecting:
+            if self._writer is not None and self._loop is loop:
+                return
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            handshake = []
+            if self.password and self.username:
+                handshake.append(("AUTH", self.username, self.password))
+            elif self.password:
+                handshake.append(("AUTH", self.password))
+            if self.db:
+                handshake.append(("SELECT", self.db))
+            if handshake:
+                writer.write(b"".join(encode_command(*cmd) for cmd in handshake))
+                for _ in handshake:
+                    reply = await asyncio.wait_for(read_reply(reader), self.timeout)
+                    if isinstance(reply, RespError):
+                        writer.close()
+                        raise reply
+            self._reader, self._writer, self._loop = reader, writer, loop
+            self._reader_task = loop.create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                reply = await read_reply(reader)
+                if not self._pending:
+                    continue
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (asyncio.IncompleteReadError, OSError, ConnectionError, ValueError):
+            if self._reader is reader:
+                await self.close()
@@ -0,0 +1,140 @@
+"""Refresh-token revocation store: Bloom-filter front, exact set in the database."""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.revoked_token import RevokedToken
+from src.sketches import RotatingBloomFilter
+
+LOGGER = logging.getLogger("zappro.auth")
+
+REVOCATION_CAPACITY = int(os.getenv("ZAPPRO_REFRESH_REVOCATION_CAPACITY", "1000000"))
+REVOCATION_FP_RATE = float(os.getenv("ZAPPRO_REFRESH_REVOCATION_FP_RATE", "0.001"))
+PURGE_INTERVAL_SECONDS = 3600.0
+
+
+CONSUMED = "consumed"
+REUSED = "reused"
+REVOKED = "revoked"
+
+
+def family_key(family: str) -> str:
+    """Identifier stored when a whole rotation family is revoked."""
+    return f"fam:{family}"
+
+
+class RefreshTokenRevocationStore:
+    """Consume refresh tokens against the shared revocation table.
+
+    The database table is the exact, shared set and is consulted on every
+    refresh: consuming a token inserts its jti and looks up its family marker
+    in the same transaction, so a replay fails on the primary key and a family
+    revoked by another worker, or before a restart, is always seen. The
+    in-process rotating Bloom filter, loaded from the table at startup, only
+    speeds up rejections: a token it already knows as revoked is confirmed
+    with a SELECT instead of an INSERT that has to be rolled back.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = REVOCATION_CAPACITY,
+        fp_rate: float = REVOCATION_FP_RATE,
+        retention_seconds: float,
+    ) -> None:
+        self._bloom = RotatingBloomFilter(
+            capacity, fp_rate, generations=2, period=retention_seconds
+        )
+        self._last_purge = time.monotonic()
+        self.bloom_hits = 0
+        self.db_lookups = 0
+
+    def load(self, db: Session) -> int:
+        """Add every unexpired revocation in the table to the filter."""
+        rows = db.query(RevokedToken.jti).filter(
+            RevokedToken.expires_at >= int(time.time())
+        )
+        loaded = 0
+        for (identifier,) in rows.yield_per(10_000):
+            self._bloom.add(identifier)
+            loaded += 1
+        LOGGER.info("event=revocation_load loaded=%d", loaded)
+        return loaded
+
+    def consume(self, db: Session, jti: str, family: str, expires_at: int) -> str:
+        """Mark ``jti`` as used; return ``CONSUMED``, ``REUSED`` or ``REVOKED``."""
+        marker = family_key(family)
+        self.db_lookups += 1
+        if jti in self._bloom or marker in self._bloom:
+            self.bloom_hits += 1
+            known = {
+                identifier
+                for (identifier,) in db.query(RevokedToken.jti).filter(
+                    RevokedToken.jti.in_((jti, marker))
+                )
+            }
+            if marker in known:
+                return REVOKED
+            if jti in known:
+                return REUSED
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            self._bloom.add(jti)
+            return REUSED
+        family_revoked = (
+            db.query(RevokedToken.jti).filter(RevokedToken.jti == marker).first()
+            is not None
+        )
+        if family_revoked:
+            db.rollback()
+            self._bloom.add(marker)
+            return REVOKED
+        db.commit()
+        self._bloom.add(jti)
+        self._maybe_purge(db)
+        return CONSUMED
+
+    def revoke(self, db: Session, identifier: str, expires_at: int) -> bool:
+        """Persist the revocation; return False if it was already revoked."""
+        self._bloom.add(identifier)
+        db.add(RevokedToken(jti=identifier, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        self._maybe_purge(db)
+        return True
+
+    def _maybe_purge(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        deleted = (
+            db.query(RevokedToken)
+            .filter(RevokedToken.expires_at < int(time.time()))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        LOGGER.info("event=revocation_purge deleted=%d", deleted)
+
+    def stats(self) -> dict:
+        return {
+            "bloom_items": self._bloom.count,
+            "bloom_memory_bytes": self._bloom.memory_bytes,
+            "bloom_hits": self.bloom_hits,
+            "db_lookups": self.db_lookups,
+        }
+
+    def clear(self) -> None:
+        self._bloom.clear()
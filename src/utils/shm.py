@@ -0,0 +1,250 @@
+"""Fixed-size hash table in a shared ``mmap`` file for per-node worker state.
+
+All uvicorn workers on a host open the same file (``/dev/shm`` keeps it in
+RAM) and see the same slots, so limiter buckets and recent request IDs are
+shared without a network hop. The table is set-associative: a key hashes to
+one set of ``WAYS`` slots and, when the set is full, the least-recently
+touched slot is overwritten. Memory is therefore fixed by ``max_entries``.
+
+Sets are guarded by striped ``fcntl`` byte-range locks (between processes)
+plus a thread lock per stripe (``fcntl`` locks are per-process). Critical
+sections are a few microseconds, so ``update_async`` tries the lock without
+blocking and only waits for a contended stripe in a thread. Timestamps
+use ``time.monotonic``, which is system-wide on Linux, so they are
+comparable between workers. They are meaningless after a reboot, so the
+header records the kernel's boot id and a table left by an earlier boot is
+cleared on open (a file on a tmpfs such as ``/dev/shm`` never survives one
+anyway; elsewhere this check is what keeps stale timestamps out).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_MAGIC = b"ZPSHM001"
+_HEADER = struct.Struct("<8sQQ16s")  # magic, sets, ways, boot id
+_SLOT = struct.Struct("<Qddd")  # fingerprint (0 = empty), a, b, last_seen
+_HEADER_SIZE = 64
+
+
+def _boot_id() -> bytes:
+    """Identifier of the current boot; zeros where the kernel has none."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "rb") as handle:
+            return bytes.fromhex(handle.read().strip().replace(b"-", b"").decode())
+    except (OSError, ValueError):
+        return bytes(16)
+
+
+def _fingerprint(key: str) -> int:
+    value = int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+    return value or 1
+
+
+class SharedMemoryTable:
+    """Set-associative table of ``key -> (a, b)`` float pairs shared via mmap."""
+
+    WAYS = 8
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_entries: int = 10_000,
+        stripes: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.sets = max(-(-max_entries // self.WAYS), 1)
+        self.stripes = max(min(stripes, self.sets), 1)
+        self._clock = clock
+        self._set_struct = struct.Struct("<" + "Qddd" * self.WAYS)
+        self._set_size = self._set_struct.size
+        size = _HEADER_SIZE + self.sets * self._set_size
+        self._thread_locks = [threading.Lock() for _ in range(self.stripes)]
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._initialize(size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._mm = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _initialize(self, size: int) -> None:
+        current = os.fstat(self._fd).st_size
+        boot_id = _boot_id()
+        if current:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            magic, sets, ways, created_boot = _HEADER.unpack(
+                header.ljust(_HEADER.size, b"\0")
+            )
+            if magic == _MAGIC and (sets, ways) == (self.sets, self.WAYS):
+                if created_boot != boot_id:
+                    # Monotonic timestamps from another boot would leave
+                    # windows open or closed for arbitrary lengths of time.
+                    os.ftruncate(self._fd, _HEADER_SIZE)
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, sets, ways, boot_id), 0)
+                if os.fstat(self._fd).st_size < size:
+                    os.ftruncate(self._fd, size)
+                return
+            if magic == _MAGIC:
+                raise ValueError(
+                    f"Shared table {self.path} was created with {sets * ways} "
+                    f"entries; remove it to change max_entries"
+                )
+            raise ValueError(
+                f"{self.path} exists and is not a shared table; refusing to "
+                f"overwrite it"
+            )
+        # Header first: a crash before the resize leaves a valid, short file
+        # that the next worker grows instead of an unrecognisable one.
+        os.pwrite(self._fd, _HEADER.pack(_MAGIC, self.sets, self.WAYS, boot_id), 0)
+        os.ftruncate(self._fd, size)
+
+    def _locate(self, key: str) -> Tuple[int, int, int]:
+        fp = _fingerprint(key)
+        set_index = (fp >> 17) % self.sets
+        return fp, set_index, set_index % self.stripes
+
+    def _lock(self, stripe: int, blocking: bool = True) -> None:
+        """Take the stripe; raise ``BlockingIOError`` if not ``blocking`` and held."""
+        if not self._thread_locks[stripe].acquire(blocking):
+            raise BlockingIOError(errno.EAGAIN, "Shared table stripe is locked")
+        try:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.lockf(self._fd, flags, 1, stripe)
+            except OSError as exc:
+                if exc.errno in (errno.EACCES, errno.EAGAIN):
+                    raise BlockingIOError(exc.errno, exc.strerror) from exc
+                raise
+        except BaseException:
+            self._thread_locks[stripe].release()
+            raise
+
+    def _unlock(self, stripe: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        self._thread_locks[stripe].release()
+
+    def update(
+        self,
+        key: str,
+        func: Callable[[float, float, bool], Tuple[float, float, T]],
+        *,
+        blocking: bool = True,
+    ) -> T:
+        """Atomically apply ``func(a, b, found) -> (a, b, result)`` to ``key``.
+
+        Missing keys are passed as ``(0.0, 0.0, False)``; the new pair is
+        stored, replacing the least-recently touched slot if the set is full.
+        With ``blocking=False`` a held stripe raises ``BlockingIOError`` before
+        ``func`` runs.
+        """
+        fp, set_index, stripe = self._locate(key)
+        offset = _HEADER_SIZE + set_index * self._set_size
+        self._lock(stripe, blocking)
+        try:
+            now = self._clock()
+            slots = self._set_struct.unpack_from(self._mm, offset)
+            fingerprints = slots[0::4]
+            if fp in fingerprints:
+                target = fingerprints.index(fp)
+                base = target * 4
+                a, b, result = func(slots[base + 1], slots[base + 2], True)
+            else:
+                if 0 in fingerprints:
+                    target = fingerprints.index(0)
+                else:
+                    last_seen = slots[3::4]
+                    target = last_seen.index(min(last_seen))
+                a, b, result = func(0.0, 0.0, False)
+            _SLOT.pack_into(
+                self._mm, offset + target * _SLOT.size, fp, float(a), float(b), now
+            )
+            return result
+        finally:
+            self._unlock(stripe)
+
+    async def update_async(
+        self, key: str, func: Callable[[float, float, bool], Tuple[float, float, T]]
+    ) -> T:
+        """``update`` for the event loop: wait for a contended stripe in a thread."""
+        try:
+            return self.update(key, func, blocking=False)
+        except BlockingIOError:
+            return await asyncio.to_thread(self.update, key, func)
+
+    def get(self, key: str) -> Optional[Tuple[float, float]]:
+        fp, set_index, stripe = self._locate(key)
+        offset = _HEADER_SIZE + set_index * self._set_size
+        self._lock(stripe)
+        try:
+            for way in range(self.WAYS):
+                slot_fp, a, b, _ = _SLOT.unpack_from(
+                    self._mm, offset + way * _SLOT.size
+                )
+                if slot_fp == fp:
+                    return a, b
+            return None
+        finally:
+            self._unlock(stripe)
+
+    def delete(self, key: str) -> None:
+        fp, set_index, stripe = self._locate(key)
+        offset = _HEADER_SIZE + set_index * self._set_size
+        self._lock(stripe)
+        try:
+            for way in range(self.WAYS):
+                slot_offset = offset + way * _SLOT.size
+                if _SLOT.unpack_from(self._mm, slot_offset)[0] == fp:
+                    _SLOT.pack_into(self._mm, slot_offset, 0, 0.0, 0.0, 0.0)
+        finally:
+            self._unlock(stripe)
+
+    def clear(self) -> None:
+        """Empty every slot; other workers see the cleared table immediately."""
+        for stripe in range(self.stripes):
+            self._lock(stripe)
+        try:
+            self._mm[_HEADER_SIZE:] = bytes(len(self._mm) - _HEADER_SIZE)
+        finally:
+            for stripe in range(self.stripes):
+                self._unlock(stripe)
+
+    def __len__(self) -> int:
+        return sum(
+            1
+            for offset in range(_HEADER_SIZE, len(self._mm), _SLOT.size)
+            if _SLOT.unpack_from(self._mm, offset)[0]
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.sets * self.WAYS
+
+    def memory_bytes(self) -> int:
+        return len(self._mm)
+
+    def close(self) -> None:
+        if self._mm.closed:
+            return
+        self._mm.close()
+        os.close(self._fd)
@@ -14,9 +14,10 @@ from src.main import app  # noqa: E402
 
 @pytest.fixture(autouse=True)
 def reset_rate_limiter() -> None:
-    limiter = getattr(app.state, "rate_limiter", None)
-    if limiter is not None:
-        limiter.clear()
+    for name in ("rate_limiter", "principal_rate_limiter"):
+        limiter = getattr(app.state, name, None)
+        if limiter is not None:
+            limiter.clear()
 
 
 def _auth_headers(client: TestClient, role: str) -> dict[str, str]:
@@ -0,0 +1,56 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.security import RateLimitHitters
+
+
+def _headers(client: TestClient, role: str) -> dict[str, str]:
+    email = f"admin-{role}-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": role, "password": "secret123", "role": role},
+    )
+    token = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_rate_limit_top_reports_rejected_clients_and_routes():
+    settings = Settings(
+        rate_limit={
+            "max_requests": 2,
+            "window_seconds": 60,
+            "route_costs": {"/api/v1/auth": 0, "/api/v1/admin": 0},
+        }
+    )
+    client = TestClient(create_app(settings))
+    admin = _headers(client, "admin")
+    operador = _headers(client, "operador")
+
+    statuses = [client.get("/health").status_code for _ in range(6)]
+    assert statuses.count(429) == 4
+
+    response = client.get("/api/v1/admin/rate-limit/top?k=5", headers=admin)
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["rejected_total"] == 4
+    assert payload["clients"][0] == {"key": "testclient", "count": 4, "error": 0}
+    assert payload["routes"][0]["key"] == "GET /health"
+
+    forbidden = client.get("/api/v1/admin/rate-limit/top", headers=operador)
+    assert forbidden.status_code == 403
+
+
+def test_rejection_logs_are_sampled():
+    now = [0.0]
+    hitters = RateLimitHitters(4, log_interval_seconds=10, clock=lambda: now[0])
+
+    assert hitters.log_due() == 0
+    assert hitters.log_due() is None
+    assert hitters.log_due() is None
+    now[0] = 10.0
+    assert hitters.log_due() == 2
@@ -0,0 +1,217 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.admission import (
+    AdaptiveConcurrencyLimiter,
+    FairQueue,
+    FairQueueRejected,
+    request_priority,
+    tenant_key,
+)
+from src.config import Settings
+from src.main import create_app
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limit_grows_additively_and_backs_off_once_per_episode():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=10, latency_threshold_seconds=0.5, clock=clock
+    )
+
+    tokens = [limiter.try_acquire("write") for _ in range(10)]
+    for token in tokens:
+        limiter.release(token)
+    assert limiter.limit > 10
+
+    grown = limiter.limit
+    slow = [limiter.try_acquire("write") for _ in range(3)]
+    clock.now += 2.0
+    for token in slow:
+        limiter.release(token)
+    assert limiter.limit == pytest.approx(grown * 0.9)
+    assert limiter.decreases == 1
+
+
+def test_limit_never_drops_below_minimum():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=5, min_limit=4, clock=clock)
+
+    for _ in range(20):
+        token = limiter.try_acquire("write")
+        clock.now += 1
+        limiter.release(token)
+
+    assert limiter.limit == 4
+
+
+def test_sequential_server_errors_do_not_collapse_the_limit():
+    app = create_app(Settings(admission={"initial_limit": 40, "min_limit": 4}))
+
+    @app.get("/api/v1/boom")
+    def boom() -> None:
+        raise RuntimeError("boom")
+
+    client = TestClient(app, raise_server_exceptions=False)
+    for _ in range(30):
+        assert client.get("/api/v1/boom").status_code == 500
+
+    assert app.state.admission.decreases == 0
+    assert app.state.admission.limit >= 40
+
+
+def test_slow_completions_cut_at_most_once_per_window():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=40, latency_threshold_seconds=0.5, clock=clock
+    )
+
+    for _ in range(10):
+        token = limiter.try_acquire("write")
+        clock.now += 0.6
+        limiter.release(token)
+    tokens = [limiter.try_acquire("write") for _ in range(10)]
+    clock.now += 0.6
+    for token in tokens:
+        limiter.release(token)
+
+    assert limiter.decreases == 11
+    assert limiter.limit > 40 * 0.9**12
+
+
+def test_anonymous_traffic_is_shed_before_authenticated_writes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+    limiter.in_flight = 7
+
+    assert limiter.try_acquire(request_priority("GET", False)) is None
+    assert limiter.try_acquire(request_priority("GET", True)) is not None
+    assert limiter.try_acquire(request_priority("POST", True)) is not None
+    assert limiter.shed == {"write": 0, "read": 0, "anonymous": 1}
+
+
+def test_saturated_app_sheds_with_503_but_admits_probes():
+    app = create_app(
+        Settings(
+            admission={"initial_limit": 4, "min_limit": 4},
+            metrics={"enabled": True, "scrape_token": "scrape"},
+        )
+    )
+    client = TestClient(app)
+    app.state.admission.in_flight = 4
+
+    shed = client.get("/api/v1/projects")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert shed.headers["Cache-Control"] == "no-store"
+
+    assert client.get("/ping").status_code == 200
+    assert client.get("/healthz").status_code == 200
+    metrics = client.get("/metrics", headers={"Authorization": "Bearer scrape"}).text
+    assert 'zappro_admission_shed_total{priority="anonymous"} 1' in metrics
+    assert "zappro_admission_limit 4" in metrics
+
+
+def _service_order(queue: FairQueue, arrivals: list[str]) -> list[str]:
+    async def scenario() -> list[str]:
+        order: list[str] = []
+
+        async def request(tenant: str) -> None:
+            await queue.acquire(tenant)
+            order.append(tenant)
+
+        await queue.acquire("holder")
+        tasks = []
+        for tenant in arrivals:
+            tasks.append(asyncio.ensure_future(request(tenant)))
+            await asyncio.sleep(0)
+        for _ in arrivals:
+            queue.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    return asyncio.run(scenario())
+
+
+def test_fair_queue_interleaves_a_busy_tenant_with_a_small_one():
+    queue = FairQueue(capacity=lambda: 1)
+
+    order = _service_order(queue, ["big"] * 5 + ["small"] * 2)
+
+    assert order == ["big", "small", "big", "small", "big", "big", "big"]
+
+
+def test_fair_queue_weights_give_a_larger_share():
+    queue = FairQueue(capacity=lambda: 1, weights={"paid": 2})
+
+    order = _service_order(queue, ["free"] * 3 + ["paid"] * 4)
+
+    assert order == ["free", "paid", "paid", "free", "paid", "paid", "free"]
+
+
+def test_fair_queue_rejects_full_tenant_queues_and_stale_waiters():
+    async def scenario() -> None:
+        queue = FairQueue(
+            capacity=lambda: 1, max_queue_per_tenant=1, max_wait_seconds=0.05
+        )
+        await queue.acquire("a")
+        waiting = asyncio.ensure_future(queue.acquire("a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(FairQueueRejected) as full:
+            await queue.acquire("a")
+        assert full.value.reason == "queue_full"
+        with pytest.raises(FairQueueRejected) as stale:
+            await waiting
+        assert stale.value.reason == "timeout"
+        assert queue.stats()["waiting"] == 0
+        assert queue.tenants_waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_request_deadline_expiring_in_the_fair_queue_returns_504():
+    app = create_app(
+        Settings(admission={"enabled": False}, fair_queue={"concurrency": 1})
+    )
+    client = TestClient(app)
+    app.state.fair_queue.running = 1
+
+    response = client.get("/api/v1/projects", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+    assert app.state.fair_queue.rejected["deadline"] == 1
+    assert app.state.fair_queue.rejected["timeout"] == 0
+
+
+def test_tenant_key_is_the_authenticated_owner():
+    assert tenant_key(7, "10.0.0.1") == "user:7"
+    assert tenant_key(8, "10.0.0.1") != tenant_key(7, "10.0.0.1")
+    assert tenant_key(None, "10.0.0.1") == "ip:10.0.0.1"
+
+
+def test_full_tenant_queue_returns_429():
+    app = create_app(
+        Settings(
+            admission={"enabled": False},
+            fair_queue={"concurrency": 1, "max_queue_per_tenant": 0},
+        )
+    )
+    client = TestClient(app)
+    app.state.fair_queue.running = 1
+
+    rejected = client.get("/api/v1/projects")
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "2"
+
+    health = client.get("/health").json()
+    assert health["fair_queue_rejected_queue_full"] == "1"
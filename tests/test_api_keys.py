@@ -0,0 +1,85 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+
+def _user_headers(client: TestClient, role: str = "gestor") -> dict[str, str]:
+    email = f"apikey-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "name": "Automation",
+            "password": "secret123",
+            "role": role,
+        },
+    )
+    login = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def _create_key(client: TestClient, headers: dict[str, str], scopes: list[str]) -> dict:
+    response = client.post(
+        "/api/v1/auth/api-keys",
+        headers=headers,
+        json={"name": "n8n", "scopes": scopes},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_api_key_authenticates_and_respects_scopes():
+    client = TestClient(app)
+    headers = _user_headers(client)
+    created = _create_key(client, headers, ["read"])
+    assert created["key"].startswith("zpk_")
+    key_headers = {"Authorization": f"Bearer {created['key']}"}
+
+    assert client.get("/api/v1/projects", headers=key_headers).status_code == 200
+    write = client.post(
+        "/api/v1/projects", headers=key_headers, json={"name": "Automated"}
+    )
+    assert write.status_code == 403
+
+    listed = client.get("/api/v1/auth/api-keys", headers=headers).json()
+    assert [item["prefix"] for item in listed] == [created["prefix"]]
+    assert "key" not in listed[0]
+
+
+def test_write_scope_allows_mutations_and_revocation_takes_effect():
+    client = TestClient(app)
+    headers = _user_headers(client)
+    created = _create_key(client, headers, ["read", "write"])
+    key_headers = {"Authorization": f"Bearer {created['key']}"}
+
+    response = client.post(
+        "/api/v1/projects", headers=key_headers, json={"name": "Automated"}
+    )
+    assert response.status_code == 201
+
+    management = client.get("/api/v1/auth/api-keys", headers=key_headers)
+    assert management.status_code == 403
+
+    revoke = client.delete(f"/api/v1/auth/api-keys/{created['id']}", headers=headers)
+    assert revoke.status_code == 200
+    assert revoke.json()["revoked_at"] is not None
+    assert client.get("/api/v1/projects", headers=key_headers).status_code == 401
+
+
+def test_tampered_api_key_is_rejected_even_when_prefix_is_cached():
+    client = TestClient(app)
+    headers = _user_headers(client)
+    created = _create_key(client, headers, ["read"])
+    key_headers = {"Authorization": f"Bearer {created['key']}"}
+    assert client.get("/api/v1/projects", headers=key_headers).status_code == 200
+
+    tampered = created["key"][:-2] + ("AA" if created["key"][-2:] != "AA" else "BB")
+    response = client.get(
+        "/api/v1/projects", headers={"Authorization": f"Bearer {tampered}"}
+    )
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid API key"
@@ -1,11 +1,20 @@
 import asyncio
+import base64
+import json
 from datetime import timedelta
 from uuid import uuid4
 
 from fastapi.testclient import TestClient
 
 from src.main import app
-from src.utils.auth import generate_refresh_token
+from src.utils.auth import (
+    VerifiedTokenCache,
+    _decode_token,
+    create_access_token,
+    generate_refresh_token,
+    refresh_revocations,
+    token_cache,
+)
 
 
 def _register_user(client: TestClient) -> tuple[str, str]:
@@ -104,3 +113,171 @@ def test_protected_route_with_invalid_token_returns_invalid_error():
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Invalid token"
+
+
+def _segment(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def test_malformed_headers_and_segments_are_invalid_not_server_errors():
+    client = TestClient(app, raise_server_exceptions=False)
+    payload = _segment({"sub": "x", "exp": 9999999999})
+    tokens = [
+        f'{_segment({"alg": "EdDSA", "kid": ["x"]})}.{payload}.c2ln',
+        f'{_segment({"alg": "EdDSA", "kid": {"a": 1}})}.{payload}.c2ln',
+        f'{_segment({"alg": "EdDSA"})}.{payload}é.c2ln',
+    ]
+    for token in tokens:
+        response = client.get(
+            "/api/v1/projects",
+            headers={"Authorization": f"Bearer {token}".encode("latin-1")},
+        )
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid token"
+
+
+def test_verified_token_cache_skips_repeat_verification():
+    token_cache.clear()
+    token = asyncio.run(create_access_token({"sub": "cache@example.com"}))
+
+    first = asyncio.run(_decode_token(token))
+    second = asyncio.run(_decode_token(token))
+
+    assert first == second
+    assert token_cache.stats()["misses"] == 1
+    assert token_cache.stats()["hits"] == 1
+
+
+def test_verified_token_cache_is_bounded_and_honours_exp():
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.put("a", {"sub": "a"}, exp_ts=2**31)
+    cache.put("b", {"sub": "b"}, exp_ts=2**31)
+    cache.put("c", {"sub": "c"}, exp_ts=2**31)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"sub": "c"}
+    assert cache.stats()["entries"] == 2
+
+    cache.put("expired", {"sub": "x"}, exp_ts=1)
+    assert cache.get("expired") is None
+
+
+def _count_user_selects(action):
+    from sqlalchemy import event
+
+    from src.database import engine
+
+    statements: list[str] = []
+
+    def _capture(conn, cursor, statement, *args):  # noqa: ANN001
+        if statement.lstrip().upper().startswith("SELECT") and "users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+    return statements
+
+
+def test_stateless_principal_skips_user_lookup(monkeypatch):
+    from src.utils import auth as auth_utils
+
+    monkeypatch.setattr(auth_utils, "STATELESS_PRINCIPAL", True)
+    auth_utils.principal_versions.clear()
+    client = TestClient(app)
+    email, password = _register_user(client)
+    token = _login(client, email, password)["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/v1/projects", headers=headers).status_code == 200
+    selects = _count_user_selects(
+        lambda: client.get("/api/v1/projects", headers=headers)
+    )
+    assert selects == []
+
+
+def test_role_change_revokes_issued_tokens(monkeypatch):
+    from src.database import SessionLocal
+    from src.models.user import User, UserRole
+    from src.utils import auth as auth_utils
+
+    monkeypatch.setattr(auth_utils, "STATELESS_PRINCIPAL", True)
+    client = TestClient(app)
+    email, password = _register_user(client)
+    token = _login(client, email, password)["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/projects", headers=headers).status_code == 200
+
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).one()
+        user.role = UserRole.operador
+        db.commit()
+
+    response = client.get("/api/v1/projects", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+    fresh = _login(client, email, password)["access_token"]
+    response = client.get(
+        "/api/v1/projects", headers={"Authorization": f"Bearer {fresh}"}
+    )
+    assert response.status_code == 200
+
+
+def test_refresh_rotates_and_detects_reuse():
+    client = TestClient(app)
+    email, password = _register_user(client)
+    original = _login(client, email, password)["refresh_token"]
+
+    rotated = client.post("/api/v1/auth/refresh", json={"refresh_token": original})
+    assert rotated.status_code == 200
+    successor = rotated.json()["refresh_token"]
+    assert successor and successor != original
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": original})
+    assert replay.status_code == 401
+    assert replay.json()["detail"] == "Token revoked"
+
+    # Reuse revokes the whole family, including the legitimately rotated token.
+    family_member = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": successor}
+    )
+    assert family_member.status_code == 401
+
+
+def test_logout_revokes_refresh_token():
+    client = TestClient(app)
+    email, password = _register_user(client)
+    refresh_token = _login(client, email, password)["refresh_token"]
+
+    logout = client.post("/api/v1/auth/logout", json={"refresh_token": refresh_token})
+    assert logout.status_code == 204
+
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": refresh_token}
+    )
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+
+def test_logout_survives_a_restart_or_another_worker():
+    client = TestClient(app)
+    email, password = _register_user(client)
+    refresh_token = _login(client, email, password)["refresh_token"]
+    assert (
+        client.post(
+            "/api/v1/auth/logout", json={"refresh_token": refresh_token}
+        ).status_code
+        == 204
+    )
+
+    # A worker that did not see the logout has an empty filter.
+    refresh_revocations.clear()
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": refresh_token}
+    )
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
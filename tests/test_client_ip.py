@@ -0,0 +1,82 @@
+import logging
+
+from src.security import TrustedProxyMatcher, parse_forwarded_for, resolve_client_ip
+
+
+def _resolve(headers, *, peer="10.0.0.5", header="x-forwarded-for", proxies=None):
+    return resolve_client_ip(
+        peer,
+        headers,
+        trusted_proxies=TrustedProxyMatcher(proxies or ["10.0.0.0/8"]),
+        client_ip_header=header,
+    )
+
+
+def test_matcher_merges_ranges_and_handles_both_families():
+    matcher = TrustedProxyMatcher(
+        ["10.0.0.0/9", "10.128.0.0/9", "192.168.1.7", "2001:db8::/32"]
+    )
+
+    assert "10.200.1.1" in matcher
+    assert "192.168.1.7" in matcher
+    assert "192.168.1.8" not in matcher
+    assert "2001:db8:1::1" in matcher
+    assert "::ffff:10.1.2.3" in matcher
+    assert "not-an-ip" not in matcher
+    assert matcher._starts[4][0] == int.from_bytes(bytes([10, 0, 0, 0]), "big")
+    assert len(matcher._starts[4]) == 2
+
+
+def test_invalid_entries_are_logged_once(caplog):
+    with caplog.at_level(logging.WARNING, logger="zappro.security"):
+        matcher = TrustedProxyMatcher(["bogus", "10.0.0.0/8"])
+        for _ in range(3):
+            resolve_client_ip(
+                "10.0.0.1",
+                {},
+                trusted_proxies=matcher,
+                client_ip_header="x-forwarded-for",
+            )
+
+    assert len(caplog.records) == 1
+
+
+def test_untrusted_peer_header_is_ignored():
+    assert _resolve({"x-forwarded-for": "1.2.3.4"}, peer="8.8.8.8") == "8.8.8.8"
+
+
+def test_x_forwarded_for_walks_right_to_left():
+    headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.9, 10.1.1.1"}
+
+    assert _resolve(headers) == "203.0.113.9"
+
+
+def test_all_trusted_hops_returns_leftmost():
+    assert _resolve({"x-forwarded-for": "10.9.9.9, 10.1.1.1"}) == "10.9.9.9"
+
+
+def test_forwarded_header_parsing():
+    header = (
+        'for=6.6.6.6, for="[2001:db8:cafe::17]:4711";proto=https, '
+        "for=10.1.1.1:8080;by=10.0.0.5"
+    )
+
+    assert parse_forwarded_for(header) == ["6.6.6.6", "2001:db8:cafe::17", "10.1.1.1"]
+    assert _resolve({"forwarded": header}, header="forwarded") == "2001:db8:cafe::17"
+
+
+def test_unknown_hop_stops_at_nearest_trusted_proxy():
+    header = "for=unknown, for=10.1.1.1"
+
+    assert _resolve({"forwarded": header}, header="forwarded") == "10.1.1.1"
+
+
+def test_plain_list_of_proxies_is_still_accepted():
+    client_ip = resolve_client_ip(
+        "10.0.0.5",
+        {"x-forwarded-for": "198.51.100.1"},
+        trusted_proxies=["10.0.0.0/8"],
+        client_ip_header="x-forwarded-for",
+    )
+
+    assert client_ip == "198.51.100.1"
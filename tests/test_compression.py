@@ -0,0 +1,108 @@
+import gzip
+
+import pytest
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.compression import negotiate
+from src.config import Settings
+from src.main import create_app
+
+ITEMS = [{"id": index, "name": f"Cimento CP-II {index}"} for index in range(200)]
+
+
+def build_client(**compression) -> TestClient:
+    app = create_app(Settings(compression=compression))
+
+    @app.get("/api/v1/items")
+    def items():
+        return ITEMS
+
+    @app.get("/api/v1/tagged")
+    def tagged():
+        return Response(b"x" * 4096, media_type="text/plain", headers={"ETag": '"v1"'})
+
+    @app.get("/api/v1/image")
+    def image():
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    @app.get("/api/v1/stream")
+    def stream():
+        chunks = (f'{{"line": {index}}}\n'.encode() for index in range(500))
+        return StreamingResponse(chunks, media_type="application/json")
+
+    return TestClient(app)
+
+
+def test_negotiate_honours_quality_values():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0.5, zstd", zstd=True) == "zstd"
+    assert negotiate("gzip, zstd;q=0.1", zstd=True) == "gzip"
+    assert negotiate("zstd", zstd=False) is None
+    assert negotiate("*;q=0.2", zstd=False) == "gzip"
+    assert negotiate("gzip;q=0, identity") is None
+
+
+def test_large_json_is_gzipped_with_exact_length():
+    client = build_client()
+
+    response = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) == response.num_bytes_downloaded
+    assert response.num_bytes_downloaded < len(response.content) / 4
+    assert response.json() == ITEMS
+
+
+def test_small_and_binary_bodies_are_untouched():
+    client = build_client(minimum_size=1024)
+
+    small = client.get("/ping", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["Vary"] == "Accept-Encoding"
+
+    image = client.get("/api/v1/image", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in image.headers
+    assert "Vary" not in image.headers
+
+    identity = client.get("/api/v1/items", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+
+
+def test_streamed_response_is_compressed_incrementally():
+    client = build_client()
+
+    with client.stream(
+        "GET", "/api/v1/stream", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(raw).count(b"\n") == 500
+
+
+def test_route_level_zero_disables_compression_and_etag_is_weakened():
+    client = build_client(gzip_route_levels={"/api/v1/items": 0})
+
+    items = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in items.headers
+
+    tagged = client.get("/api/v1/tagged", headers={"Accept-Encoding": "gzip"})
+    assert tagged.headers["Content-Encoding"] == "gzip"
+    assert tagged.headers["ETag"] == 'W/"v1"'
+
+
+def test_zstd_is_preferred_when_installed():
+    zstandard = pytest.importorskip("zstandard")
+    client = build_client()
+
+    with client.stream(
+        "GET", "/api/v1/items", headers={"Accept-Encoding": "gzip, zstd"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["Content-Encoding"] == "zstd"
+    decoded = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    assert decoded.count(b'"id"') == len(ITEMS)
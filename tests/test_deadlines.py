@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.database import SessionLocal, get_db
+from src.main import create_app
+from src.utils import deadlines
+from src.utils.executors import BoundedExecutor
+
+# Counts to a billion in SQLite's VM: minutes of work unless interrupted.
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+    "WHERE i < 1000000000) SELECT count(*) FROM n"
+)
+
+
+def test_expired_deadline_interrupts_running_sqlite_statement():
+    db = SessionLocal()
+    token = deadlines.start(0.05)
+    started = time.monotonic()
+    try:
+        with pytest.raises(deadlines.DeadlineExceeded):
+            db.execute(SLOW_QUERY)
+    finally:
+        deadlines.reset(token)
+        db.close()
+
+    assert time.monotonic() - started < 0.5
+
+
+def test_statements_are_refused_once_the_deadline_passed():
+    db = SessionLocal()
+    token = deadlines.start(0)
+    try:
+        with pytest.raises(deadlines.DeadlineExceeded):
+            db.execute(text("SELECT 1"))
+    finally:
+        deadlines.reset(token)
+        db.close()
+
+
+def test_client_timeout_header_cuts_slow_handler_with_504():
+    app = create_app()
+
+    @app.get("/slow-report")
+    def slow_report(db: Session = Depends(get_db)) -> dict[str, int]:
+        return {"rows": db.execute(SLOW_QUERY).scalar_one()}
+
+    client = TestClient(app)
+    started = time.monotonic()
+    response = client.get("/slow-report", headers={"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+    assert response.headers["Cache-Control"] == "no-store"
+    assert time.monotonic() - started < 1.0
+    assert client.get("/ping", headers={"X-Request-Timeout": "5"}).status_code == 200
+
+
+def test_pool_drops_jobs_whose_deadline_passed_in_the_queue():
+    release = threading.Event()
+    calls: list[int] = []
+
+    async def scenario() -> None:
+        pool = BoundedExecutor("test", max_workers=1, max_queue=1)
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+
+        token = deadlines.start(0.05)
+        try:
+            queued = asyncio.ensure_future(pool.run(calls.append, 1))
+        finally:
+            deadlines.reset(token)
+        await asyncio.sleep(0.1)
+        release.set()
+
+        assert await running is True
+        with pytest.raises(deadlines.DeadlineExceeded):
+            await queued
+        assert calls == []
+        assert pool.stats()["expired"] == 1
+        pool.shutdown()
+
+    asyncio.run(scenario())
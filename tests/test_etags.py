@@ -0,0 +1,141 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils.etags import etag_matches
+
+
+def _owner(client: TestClient) -> tuple[dict[str, str], int]:
+    email = f"etag-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "name": "Etag",
+            "password": "secret123",
+            "role": "gestor",
+        },
+    )
+    login = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    project = client.post("/api/v1/projects", headers=headers, json={"name": "Obra"})
+    return headers, project.json()["id"]
+
+
+def _revalidate(client: TestClient, url: str, headers: dict, etag: str):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+def test_task_board_polling_returns_304_until_a_task_changes():
+    client = TestClient(app)
+    headers, project_id = _owner(client)
+    url = f"/api/v1/projects/{project_id}/tasks"
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    polled = _revalidate(client, url, headers, etag)
+    assert polled.status_code == 304
+    assert polled.content == b""
+    assert polled.headers["ETag"] == etag
+
+    created = client.post(
+        "/api/v1/tasks",
+        headers=headers,
+        json={"title": "Armar ferragem", "project_id": project_id},
+    )
+    after_create = _revalidate(client, url, headers, etag)
+    assert after_create.status_code == 200
+    assert len(after_create.json()) == 1
+
+    etag = after_create.headers["ETag"]
+    client.put(
+        f"/api/v1/tasks/{created.json()['id']}",
+        headers=headers,
+        json={"status": "done"},
+    )
+    assert _revalidate(client, url, headers, etag).status_code == 200
+
+
+def test_task_board_of_a_foreign_or_missing_project_is_never_304():
+    client = TestClient(app)
+    _, foreign_id = _owner(client)
+    headers, project_id = _owner(client)
+    client.delete(f"/api/v1/projects/{project_id}", headers=headers)
+
+    for missing in (foreign_id, project_id):
+        url = f"/api/v1/projects/{missing}/tasks"
+        assert "ETag" not in client.get(url, headers=headers).headers
+        assert _revalidate(client, url, headers, "*").status_code != 304
+
+
+def test_collection_etag_tracks_child_rows_and_query():
+    client = TestClient(app)
+    headers, project_id = _owner(client)
+
+    listing = client.get("/api/v1/materials", headers=headers)
+    etag = listing.headers["ETag"]
+    assert _revalidate(client, "/api/v1/materials", headers, etag).status_code == 304
+
+    client.post(
+        "/api/v1/materials",
+        headers=headers,
+        json={"name": "Areia", "project_id": project_id, "stock": 3},
+    )
+    changed = _revalidate(client, "/api/v1/materials", headers, etag)
+    assert changed.status_code == 200
+    assert [item["name"] for item in changed.json()] == ["Areia"]
+
+    projects = client.get("/api/v1/projects", headers=headers)
+    paged = client.get("/api/v1/projects?limit=1", headers=headers)
+    assert projects.headers["ETag"] != paged.headers["ETag"]
+
+
+def test_collection_etag_changes_when_a_new_project_reuses_a_deleted_id():
+    client = TestClient(app)
+    headers, _ = _owner(client)
+    newest = client.post("/api/v1/projects", headers=headers, json={"name": "B"})
+    etag = client.get("/api/v1/projects", headers=headers).headers["ETag"]
+
+    deleted = client.delete(f"/api/v1/projects/{newest.json()['id']}", headers=headers)
+    assert deleted.status_code == 204
+    # SQLite hands the freed max id to the next insert.
+    client.post("/api/v1/projects", headers=headers, json={"name": "RENAMED-NEW"})
+
+    changed = _revalidate(client, "/api/v1/projects", headers, etag)
+    assert changed.status_code == 200
+    assert "RENAMED-NEW" in [project["name"] for project in changed.json()]
+
+
+def test_etag_is_scoped_to_the_caller():
+    client = TestClient(app)
+    first_headers, _ = _owner(client)
+    second_headers, _ = _owner(client)
+
+    first = client.get("/api/v1/documents", headers=first_headers)
+    replay = _revalidate(
+        client, "/api/v1/documents", second_headers, first.headers["ETag"]
+    )
+
+    assert replay.status_code == 200
+
+
+def test_auth_routes_stay_no_store():
+    client = TestClient(app)
+
+    response = client.get("/api/v1/auth/me")
+
+    assert response.headers["Cache-Control"] == "no-store"
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import app, create_app
+from src.utils import auth as auth_utils
+from src.utils import deadlines
+from src.utils.executors import BoundedExecutor, ExecutorSaturated
+
+
+def test_bounded_executor_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    async def scenario() -> None:
+        pool = BoundedExecutor("test", max_workers=1, max_queue=1)
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        queued = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorSaturated) as excinfo:
+            await pool.run(release.wait, 5)
+        assert excinfo.value.retry_after >= 1
+
+        release.set()
+        assert await running is True
+        assert await queued is True
+        stats = pool.stats()
+        assert stats["completed"] == 2
+        assert stats["rejected"] == 1
+        assert stats["queue_wait_max_ms"] > 0
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_register_returns_503_when_hashing_pool_is_saturated(monkeypatch):
+    client = TestClient(app)
+    saturated = BoundedExecutor("password-hashing", max_workers=1, max_queue=0)
+    saturated._pending = 1
+    monkeypatch.setattr(auth_utils, "_password_hasher", saturated)
+
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": f"busy-{uuid4().hex[:8]}@example.com",
+            "name": "Busy",
+            "password": "secret123",
+            "role": "operador",
+        },
+    )
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Authentication service busy"
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_thread_pool_jobs_see_the_callers_deadline():
+    async def scenario() -> None:
+        pool = BoundedExecutor("test", max_workers=1, max_queue=0)
+        token = deadlines.start(5)
+        try:
+            assert await pool.run(deadlines.current) == deadlines.current()
+        finally:
+            deadlines.reset(token)
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_saturated_hashing_pool_does_not_stall_token_checks(monkeypatch):
+    client = TestClient(app)
+    email = f"bulkhead-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": "B", "password": "secret123", "role": "gestor"},
+    )
+    login = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    saturated = BoundedExecutor("password-hashing", max_workers=1, max_queue=0)
+    saturated._pending = 1
+    monkeypatch.setattr(auth_utils, "_password_hasher", saturated)
+    auth_utils.token_cache.clear()
+
+    assert client.get("/api/v1/projects", headers=headers).status_code == 200
+    busy = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+    assert busy.status_code == 503
+
+
+def test_pools_are_sized_from_settings_and_exported():
+    settings = Settings(
+        executors={"handler_threads": 12, "db": {"workers": 3, "max_queue": 5}},
+        metrics={"enabled": True, "scrape_token": "scrape"},
+    )
+    with TestClient(create_app(settings)) as client:
+        metrics = client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape"}
+        ).text
+
+    assert 'zappro_executor_workers{executor="db"} 3' in metrics
+    assert 'zappro_executor_workers{executor="crypto"} 4' in metrics
+    assert 'zappro_executor_workers{executor="handlers"} 12' in metrics
+    assert 'zappro_executor_queue_wait_seconds_total{executor="password-hashing"}' in (
+        metrics
+    )
@@ -0,0 +1,78 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from cryptography.exceptions import InvalidSignature
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils import auth as auth_utils
+from src.utils import keys as jwt_keys
+
+
+def _header(token: str) -> dict:
+    segment = token.split(".")[0]
+    return json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256", "EdDSA"])
+def test_sign_and_verify_round_trip(algorithm):
+    private_key = jwt_keys.generate_private_key(algorithm)
+    assert jwt_keys.algorithm_for_key(private_key) == algorithm
+
+    signature = jwt_keys.sign(private_key, algorithm, b"header.payload")
+    jwt_keys.verify(private_key.public_key(), algorithm, signature, b"header.payload")
+    with pytest.raises(InvalidSignature):
+        jwt_keys.verify(private_key.public_key(), algorithm, signature, b"tampered")
+
+
+def test_jwks_lists_signing_key_and_tokens_carry_kid():
+    client = TestClient(app)
+    token = asyncio.run(auth_utils.create_access_token({"sub": "kid@example.com"}))
+
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+    kids = {key["kid"] for key in response.json()["keys"]}
+    assert _header(token)["kid"] in kids
+
+
+def test_rotated_key_is_selected_by_kid(monkeypatch):
+    old_key = jwt_keys.generate_private_key("ES256")
+    new_key = jwt_keys.generate_private_key("EdDSA")
+    ring_keys = {}
+    for key in (new_key, old_key):
+        public_key = key.public_key()
+        entry = jwt_keys.VerificationKey(
+            kid=jwt_keys.key_id(public_key),
+            algorithm=jwt_keys.algorithm_for_key(public_key),
+            key=public_key,
+        )
+        ring_keys[entry.kid] = entry
+
+    monkeypatch.setattr(
+        auth_utils, "_key_ring", lambda: auth_utils._KeyRing(old_key, ring_keys)
+    )
+    old_token = asyncio.run(auth_utils.create_access_token({"sub": "old@example.com"}))
+    assert _header(old_token)["alg"] == "ES256"
+
+    monkeypatch.setattr(
+        auth_utils, "_key_ring", lambda: auth_utils._KeyRing(new_key, ring_keys)
+    )
+    new_token = asyncio.run(auth_utils.create_access_token({"sub": "new@example.com"}))
+    assert _header(new_token)["alg"] == "EdDSA"
+
+    auth_utils.token_cache.clear()
+    assert asyncio.run(auth_utils._decode_token(old_token))["sub"] == "old@example.com"
+    assert asyncio.run(auth_utils._decode_token(new_token))["sub"] == "new@example.com"
+
+    retired = {kid: key for kid, key in ring_keys.items() if key.algorithm == "EdDSA"}
+    monkeypatch.setattr(
+        auth_utils, "_key_ring", lambda: auth_utils._KeyRing(new_key, retired)
+    )
+    auth_utils.token_cache.clear()
+    with pytest.raises(HTTPException):
+        asyncio.run(auth_utils._decode_token(old_token))
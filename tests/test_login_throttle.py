@@ -0,0 +1,115 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.security import LoginThrottle
+from src.utils import auth as auth_utils
+
+
+def test_backoff_grows_exponentially_after_free_attempts():
+    now = [0.0]
+    throttle = LoginThrottle(
+        email_free_attempts=2,
+        ip_free_attempts=100,
+        base_delay_seconds=1.0,
+        max_delay_seconds=8.0,
+        clock=lambda: now[0],
+    )
+
+    for _ in range(2):
+        assert throttle.check("victim@example.com", "10.0.0.1") == (True, 0.0)
+        throttle.record_failure("victim@example.com", "10.0.0.1")
+
+    allowed, retry_after = throttle.check("VICTIM@example.com", "10.0.0.2")
+    assert not allowed
+    assert retry_after == 1.0
+
+    now[0] = 1.0
+    assert throttle.check("victim@example.com", "10.0.0.1")[0]
+    throttle.record_failure("victim@example.com", "10.0.0.1")
+    assert throttle.check("victim@example.com", "10.0.0.1") == (False, 2.0)
+
+    for _ in range(10):
+        throttle.record_failure("victim@example.com", "10.0.0.1")
+    assert throttle.check("victim@example.com", "10.0.0.1")[1] == 8.0
+    assert throttle.check("someone-else@example.com", "10.0.0.3")[0]
+
+
+def test_memory_is_constant_under_email_spraying():
+    throttle = LoginThrottle(sketch_width=1024, sketch_depth=4)
+    before = throttle.memory_bytes
+    for index in range(20_000):
+        throttle.record_failure(f"user-{index}@example.com", "203.0.113.9")
+    assert throttle.memory_bytes == before
+    assert not throttle.check("fresh@example.com", "203.0.113.9")[0]
+
+
+def test_sprayed_failures_do_not_lock_out_innocent_emails():
+    throttle = LoginThrottle(expected_failures=30_000, clock=lambda: 0.0)
+    for index in range(30_000):
+        throttle.record_failure(
+            f"sprayed-{index // 2}@example.com", f"198.51.{index % 200}.{index // 200}"
+        )
+
+    locked = [
+        index
+        for index in range(5_000)
+        if not throttle.check(f"innocent-{index}@example.com", "192.0.2.10")[0]
+    ]
+    assert locked == []
+
+
+def test_successful_login_forgives_earlier_failures():
+    now = [0.0]
+    throttle = LoginThrottle(
+        email_free_attempts=3, window_seconds=100.0, clock=lambda: now[0]
+    )
+    for _ in range(2):
+        throttle.record_failure("user@example.com", "10.0.0.1")
+    throttle.record_success("user@example.com", "10.0.0.1")
+
+    for _ in range(2):
+        throttle.record_failure("user@example.com", "10.0.0.1")
+    assert throttle.check("user@example.com", "10.0.0.1")[0]
+
+    # Forgiveness follows the failures into the previous generation.
+    now[0] = 150.0
+    assert throttle.check("user@example.com", "10.0.0.1")[0]
+    throttle.record_failure("user@example.com", "10.0.0.1")
+    assert not throttle.check("user@example.com", "10.0.0.1")[0]
+
+
+def test_login_is_rejected_before_password_verification(monkeypatch):
+    client = TestClient(
+        create_app(
+            Settings(login_throttle={"email_free_attempts": 2, "max_delay_seconds": 60})
+        )
+    )
+    email = f"throttle-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": "Throttle", "password": "secret123"},
+    )
+    verifications = []
+    original_verify = auth_utils.verify_password
+
+    def counting_verify(plain: str, hashed: str) -> bool:
+        verifications.append(plain)
+        return original_verify(plain, hashed)
+
+    monkeypatch.setattr(auth_utils, "verify_password", counting_verify)
+
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/auth/login", json={"email": email, "password": "wrong"}
+        )
+        assert response.status_code == 401
+
+    blocked = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+    assert len(verifications) == 2
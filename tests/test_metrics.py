@@ -0,0 +1,124 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.metrics import LatencyHistogram, MetricsRegistry
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_histogram_quantiles_stay_within_bucket_error():
+    histogram = LatencyHistogram()
+    for millis in range(1, 1001):
+        histogram.record(millis * 1_000_000)
+
+    assert histogram.count == 1000
+    assert histogram.quantile(0.5) == pytest.approx(0.5, rel=0.125)
+    assert histogram.quantile(0.99) == pytest.approx(0.99, rel=0.125)
+    assert histogram.cumulative()[-1][1] == 1000
+
+
+def test_histogram_clamps_outliers_into_last_bucket():
+    histogram = LatencyHistogram()
+    histogram.record(10**13)
+
+    assert histogram.counts[-1] == 1
+    assert histogram.sum_ns == 10**13
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe("GET", "/items/{item_id}", 200, 300_000)
+    registry.observe("GET", "/items/{item_id}", 204, 5_000_000)
+    registry.count_rejection("ip")
+
+    text = registry.render()
+
+    labels = 'method="GET",route="/items/{item_id}",status="2xx"'
+    assert "# TYPE zappro_http_request_duration_seconds histogram" in text
+    assert _sample(text, f"zappro_http_requests_total{{{labels}}}") == 2
+    bucket = "zappro_http_request_duration_seconds_bucket"
+    assert _sample(text, f'{bucket}{{{labels},le="0.000512"}}') == 1
+    assert _sample(text, f'{bucket}{{{labels},le="+Inf"}}') == 2
+    assert _sample(text, f"zappro_http_request_duration_seconds_sum{{{labels}}}") == (
+        pytest.approx(0.0053)
+    )
+    assert _sample(text, 'zappro_rate_limit_rejections_total{quota="ip"}') == 1
+
+
+def test_unknown_methods_share_one_series():
+    registry = MetricsRegistry()
+    for index in range(300):
+        registry.observe(f"X{index:04d}", "unmatched", 405, 1_000)
+    registry.observe("PATCH", "unmatched", 405, 1_000)
+
+    assert registry.histogram("OTHER", "unmatched", 405).count == 300
+    assert registry.histogram("X9999", "unmatched", 405).count == 300
+    assert registry.render().count('zappro_http_requests_total{method="') == 2
+
+
+SCRAPER = {"Authorization": "Bearer scrape-secret"}
+METRICS_ON = {"enabled": True, "scrape_token": "scrape-secret"}
+
+
+def test_metrics_endpoint_reports_routes_and_skips_rate_limit_for_scraper():
+    client = TestClient(
+        create_app(Settings(rate_limit={"max_requests": 1}, metrics=METRICS_ON))
+    )
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/health").status_code == 429
+    for _ in range(3):
+        response = client.get("/metrics", headers=SCRAPER)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    health = 'method="GET",route="/health",status="2xx"'
+    assert _sample(text, f"zappro_http_requests_total{{{health}}}") == 1
+    rejected = 'method="GET",route="unmatched",status="4xx"'
+    assert _sample(text, f"zappro_http_requests_total{{{rejected}}}") == 1
+    assert _sample(text, 'zappro_rate_limit_rejections_total{quota="ip"}') == 1
+    assert _sample(text, "zappro_http_requests_in_flight") == 1
+    assert "zappro_auth_cache_hits_total" in text
+    assert 'zappro_executor_queue_depth{executor="password-hashing"}' in text
+
+
+def test_metrics_are_disabled_by_default():
+    client = TestClient(create_app(Settings()))
+
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_scrape_token_or_an_admin():
+    client = TestClient(create_app(Settings(metrics=METRICS_ON)))
+
+    assert client.get("/metrics").status_code == 401
+    wrong = client.get("/metrics", headers={"Authorization": "Bearer guess"})
+    assert wrong.status_code == 401
+
+    email = f"metrics-{uuid4().hex[:8]}@example.com"
+    for role in ("operador", "admin"):
+        client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": f"{role}-{email}",
+                "name": role,
+                "password": "secret123",
+                "role": role,
+            },
+        )
+        token = client.post(
+            "/api/v1/auth/login",
+            json={"email": f"{role}-{email}", "password": "secret123"},
+        ).json()["access_token"]
+        response = client.get("/metrics", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == (200 if role == "admin" else 403)
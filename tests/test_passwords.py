@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.database import SessionLocal
+from src.main import app
+from src.models.user import User
+from src.utils import auth as auth_utils
+from src.utils import passwords
+
+
+def test_scrypt_hash_round_trip():
+    policy = passwords.PasswordPolicy(scheme="scrypt", scrypt_n=2**10)
+
+    hashed = passwords.hash_password("secret123", policy)
+
+    assert hashed.startswith("scrypt$1024$8$1$")
+    assert passwords.verify_password("secret123", hashed)
+    assert not passwords.verify_password("wrong", hashed)
+    assert not passwords.needs_rehash(hashed, policy)
+
+
+def test_needs_rehash_detects_scheme_and_cost_changes():
+    weak = passwords.hash_password(
+        "secret123", passwords.PasswordPolicy(iterations=1_000)
+    )
+
+    assert passwords.needs_rehash(weak, passwords.PasswordPolicy(iterations=2_000))
+    assert passwords.needs_rehash(weak, passwords.PasswordPolicy(scheme="scrypt"))
+    assert not passwords.needs_rehash(
+        weak, passwords.PasswordPolicy(iterations=1_100, tolerance=0.25)
+    )
+
+
+def test_calibration_respects_floor():
+    policy = passwords.calibrate_policy(
+        passwords.PasswordPolicy(), target_ms=1, min_iterations=50_000
+    )
+
+    assert policy.iterations == 50_000
+    assert policy.tolerance > 0
+
+
+def test_login_rehashes_outdated_password(monkeypatch):
+    client = TestClient(app)
+    email = f"rehash-{uuid4().hex[:8]}@example.com"
+    monkeypatch.setattr(
+        auth_utils, "_password_policy", passwords.PasswordPolicy(iterations=1_000)
+    )
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": "Rehash", "password": "secret123"},
+    )
+
+    monkeypatch.setattr(
+        auth_utils,
+        "_password_policy",
+        passwords.PasswordPolicy(scheme="scrypt", scrypt_n=2**10),
+    )
+    response = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    )
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        stored = db.query(User).filter(User.email == email).one().hashed_password
+    assert stored.startswith("scrypt$1024$")
+    assert passwords.verify_password("secret123", stored)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from src.main import create_app
+from src.profiler import Profiler, StackSampler
+
+
+def _headers(client: TestClient, role: str) -> dict[str, str]:
+    email = f"profile-{role}-{uuid4().hex[:8]}@example.com"
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": role, "password": "secret123", "role": role},
+    )
+    token = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _burn(seconds: float) -> None:
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        pass
+
+
+def test_sampler_folds_stacks_and_skips_idle_threads():
+    idle = threading.Event()
+    waiter = threading.Thread(target=idle.wait, daemon=True)
+    busy = threading.Thread(target=_burn, args=(0.3,), name="burner", daemon=True)
+    waiter.start()
+    busy.start()
+    sampler = StackSampler(interval=0.005)
+    sampler.start()
+    busy.join()
+    sampler.stop()
+    idle.set()
+
+    lines = sampler.collapsed().splitlines()
+    assert any(
+        line.startswith("thread:burner;") and "test_profiler._burn" in line
+        for line in lines
+    )
+    assert not any("threading.Condition.wait" in line for line in lines)
+
+    profile = sampler.speedscope("test")
+    sampled = profile["profiles"][0]
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert all(
+        index < len(profile["shared"]["frames"])
+        for stack in sampled["samples"]
+        for index in stack
+    )
+
+
+def test_request_left_from_a_timed_out_profile_does_not_stall_the_next():
+    async def scenario() -> None:
+        profiler = Profiler()
+        first = asyncio.ensure_future(
+            profiler.profile_requests(StackSampler(), "/slow", timeout=0.05)
+        )
+        await asyncio.sleep(0)
+        stale = profiler.request_started("GET", "/slow")
+        assert await first == 1
+
+        sampler = StackSampler(interval=0.002, include_idle=True)
+        second = asyncio.ensure_future(
+            profiler.profile_requests(sampler, "/slow", requests=1, timeout=5)
+        )
+        await asyncio.sleep(0)
+        current = profiler.request_started("GET", "/slow")
+        profiler.request_finished(stale)
+        await asyncio.sleep(0.05)
+        assert not second.done()
+        ticks = sampler.ticks
+        profiler.request_finished(current)
+
+        assert await second == 1
+        assert ticks > 0
+
+    asyncio.run(scenario())
+
+
+def test_window_profile_is_admin_only():
+    client = TestClient(create_app())
+    operador = _headers(client, "operador")
+
+    response = client.get("/api/v1/admin/profile?seconds=0.1", headers=operador)
+
+    assert response.status_code == 403
+
+
+def test_request_profile_samples_only_selected_requests():
+    app = create_app()
+
+    @app.get("/api/v1/slow-report")
+    def slow_report() -> dict[str, bool]:
+        _burn(0.05)
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        admin = _headers(client, "admin")
+        result: dict = {}
+
+        def profile() -> None:
+            result["response"] = client.get(
+                "/api/v1/admin/profile/requests",
+                params={
+                    "route": "GET /api/v1/slow-report",
+                    "every": 2,
+                    "requests": 2,
+                    "interval_ms": 2,
+                    "format": "speedscope",
+                },
+                headers=admin,
+            )
+
+        runner = threading.Thread(target=profile)
+        runner.start()
+        while not app.state.profiler.armed:
+            time.sleep(0.005)
+        for _ in range(4):
+            client.get("/api/v1/slow-report")
+        runner.join(timeout=10)
+
+        released = client.get("/api/v1/admin/profile?seconds=0.05", headers=admin)
+
+    response = result["response"]
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Requests"] == "2"
+    names = {frame["name"] for frame in response.json()["shared"]["frames"]}
+    assert "test_profiler._burn" in names
+    assert any(name.endswith("<locals>.slow_report") for name in names)
+    assert released.status_code == 200
@@ -0,0 +1,248 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.security import (
+    BloomRequestIdTracker,
+    FixedWindowRateLimiter,
+    GcraRateLimiter,
+    RequestIdTracker,
+    RouteCostTable,
+    create_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_gcra_allows_burst_then_spaces_requests():
+    clock = FakeClock()
+    limiter = GcraRateLimiter(max_requests=4, window_seconds=60, clock=clock)
+
+    assert all(limiter.allow("client")[0] for _ in range(4))
+    allowed, retry_after = limiter.allow("client")
+    assert not allowed
+    assert retry_after == pytest.approx(15.0)
+
+    clock.now += 15.0
+    assert limiter.allow("client") == (True, 0.0)
+    assert not limiter.allow("client")[0]
+
+
+def test_gcra_has_no_double_burst_at_window_boundary():
+    clock = FakeClock(59.0)
+    limiter = GcraRateLimiter(max_requests=10, window_seconds=60, clock=clock)
+
+    allowed = sum(limiter.allow("client")[0] for _ in range(10))
+    clock.now = 61.0
+    allowed += sum(limiter.allow("client")[0] for _ in range(10))
+
+    assert allowed == 10
+
+
+def test_gcra_rejection_does_not_consume_capacity():
+    clock = FakeClock()
+    limiter = GcraRateLimiter(max_requests=1, window_seconds=10, clock=clock)
+
+    assert limiter.allow("client")[0]
+    for _ in range(5):
+        assert not limiter.allow("client")[0]
+
+    clock.now += 10.0
+    assert limiter.allow("client")[0]
+
+
+def test_gcra_evicts_least_recently_seen_clients():
+    limiter = GcraRateLimiter(
+        max_requests=1, window_seconds=60, max_entries=100, clock=FakeClock()
+    )
+
+    for index in range(1000):
+        limiter.allow(f"10.0.{index // 256}.{index % 256}")
+    assert len(limiter) <= 100
+
+    limiter.allow("recent")
+    for index in range(50):
+        limiter.allow(f"other-{index}")
+    assert not limiter.allow("recent")[0]
+
+
+def test_gcra_reset_and_clear():
+    limiter = GcraRateLimiter(max_requests=1, window_seconds=60, clock=FakeClock())
+
+    limiter.allow("client")
+    limiter.reset("client")
+    assert limiter.allow("client")[0]
+
+    limiter.clear()
+    assert len(limiter) == 0
+
+
+def test_create_rate_limiter_selects_algorithm():
+    kwargs = {"max_requests": 5, "window_seconds": 60}
+
+    assert isinstance(create_rate_limiter("gcra", **kwargs), GcraRateLimiter)
+    assert isinstance(
+        create_rate_limiter("fixed_window", **kwargs), FixedWindowRateLimiter
+    )
+    with pytest.raises(ValueError):
+        create_rate_limiter("leaky", **kwargs)
+
+
+def test_fixed_window_state_is_bounded_by_distinct_clients():
+    clock = FakeClock()
+    limiter = FixedWindowRateLimiter(
+        max_requests=5, window_seconds=60, max_entries=100, clock=clock
+    )
+
+    for _ in range(10_000):
+        limiter.allow("chatty")
+    assert len(limiter) == 1
+
+    for index in range(1000):
+        limiter.allow(f"client-{index}")
+    assert len(limiter) <= 100
+
+
+def test_fixed_window_resets_each_window_and_expires_idle_clients():
+    clock = FakeClock(0.0)
+    limiter = FixedWindowRateLimiter(
+        max_requests=1, window_seconds=60, ttl_seconds=120, clock=clock
+    )
+
+    assert limiter.allow("client") == (True, 0.0)
+    allowed, retry_after = limiter.allow("client")
+    assert not allowed
+    assert retry_after == pytest.approx(60.0)
+
+    clock.now = 60.0
+    assert limiter.allow("client")[0]
+
+    clock.now = 130.0
+    limiter.allow("other")
+    clock.now = 260.0
+    limiter.allow("other")
+    assert len(limiter) == 1
+
+
+def test_request_id_tracker_detects_duplicates_within_ttl():
+    clock = FakeClock(0.0)
+    tracker = RequestIdTracker(ttl_seconds=10, max_entries=1000, clock=clock)
+
+    assert tracker.register("a" * 32) is False
+    clock.now = 9.0
+    assert tracker.register("a" * 32) is True
+    clock.now = 25.0
+    assert tracker.register("a" * 32) is False
+
+
+def test_request_id_tracker_is_bounded():
+    tracker = RequestIdTracker(ttl_seconds=300, max_entries=100, clock=FakeClock())
+
+    for index in range(10_000):
+        tracker.register(f"{index:032x}")
+
+    assert len(tracker) <= 100
+
+
+def test_bloom_request_id_tracker_detects_duplicates_and_forgets():
+    clock = FakeClock(0.0)
+    tracker = BloomRequestIdTracker(ttl_seconds=10, max_entries=1000, clock=clock)
+
+    assert tracker.register("a" * 32) is False
+    assert tracker.register("a" * 32) is True
+
+    clock.now = 25.0
+    assert tracker.register("a" * 32) is False
+
+
+def test_bloom_request_id_tracker_reports_fixed_memory_and_fp_rate():
+    tracker = BloomRequestIdTracker(
+        ttl_seconds=300, max_entries=10_000, fp_rate=0.01, clock=FakeClock()
+    )
+    memory = tracker.stats()["memory_bytes"]
+
+    false_positives = sum(tracker.register(f"{i:032x}") for i in range(10_000))
+
+    stats = tracker.stats()
+    assert stats["memory_bytes"] == memory
+    assert false_positives / 10_000 < 0.02
+    assert 0 < stats["fp_rate"] < 0.02
+
+
+def test_app_reports_bloom_request_id_tracker_stats():
+    client = TestClient(create_app(Settings(request_id_tracker="bloom")))
+
+    payload = client.get("/health").json()
+
+    assert float(payload["request_id_memory_bytes"]) > 0
+    assert "request_id_fp_rate" in payload
+
+
+def test_route_cost_table_prefers_longest_and_method_specific_rules():
+    table = RouteCostTable(
+        {
+            "/api/v1": 2,
+            "GET /api/v1/documents": 5,
+            "/api/v1/documents": 4,
+            "/healthz": 0,
+        }
+    )
+
+    assert table.cost("GET", "/api/v1/documents/7") == 5
+    assert table.cost("POST", "/api/v1/documents") == 4
+    assert table.cost("GET", "/api/v1/documentsx") == 2
+    assert table.cost("GET", "/healthz") == 0
+    assert table.cost("GET", "/health") == 1
+
+
+@pytest.mark.parametrize("limiter_cls", [FixedWindowRateLimiter, GcraRateLimiter])
+def test_costly_requests_drain_budget_faster(limiter_cls):
+    limiter = limiter_cls(max_requests=10, window_seconds=60, clock=FakeClock())
+
+    assert limiter.allow("client", 5)[0]
+    assert limiter.allow("client", 5)[0]
+    assert not limiter.allow("client", 1)[0]
+
+
+def _login(client: TestClient, email: str) -> dict[str, str]:
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "name": "Worker", "password": "secret123"},
+    )
+    token = client.post(
+        "/api/v1/auth/login", json={"email": email, "password": "secret123"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_authenticated_users_behind_one_ip_have_separate_quotas():
+    settings = Settings(
+        rate_limit={
+            "max_requests": 3,
+            "principal_max_requests": 5,
+            "window_seconds": 60,
+            "route_costs": {"/api/v1/auth": 0, "/healthz": 0},
+        }
+    )
+    client = TestClient(create_app(settings))
+    workers = [_login(client, f"nat-{i}-{uuid4().hex[:8]}@example.com") for i in (1, 2)]
+
+    # A token's first request is verified after the limiter runs, so it is
+    # still charged to the IP; later ones use the principal's own budget.
+    for headers in workers:
+        for _ in range(6):
+            assert client.get("/api/v1/projects", headers=headers).status_code == 200
+        assert client.get("/api/v1/projects", headers=headers).status_code == 429
+
+    assert client.get("/healthz").status_code == 200
+    assert client.get("/health").status_code == 200
+    assert client.get("/health").status_code == 429
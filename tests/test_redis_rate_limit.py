@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import math
+import socketserver
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.security import FIXED_WINDOW_SCRIPT, GCRA_SCRIPT, RedisRateLimiter
+from src.utils.resp import RespClient, RespError, encode_command
+
+
+def _encode_reply(value) -> bytes:
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(v) for v in value)
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    data = value
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """In-process RESP server that runs the limiter scripts as Python."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.lock = threading.Lock()
+        self.data: dict[bytes, tuple[int, float]] = {}
+        self.loaded: set[str] = set()
+        self.commands: list[bytes] = []
+        self.scripts = {
+            hashlib.sha1(GCRA_SCRIPT).hexdigest(): self._gcra,
+            hashlib.sha1(FIXED_WINDOW_SCRIPT).hexdigest(): self._fixed_window,
+        }
+
+    @property
+    def url(self) -> str:
+        return "redis://%s:%d/0" % self.server_address
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+    def _get(self, key: bytes, now: int):
+        value, expires = self.data.get(key, (None, 0))
+        if value is None or expires <= now:
+            self.data.pop(key, None)
+            return None, 0
+        return value, expires
+
+    def _set_px(self, key: bytes, value: float, px: float, now: int):
+        # Redis rejects a non-integer TTL, which fails the whole script.
+        if px != int(px) or px <= 0:
+            return RespError("ERR value is not an integer or out of range")
+        self.data[key] = (value, now + int(px))
+        return None
+
+    def _gcra(self, key: bytes, interval: float, tolerance: float, cost: float):
+        now = self._now_ms()
+        tat, _ = self._get(key, now)
+        tat = max(tat if tat is not None else now, now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - tolerance
+        if allow_at > now:
+            return [0, int(allow_at - now)]
+        error = self._set_px(key, new_tat, max(math.ceil(new_tat - now), 1), now)
+        return error or [1, 0]
+
+    def _fixed_window(self, key: bytes, limit: float, window_ms: float, cost: float):
+        now = self._now_ms()
+        count, expires = self._get(key, now)
+        count = count or 0
+        if count + cost > limit:
+            return [0, max(int(expires - now), 0)]
+        self.data[key] = (count + cost, expires or now + window_ms)
+        return [1, 0]
+
+    def handle_command(self, args: list[bytes]):
+        name = args[0].upper()
+        with self.lock:
+            self.commands.append(name)
+            if name == b"PING":
+                return "PONG"
+            if name == b"SELECT":
+                return "OK"
+            if name == b"SCRIPT" and args[1].upper() == b"LOAD":
+                sha = hashlib.sha1(args[2]).hexdigest()
+                self.loaded.add(sha)
+                return sha
+            if name == b"EVALSHA":
+                sha = args[1].decode()
+                if sha not in self.loaded:
+                    return RespError("NOSCRIPT No matching script.")
+                key = args[3]
+                return self.scripts[sha](key, *(float(arg) for arg in args[4:]))
+        return RespError("ERR unknown command")
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(_encode_reply(self.server.handle_command(args)))
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedis()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_encode_command_uses_bulk_strings():
+    assert (
+        encode_command("GET", b"k", 5) == b"*3\r\n$3\r\nGET\r\n$1\r\nk\r\n$1\r\n5\r\n"
+    )
+
+
+def test_client_pipelines_concurrent_commands(fake_redis):
+    async def scenario():
+        client = RespClient(fake_redis.url)
+        replies = await asyncio.gather(*(client.execute("PING") for _ in range(20)))
+        await client.close()
+        return replies
+
+    assert asyncio.run(scenario()) == ["PONG"] * 20
+
+
+def test_limiter_loads_script_once_and_enforces_limit(fake_redis):
+    limiter = RedisRateLimiter(
+        RespClient(fake_redis.url), max_requests=2, window_seconds=60
+    )
+
+    async def scenario():
+        results = [await limiter.allow_async("10.0.0.1") for _ in range(3)]
+        await limiter.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert 0 < results[-1][1] <= 60
+    assert fake_redis.commands.count(b"SCRIPT") == 1
+    assert limiter.fallback_decisions == 0
+
+
+def test_gcra_limit_is_shared_between_limiters(fake_redis):
+    def build():
+        return RedisRateLimiter(
+            RespClient(fake_redis.url),
+            algorithm="gcra",
+            max_requests=2,
+            window_seconds=60,
+        )
+
+    first, second = build(), build()
+
+    async def scenario():
+        results = [
+            await first.allow_async("client"),
+            await second.allow_async("client"),
+            await first.allow_async("client"),
+        ]
+        await first.aclose()
+        await second.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert results[-1][1] == pytest.approx(30, abs=1)
+
+
+def test_gcra_accepts_fractional_costs(fake_redis):
+    limiter = RedisRateLimiter(
+        RespClient(fake_redis.url),
+        algorithm="gcra",
+        max_requests=3,
+        window_seconds=1,
+    )
+
+    async def scenario():
+        results = [await limiter.allow_async("client", 0.5) for _ in range(7)]
+        await limiter.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [allowed for allowed, _ in results] == [True] * 6 + [False]
+    assert limiter.fallback_decisions == 0
+
+
+def test_limiter_falls_back_when_redis_is_down():
+    now = [0.0]
+    limiter = RedisRateLimiter(
+        RespClient("redis://127.0.0.1:1/0", timeout=0.5),
+        max_requests=1,
+        window_seconds=60,
+        retry_seconds=5,
+        clock=lambda: now[0],
+    )
+
+    async def scenario():
+        return [await limiter.allow_async("client") for _ in range(2)]
+
+    results = asyncio.run(scenario())
+    assert [allowed for allowed, _ in results] == [True, False]
+    assert limiter.fallback_decisions == 2
+
+
+def test_app_uses_redis_backend(fake_redis):
+    settings = Settings(
+        rate_limit={
+            "backend": "redis",
+            "redis_url": fake_redis.url,
+            "max_requests": 1,
+            "window_seconds": 60,
+        }
+    )
+    client = TestClient(create_app(settings))
+
+    assert client.get("/health").status_code == 200
+    blocked = client.get("/health")
+    assert blocked.status_code == 429
+    assert blocked.headers["Retry-After"].isdigit()
+    assert b"EVALSHA" in fake_redis.commands
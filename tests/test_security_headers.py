@@ -4,6 +4,7 @@ from datetime import datetime
 from pathlib import Path
 
 import pytest
+from fastapi.responses import StreamingResponse
 from fastapi.testclient import TestClient
 
 from src import __version__
@@ -158,3 +159,49 @@ def test_error_responses_emits_security_headers():
             "Content-Security-Policy",
         ],
     )
+
+
+def test_gcra_rate_limit_blocks_after_threshold():
+    client = build_client(
+        rate_limit={
+            "algorithm": "gcra",
+            "max_requests": 2,
+            "window_seconds": 60,
+            "ttl_seconds": 60,
+        }
+    )
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/health").status_code == 200
+
+    blocked = client.get("/health")
+    assert blocked.status_code == 429
+    assert blocked.headers["Retry-After"].isdigit()
+
+
+def test_streaming_response_keeps_route_headers():
+    app = create_app()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            iter([b"a", b"b", b"c"]), headers={"Cache-Control": "max-age=60"}
+        )
+
+    response = TestClient(app).get("/stream")
+
+    assert response.content == b"abc"
+    assert response.headers["Cache-Control"] == "max-age=60"
+    assert response.headers.get_list("Cache-Control") == ["max-age=60"]
+    _assert_headers(response, ["X-Content-Type-Options", "X-Request-ID"])
+
+
+def test_rate_limited_response_emits_security_headers():
+    client = build_client(rate_limit={"max_requests": 1, "window_seconds": 60})
+
+    client.get("/health")
+    blocked = client.get("/health")
+
+    assert blocked.status_code == 429
+    assert blocked.json() == {"detail": "Too Many Requests"}
+    _assert_headers(blocked, ["X-Content-Type-Options", "X-API-Version"])
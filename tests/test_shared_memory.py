@@ -0,0 +1,197 @@
+import asyncio
+import fcntl
+import multiprocessing
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import Settings
+from src.main import create_app
+from src.security import SharedMemoryRateLimiter, SharedRequestIdTracker
+from src.utils import shm
+from src.utils.shm import SharedMemoryTable
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _hit(path: str, count: int) -> None:
+    table = SharedMemoryTable(path, max_entries=64)
+    limiter = SharedMemoryRateLimiter(table, max_requests=1000, window_seconds=3600)
+    for _ in range(count):
+        limiter.allow("shared-client")
+    table.close()
+
+
+def test_table_has_fixed_footprint_and_evicts_oldest(tmp_path):
+    table = SharedMemoryTable(str(tmp_path / "table"), max_entries=64)
+    size = table.memory_bytes()
+
+    for index in range(1000):
+        table.update(f"key-{index}", lambda a, b, found: (a + 1, b, found))
+
+    assert table.memory_bytes() == size
+    assert len(table) == table.capacity == 64
+    assert table.get("key-999") == (1.0, 0.0)
+    table.close()
+
+
+def test_table_reopen_sees_existing_entries(tmp_path):
+    path = str(tmp_path / "table")
+    first = SharedMemoryTable(path, max_entries=64)
+    first.update("k", lambda a, b, found: (7.0, 3.0, None))
+
+    second = SharedMemoryTable(path, max_entries=64)
+    assert second.get("k") == (7.0, 3.0)
+
+    second.delete("k")
+    assert first.get("k") is None
+    with pytest.raises(ValueError):
+        SharedMemoryTable(path, max_entries=1024)
+    first.close()
+    second.close()
+
+
+def test_table_left_by_another_boot_is_cleared(tmp_path, monkeypatch):
+    path = str(tmp_path / "table")
+    first = SharedMemoryTable(path, max_entries=64)
+    first.update("k", lambda a, b, found: (7.0, 3.0, None))
+    first.close()
+    same_boot = SharedMemoryTable(path, max_entries=64)
+    assert same_boot.get("k") == (7.0, 3.0)
+    same_boot.close()
+
+    monkeypatch.setattr(shm, "_boot_id", lambda: b"\x01" * 16)
+    rebooted = SharedMemoryTable(path, max_entries=64)
+    assert rebooted.get("k") is None
+    assert len(rebooted) == 0
+    rebooted.close()
+
+
+def test_table_refuses_to_overwrite_a_foreign_file(tmp_path):
+    path = tmp_path / "not-a-table"
+    path.write_bytes(b"important data")
+
+    with pytest.raises(ValueError, match="refusing"):
+        SharedMemoryTable(str(path), max_entries=64)
+    assert path.read_bytes() == b"important data"
+
+
+def _hold_stripe(path: str, held, release) -> None:
+    fd = os.open(path, os.O_RDWR)
+    fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+    held.set()
+    release.wait(5)
+    os.close(fd)
+
+
+def test_contended_stripe_is_awaited_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "contended")
+    table = SharedMemoryTable(path, max_entries=8, stripes=1)
+    context = multiprocessing.get_context("fork")
+    held, release = context.Event(), context.Event()
+    holder = context.Process(target=_hold_stripe, args=(path, held, release))
+    holder.start()
+    held.wait(5)
+
+    with pytest.raises(BlockingIOError):
+        table.update("k", lambda a, b, found: (1.0, 0.0, None), blocking=False)
+
+    async def scenario() -> int:
+        ticks = 0
+        update = asyncio.ensure_future(
+            table.update_async("k", lambda a, b, found: (a + 1, b, a + 1))
+        )
+        while not update.done():
+            ticks += 1
+            if ticks == 3:
+                release.set()
+            await asyncio.sleep(0.01)
+        assert update.result() == 1.0
+        return ticks
+
+    assert asyncio.run(scenario()) >= 3
+    holder.join()
+    table.close()
+    table.close()
+
+
+def test_limiter_counts_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "limiter")
+    SharedMemoryTable(path, max_entries=64).close()
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_hit, args=(path, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    table = SharedMemoryTable(path, max_entries=64)
+    assert table.get("shared-client")[1] == 200
+    table.close()
+
+
+def test_gcra_shared_limiter_spaces_requests(tmp_path):
+    clock = FakeClock()
+    table = SharedMemoryTable(str(tmp_path / "gcra"), max_entries=64, clock=clock)
+    limiter = SharedMemoryRateLimiter(
+        table, algorithm="gcra", max_requests=2, window_seconds=60, clock=clock
+    )
+
+    assert limiter.allow("client")[0]
+    assert limiter.allow("client")[0]
+    allowed, retry_after = limiter.allow("client")
+    assert not allowed
+    assert retry_after == pytest.approx(30.0)
+
+    clock.now += 30.0
+    assert limiter.allow("client")[0]
+    table.close()
+
+
+def test_shared_request_id_tracker_expires(tmp_path):
+    clock = FakeClock()
+    table = SharedMemoryTable(str(tmp_path / "ids"), max_entries=64)
+    tracker = SharedRequestIdTracker(table, ttl_seconds=10, clock=clock)
+    other = SharedRequestIdTracker(
+        SharedMemoryTable(str(tmp_path / "ids"), max_entries=64),
+        ttl_seconds=10,
+        clock=clock,
+    )
+
+    assert tracker.register("a" * 32) is False
+    assert other.register("a" * 32) is True
+
+    clock.now += 11
+    assert tracker.register("a" * 32) is False
+    table.close()
+
+
+def test_app_uses_shared_memory_backend(tmp_path):
+    settings = Settings(
+        rate_limit={
+            "backend": "shared_memory",
+            "shm_path": str(tmp_path / "rate-limit"),
+            "max_requests": 1,
+            "window_seconds": 60,
+        },
+        request_id_shm_path=str(tmp_path / "request-ids"),
+    )
+    first_app = create_app(settings)
+    first = TestClient(first_app)
+    second = TestClient(create_app(settings))
+
+    assert first.get("/health").status_code == 200
+    assert second.get("/health").status_code == 429
+
+    with first:
+        pass
+    assert first_app.state.rate_limiter.table._mm.closed
+    assert first_app.state.request_id_tracker.table._mm.closed
@@ -0,0 +1,64 @@
+import random
+from collections import Counter
+
+from src.sketches import BloomFilter, RotatingBloomFilter, SpaceSaving
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_fp_rate():
+    bloom = BloomFilter(capacity=5_000, fp_rate=0.01)
+    for index in range(5_000):
+        bloom.add(f"member-{index}")
+
+    assert all(f"member-{index}" in bloom for index in range(5_000))
+    false_positives = sum(f"other-{index}" in bloom for index in range(20_000))
+    assert false_positives / 20_000 < 0.02
+    assert bloom.estimated_fp_rate() < 0.02
+    assert bloom.set_bits == sum(bin(byte).count("1") for byte in bloom._bits)
+    bloom.clear()
+    assert bloom.fill_ratio() == 0
+
+
+def test_rotating_bloom_filter_forgets_old_generations():
+    now = [0.0]
+    bloom = RotatingBloomFilter(
+        capacity=1_000, fp_rate=0.01, generations=2, period=10, clock=lambda: now[0]
+    )
+    bloom.add("old")
+    memory = bloom.memory_bytes
+
+    now[0] = 11
+    assert "old" in bloom
+    now[0] = 22
+    assert "old" not in bloom
+    for index in range(10_000):
+        bloom.add(f"flood-{index}")
+    assert bloom.memory_bytes == memory
+
+
+def test_space_saving_finds_heavy_hitters_in_fixed_memory():
+    rng = random.Random(3)
+    sketch = SpaceSaving(capacity=20)
+    truth: Counter[str] = Counter()
+    for _ in range(20_000):
+        if rng.random() < 0.3:
+            key = rng.choice(["a", "b", "c"])
+        else:
+            key = f"noise-{rng.randrange(5000)}"
+        sketch.add(key)
+        truth[key] += 1
+
+    assert len(sketch) == 20
+    assert sketch.total == 20_000
+    top = sketch.top(3)
+    assert {key for key, _, _ in top} == {"a", "b", "c"}
+    for key, count, error in top:
+        assert count - error <= truth[key] <= count
+
+
+def test_space_saving_counts_are_exact_below_capacity():
+    sketch = SpaceSaving(capacity=4)
+    for key, times in (("x", 5), ("y", 3), ("z", 1)):
+        for _ in range(times):
+            sketch.add(key)
+
+    assert sketch.top() == [("x", 5, 0), ("y", 3, 0), ("z", 1, 0)]